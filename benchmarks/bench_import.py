@@ -0,0 +1,61 @@
+"""Import time of the package and its modules.
+
+Each import runs in a fresh interpreter (best of --repeat) and reports the
+wall time and which heavy dependencies it pulled in, as JSON:
+
+    python benchmarks/bench_import.py [--repeat 5] [--output results.json]
+"""
+import argparse
+import json
+import subprocess
+import sys
+
+STATEMENTS = [
+    "import pyside6_plotly",
+    "import pyside6_plotly.encoding",
+    "import pyside6_plotly.http_server",
+    "from pyside6_plotly import PlotlyQtWidget",
+]
+
+HEAVY = ("plotly", "PySide6", "numpy")
+
+SCRIPT = """
+import sys, time
+start = time.perf_counter()
+{statement}
+elapsed = time.perf_counter() - start
+loaded = sorted({{m.split('.')[0] for m in sys.modules}} & set({heavy!r}))
+print(elapsed, ' '.join(loaded))
+"""
+
+
+def time_import(statement, repeat):
+    best = float("inf")
+    loaded = []
+    for _ in range(repeat):
+        script = SCRIPT.format(statement=statement, heavy=HEAVY)
+        result = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True)
+        if result.returncode != 0:
+            return {"statement": statement, "error": result.stderr.strip().splitlines()[-1]}
+        elapsed, *loaded = result.stdout.split()
+        best = min(best, float(elapsed))
+    return {"statement": statement, "seconds": best, "loads": loaded}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="JSON file for the results (default: stdout)")
+    args = parser.parse_args(argv)
+
+    results = [time_import(statement, args.repeat) for statement in STATEMENTS]
+    text = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""Compare the JSON and binary (typed array) figure transports.
+
+Times serialize_figure() for both encodings and reports the payload size
+that has to cross the QWebChannel, for a range of trace sizes.
+
+    python benchmarks/bench_transport.py [n_points ...]
+"""
+import sys
+import time
+
+import numpy as np
+import plotly.graph_objects as go
+
+from pyside6_plotly.encoding import serialize_figure
+
+
+def best_of(fn, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def run(n_points):
+    rng = np.random.default_rng(0)
+    x = np.arange(n_points, dtype=np.float64)
+    y = rng.standard_normal(n_points).cumsum()
+    fig = go.Figure(go.Scattergl(x=x, y=y, mode="lines"))
+
+    rows = []
+    for binary in (False, True):
+        elapsed, payload = best_of(lambda: serialize_figure(fig, binary=binary))
+        rows.append((binary, elapsed, len(payload)))
+    return rows
+
+
+if __name__ == "__main__":
+    sizes = [int(n) for n in sys.argv[1:]] or [10_000, 100_000, 1_000_000]
+    print(f"{'points':>10} {'encoding':>8} {'time (ms)':>10} {'payload (MB)':>13}")
+    for n in sizes:
+        for binary, elapsed, size in run(n):
+            label = "binary" if binary else "json"
+            print(f"{n:>10} {label:>8} {elapsed * 1e3:>10.1f} {size / 1e6:>13.2f}")
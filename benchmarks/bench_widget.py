@@ -0,0 +1,250 @@
+"""Headless benchmarks of the PlotlyQtWidget pipeline.
+
+Runs QtWebEngine offscreen with software rendering and measures:
+
+    first_plot      widget creation + set_figure until the plot is drawn
+    update          set_figure on a plotted widget until the page has
+                    rendered it, by number of points and of traces
+    event           synthetic Plotly event in the page until the Python
+                    signal fires
+    memory          peak Python allocations (tracemalloc) and RSS, and the
+                    page's JS heap where Chromium reports it
+
+Results are written as JSON so runs can be compared across versions:
+
+    python benchmarks/bench_widget.py --output results.json
+    python benchmarks/bench_widget.py --points 1000 100000 --traces 1 20
+    python benchmarks/bench_widget.py --transport http
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+
+# must be set before Qt is loaded
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+os.environ.setdefault("QT_OPENGL", "software")
+os.environ.setdefault("QTWEBENGINE_CHROMIUM_FLAGS", "--disable-gpu --no-sandbox")
+
+import numpy as np  # noqa: E402
+import plotly  # noqa: E402
+import plotly.graph_objects as go  # noqa: E402
+import PySide6  # noqa: E402
+from PySide6.QtCore import QCoreApplication, QEventLoop, Qt, QTimer  # noqa: E402
+from PySide6.QtWidgets import QApplication  # noqa: E402
+
+import pyside6_plotly  # noqa: E402
+from pyside6_plotly.plotly_widget import PlotlyQtWidget  # noqa: E402
+
+TIMEOUT = 60
+
+
+def wait_for(signal, timeout=TIMEOUT):
+    """Run the event loop until signal fires; return its arguments"""
+    loop = QEventLoop()
+    result = []
+
+    def done(*args):
+        result.append(args)
+        loop.quit()
+
+    signal.connect(done)
+    QTimer.singleShot(int(timeout * 1000), loop.quit)
+    loop.exec()
+    signal.disconnect(done)
+    if not result:
+        raise TimeoutError(f"no signal within {timeout} s")
+    return result[0]
+
+
+def run_js(widget, script, timeout=TIMEOUT):
+    """Evaluate script in the page and return its value"""
+    loop = QEventLoop()
+    result = []
+
+    def done(value):
+        result.append(value)
+        loop.quit()
+
+    widget.page().runJavaScript(script, 0, done)
+    QTimer.singleShot(int(timeout * 1000), loop.quit)
+    loop.exec()
+    return result[0] if result else None
+
+
+def wait_rendered(widget, timeout=TIMEOUT):
+    """Run the event loop until the page has applied every update sent"""
+    stats = widget.frame_stats()
+    while stats["in_flight"] or stats["pending"]:
+        wait_for(widget.callbacks.render_done, timeout)
+        stats = widget.frame_stats()
+
+
+def sleep(ms):
+    loop = QEventLoop()
+    QTimer.singleShot(ms, loop.quit)
+    loop.exec()
+
+
+def max_rss_bytes():
+    try:
+        import resource
+    except ImportError:
+        return None
+    # ru_maxrss is in kilobytes on Linux, bytes on macOS
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return maxrss if sys.platform == "darwin" else maxrss * 1024
+
+
+def make_figure(n_points, n_traces, seed=0):
+    rng = np.random.default_rng(seed)
+    x = np.arange(n_points, dtype=np.float64)
+    traces = [
+        go.Scattergl(x=x, y=rng.standard_normal(n_points).cumsum(), mode="lines")
+        for _ in range(n_traces)
+    ]
+    return go.Figure(traces)
+
+
+def summarize(samples):
+    samples = sorted(samples)
+    return {
+        "n": len(samples),
+        "min": samples[0],
+        "median": statistics.median(samples),
+        "max": samples[-1],
+    }
+
+
+TRANSPORT = "channel"
+
+
+def new_widget():
+    widget = PlotlyQtWidget(transport=TRANSPORT)
+    widget.resize(1000, 600)
+    widget.show()
+    return widget
+
+
+def bench_first_plot(n_points, repeat):
+    fig = make_figure(n_points, 1)
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        widget = new_widget()
+        widget.set_figure(fig)
+        wait_for(widget.callbacks.plot_ready)
+        samples.append(time.perf_counter() - start)
+        widget.deleteLater()
+        QCoreApplication.processEvents()
+    return {"points": n_points, "seconds": summarize(samples)}
+
+
+def bench_update(widget, n_points, n_traces, repeat):
+    figures = [make_figure(n_points, n_traces, seed) for seed in range(repeat + 1)]
+    widget.clear_figure()
+    widget.set_figure(figures[0])
+    wait_rendered(widget)
+
+    samples = []
+    widget.timing_stats.clear()
+    tracemalloc.start()
+    for fig in figures[1:]:
+        start = time.perf_counter()
+        widget.set_figure(fig)
+        wait_rendered(widget)
+        samples.append(time.perf_counter() - start)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "points": n_points,
+        "traces": n_traces,
+        "seconds": summarize(samples),
+        "stages_ms": widget.timing_summary(),
+        "python_peak_bytes": peak,
+        "js_heap_bytes": run_js(widget, "performance.memory ? performance.memory.usedJSHeapSize : null"),
+        "widget_memory": widget.memory_report(),
+    }
+
+
+def bench_event(widget, repeat):
+    widget.set_figure(make_figure(100, 1))
+    wait_rendered(widget)
+    received = []
+    # subscribing makes the page forward the event; give it time to get there
+    widget.callbacks.plotly_click.connect(lambda data: received.append(time.time()))
+    sleep(200)
+
+    samples = []
+    for _ in range(repeat):
+        sent = run_js(widget, """
+            (() => {
+                const div = document.getElementById("plot");
+                const t = performance.timeOrigin + performance.now();
+                div.emit("plotly_click", {points: []});
+                return t;
+            })()
+        """)
+        wait_for(widget.callbacks.plotly_click)
+        samples.append(received[-1] - sent / 1000)
+    return {"seconds": summarize(samples)}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--points", type=int, nargs="+", default=[1_000, 10_000, 100_000, 1_000_000])
+    parser.add_argument("--traces", type=int, nargs="+", default=[1, 10, 50])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--transport", choices=("channel", "http"), default="channel")
+    parser.add_argument("--output", help="JSON file for the results (default: stdout)")
+    args = parser.parse_args(argv)
+    global TRANSPORT
+    TRANSPORT = args.transport
+
+    QCoreApplication.setAttribute(Qt.ApplicationAttribute.AA_UseSoftwareOpenGL)
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+
+    results = {
+        "environment": {
+            "pyside6_plotly": pyside6_plotly.__version__,
+            "plotly": plotly.__version__,
+            "pyside6": PySide6.__version__,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "qpa": os.environ["QT_QPA_PLATFORM"],
+            "transport": args.transport,
+        },
+        "first_plot": [],
+        "update": [],
+    }
+
+    for n_points in args.points:
+        results["first_plot"].append(bench_first_plot(n_points, args.repeat))
+
+    widget = new_widget()
+    wait_for(widget.callbacks.page_ready)
+    for n_traces in args.traces:
+        for n_points in args.points:
+            results["update"].append(bench_update(widget, n_points, n_traces, args.repeat))
+            print(f"update: {n_traces} traces x {n_points} points", file=sys.stderr)
+    results["event"] = bench_event(widget, args.repeat * 4)
+
+    results["python_max_rss_bytes"] = max_rss_bytes()
+
+    widget.deleteLater()
+    app.processEvents()
+
+    text = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,3 +3,42 @@
 __author__ = """Brian B. Maranville"""
 __email__ = 'brian.maranville@nist.gov'
 __version__ = '0.1.0'
+
+# The public API is imported on first access, so that importing the package
+# doesn't load QtWebEngine, NumPy or plotly until they are needed.  That
+# includes the plotly-local: URL scheme, which has to be registered before
+# the QApplication is created: import pyside6_plotly.plotly_widget (or call
+# register_scheme()) first, see url_scheme.py.
+# name -> submodule defining it
+_LAZY_ATTRIBUTES = {
+    "PlotlyQtWidget": "plotly_widget",
+    "PlotlyCallbacks": "plotly_widget",
+    "PlotlyDashboardWidget": "dashboard",
+    "DashboardPlot": "dashboard",
+    "PlotlyWidgetPool": "widget_pool",
+    "BatchExporter": "export",
+    "export_html": "html_export",
+    "PlotlyHTTPServer": "http_server",
+    "RingBuffer": "streaming",
+    "SerializationCache": "cache",
+    "DecimatedTrace": "decimation",
+    "LazyArray": "array_sources",
+    "TimingStats": "timing",
+    "register_scheme": "url_scheme",
+}
+
+__all__ = sorted(_LAZY_ATTRIBUTES)
+
+
+def __getattr__(name):
+    module_name = _LAZY_ATTRIBUTES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    import importlib
+    value = getattr(importlib.import_module(f".{module_name}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_ATTRIBUTES))
@@ -0,0 +1,113 @@
+"""Reading trace data in slices from arrays that don't fit in memory.
+
+A lazy array source has a length, a dtype and slicing that returns NumPy
+arrays, without holding its data in memory:
+
+    np.load("signal.npy", mmap_mode="r")        # np.memmap
+    h5py.File("run.h5")["detector/counts"]      # h5py.Dataset
+    zarr.open("run.zarr")["counts"]             # zarr.Array
+    LazyArray(reader)                           # anything else
+
+Only these are treated as lazy: other sliceable objects (pandas Series,
+xarray DataArrays, ...) are plotted as ordinary arrays.  A reader of your
+own implements __len__, dtype and __getitem__(slice), and is wrapped in
+LazyArray.
+Decimated traces (DecimatedTrace, PlotlyQtWidget.decimate_trace) accept
+them for x and y: only the visible window is scanned, CHUNK_SIZE elements
+at a time, and only the points sent to the page are kept.
+
+Pass lazy sources in a plain figure dict, or to decimate_trace: plotly's
+go.Figure validates trace data into in-memory NumPy arrays, so
+
+    go.Figure(go.Scatter(y=np.load("signal.npy", mmap_mode="r")))
+
+reads the whole file into memory before the widget ever sees it, while
+
+    {"data": [{"type": "scatter", "y": np.load("signal.npy", mmap_mode="r")}]}
+
+keeps the memmap and is plotted decimated.
+"""
+import numpy as np
+
+# elements read from a lazy source at a time
+CHUNK_SIZE = 1 << 20
+
+# (top-level package, class name) of the lazy array types recognized without
+# importing their package
+LAZY_TYPES = {("h5py", "Dataset"), ("zarr", "Array")}
+
+
+class LazyArray:
+    """A lazy source reading from reader (__len__, dtype, __getitem__(slice))
+
+    Readers may also subclass LazyArray, implementing the three themselves.
+    """
+
+    def __init__(self, reader):
+        self.reader = reader
+        self.dtype = np.dtype(reader.dtype)
+
+    def __len__(self):
+        return len(self.reader)
+
+    def __getitem__(self, key):
+        return self.reader[key]
+
+
+def is_lazy(values):
+    """True for array sources that are read in slices rather than loaded"""
+    if isinstance(values, (np.memmap, LazyArray)):
+        return True
+    if values is None or isinstance(values, (np.ndarray, list, tuple, str, dict)):
+        return False
+    return any((cls.__module__.partition(".")[0], cls.__name__) in LAZY_TYPES for cls in type(values).__mro__)
+
+
+def as_source(values):
+    """values, as an ndarray unless it is a lazy source"""
+    return values if is_lazy(values) else np.asarray(values)
+
+
+def read(source, start, stop):
+    """source[start:stop] as an ndarray"""
+    return np.asarray(source[start:stop])
+
+
+def take(source, indices):
+    """source[indices] for sorted indices, reading a chunk at a time"""
+    indices = np.asarray(indices, dtype=np.intp)
+    if not is_lazy(source):
+        return source[indices]
+    out = np.empty(len(indices), dtype=source.dtype)
+    i = 0
+    while i < len(indices):
+        first = int(indices[i])
+        # every index within CHUNK_SIZE of the first comes from one read
+        j = int(np.searchsorted(indices, first + CHUNK_SIZE, side="left"))
+        block = read(source, first, int(indices[j - 1]) + 1)
+        out[i:j] = block[indices[i:j] - first]
+        i = j
+    return out
+
+
+def searchsorted(source, value, side="left"):
+    """np.searchsorted for a sorted source, reading single elements of lazy ones"""
+    if not is_lazy(source) or isinstance(source, np.memmap):
+        # a memmap only pages in what the binary search touches
+        return int(np.searchsorted(source, value, side=side))
+    low, high = 0, len(source)
+    while low < high:
+        middle = (low + high) // 2
+        item = source[middle]
+        if item < value or (side == "right" and item == value):
+            low = middle + 1
+        else:
+            high = middle
+    return low
+
+
+def nbytes(values):
+    """Bytes of values held in memory (0 for lazy sources)"""
+    if values is None or is_lazy(values):
+        return 0
+    return values.nbytes
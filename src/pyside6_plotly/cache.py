@@ -0,0 +1,151 @@
+"""LRU cache of serialized figures.
+
+Switching back to a figure that was shown before shouldn't pay for encoding
+it again.  A SerializationCache maps a key to the JSON payload of a whole
+figure, bounded by the total size of the payloads; the least recently used
+entries are evicted first.  Keys are either supplied by the caller
+(set_figure(fig, cache_key="overview")) or a hash of the figure's content
+(content_key).  One cache can be shared by several widgets:
+
+    cache = SerializationCache(max_bytes=200 * 2**20)
+    widget.serialization_cache = cache
+    ...
+    cache.stats()   # hits, misses, evictions, bytes
+"""
+import hashlib
+import threading
+import weakref
+from collections import OrderedDict
+
+import numpy as np
+
+
+# digests of read-only arrays, which are hashed once: {id: (weakref, digest)}
+_array_digests = {}
+_digests_lock = threading.Lock()
+
+
+def content_key(obj):
+    """Hash of a figure dict (or any JSON-like object with NumPy arrays)
+
+    Arrays are hashed from their raw bytes, so this is much cheaper than
+    serializing the figure.  Read-only arrays that own their data (such as
+    the copies in figure_diff.snapshot_figure) are hashed only the first
+    time they are seen.
+    """
+    h = hashlib.blake2b(digest_size=16)
+    _feed(h, obj)
+    return h.hexdigest()
+
+
+def _feed(h, obj):
+    if isinstance(obj, dict):
+        h.update(b"{%d" % len(obj))
+        for key in sorted(obj, key=str):
+            _feed(h, key)
+            _feed(h, obj[key])
+    elif isinstance(obj, (list, tuple)):
+        h.update(b"[%d" % len(obj))
+        for value in obj:
+            _feed(h, value)
+    elif isinstance(obj, np.ndarray):
+        h.update(f"a{obj.dtype.str}{obj.shape}".encode())
+        if obj.dtype.hasobject:
+            h.update(repr(obj.tolist()).encode())
+        elif obj.flags.owndata and not obj.flags.writeable:
+            h.update(_array_digest(obj))
+        else:
+            h.update(_digest(obj))
+    elif isinstance(obj, str):
+        data = obj.encode("utf-8", "surrogatepass")
+        h.update(b"s%d:" % len(data))
+        h.update(data)
+    else:
+        h.update(repr((type(obj).__name__, obj)).encode())
+
+
+def _digest(array):
+    return hashlib.blake2b(np.ascontiguousarray(array).data, digest_size=16).digest()
+
+
+def _array_digest(array):
+    key = id(array)
+    with _digests_lock:
+        entry = _array_digests.get(key)
+    if entry is not None and entry[0]() is array:
+        return entry[1]
+    digest = _digest(array)
+
+    def forget(ref):
+        with _digests_lock:
+            if _array_digests.get(key, (None,))[0] is ref:
+                del _array_digests[key]
+
+    with _digests_lock:
+        _array_digests[key] = (weakref.ref(array, forget), digest)
+    return digest
+
+
+class SerializationCache:
+    def __init__(self, max_bytes=256 * 2**20):
+        """max_bytes: bound on the total size of the cached payloads"""
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        # doesn't count as a lookup
+        return key in self._entries
+
+    def get(self, key):
+        """The cached payload for key, or None"""
+        with self._lock:
+            payload = self._entries.get(key)
+            if payload is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return payload
+
+    def put(self, key, payload):
+        """Cache payload (a str), evicting old entries to stay in bounds"""
+        size = len(payload)
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= len(old)
+            if size > self.max_bytes:
+                # would evict everything else and still not fit
+                return
+            self._entries[key] = payload
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        """Counters for tuning max_bytes"""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else None,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+        }
@@ -0,0 +1,300 @@
+"""Several Plotly figures in one web page.
+
+Every PlotlyQtWidget is a separate QWebEngineView, with its own renderer
+process, web channel and copy of plotly.js.  PlotlyDashboardWidget lays out
+any number of plots as divs of a single page instead, sharing one view, one
+channel and one plotly.js:
+
+    dashboard = PlotlyDashboardWidget(columns=2, row_height=300)
+    prices = dashboard.add_plot()
+    volume = dashboard.add_plot(colspan=2)
+    prices.set_figure(fig)
+    prices.callbacks.plotly_click.connect(on_click)
+
+Each plot is a DashboardPlot with the figure API of PlotlyQtWidget
+(set_figure, extend_traces, decimate_trace, set_event_policy, ...) and its
+own PlotlyCallbacks carrying its update messages and event signals.
+
+Adding or removing plots and changing the grid update the loaded page in
+place (through DashboardCallbacks), so the other plots keep their figures
+on screen; only a new plotly.js bundle reloads the page.
+"""
+import json
+
+from PySide6.QtCore import QObject, Signal, Slot
+from PySide6.QtWebChannel import QWebChannel
+from PySide6.QtWebEngineCore import QWebEngineSettings
+from PySide6.QtWebEngineWidgets import QWebEngineView
+
+from .encoding import TYPED_ARRAY_JS
+from .events import EVENTS_JS
+from .plotly_widget import PLOT_JS, PlotlyCallbacks, PlotlyFigureMixin
+from .plotly_js import full_bundle, partial_bundle
+from .url_scheme import bundle_url, install_scheme_handler
+
+
+class DashboardPlot(PlotlyFigureMixin, QObject):
+    """One plot of a PlotlyDashboardWidget"""
+
+    def __init__(
+        self, dashboard, name, colspan=1, rowspan=1,
+        binary_arrays=True, incremental_updates=True, threaded_serialization=True,
+        transport="channel", memory_lean=False,
+    ):
+        super().__init__(dashboard)
+        self.dashboard = dashboard
+        # name of the callbacks object on the channel and id of the plot's div
+        self.name = name
+        self.colspan = colspan
+        self.rowspan = rowspan
+        self.callbacks = PlotlyCallbacks(self)
+        self._init_figure_state(
+            binary_arrays, incremental_updates, threaded_serialization, transport, memory_lean,
+        )
+
+    def _plot_width(self):
+        columns = self.dashboard.columns
+        return self.dashboard.width() * min(self.colspan, columns) // columns
+
+    def _plotly_bundle(self):
+        return self.dashboard.plotly_bundle
+
+    def _use_bundle(self, bundle):
+        self.dashboard.set_plotly_bundle(bundle)
+
+
+class DashboardCallbacks(QObject):
+    """The dashboard's own channel object: changes to the grid of a loaded page"""
+
+    # from Python to JS
+    plot_added = Signal(str, int, int)  # name, colspan, rowspan
+    plot_removed = Signal(str)  # name
+    grid_changed = Signal(str)  # grid style (JSON), see PlotlyDashboardWidget.grid_style
+
+    # the page has connected the channel, sent from JS to Python
+    page_ready = Signal()
+
+    def __init__(self, dashboard):
+        super().__init__(dashboard)
+        self.dashboard = dashboard
+
+    @Slot(str, result=QObject)
+    def plot_callbacks(self, name):
+        """The PlotlyCallbacks of a plot added since the page was loaded"""
+        for plot in self.dashboard.plots:
+            if plot.name == name:
+                return plot.callbacks
+        return None
+
+    @Slot()
+    def on_page_ready(self):
+        self.page_ready.emit()
+
+
+class PlotlyDashboardWidget(QWebEngineView):
+    def __init__(self, parent=None, columns=2, row_height=400, gap=8, plotly_bundle=None):
+        """
+        columns: number of grid columns
+        row_height: height of a grid row in pixels, or None to share the
+            height of the widget between the rows
+        gap: space between plots in pixels
+        plotly_bundle: plotly.js build shared by the plots, as for
+            PlotlyQtWidget; figures needing more are handled according to
+            each plot's bundle_fallback
+        """
+        super().__init__(parent)
+        self.columns = columns
+        self.row_height = row_height
+        self.gap = gap
+        self.plots = []
+        # plots are numbered in the order they are added: names aren't reused
+        self._plot_count = 0
+        if isinstance(plotly_bundle, str):
+            plotly_bundle = partial_bundle(plotly_bundle)
+        self.plotly_bundle = plotly_bundle or full_bundle()
+
+        self.channel = QWebChannel()
+        self.callbacks = DashboardCallbacks(self)
+        self.channel.registerObject("dashboard", self.callbacks)
+        self.page().setWebChannel(self.channel)
+        # names of the plots the page has divs for, None while it loads
+        self._page_plots = None
+        self._loading_plots = []
+        self.callbacks.page_ready.connect(self._on_page_ready)
+        # plots with transport="http" fetch their large updates from the
+        # local server
+        self.settings().setAttribute(QWebEngineSettings.WebAttribute.LocalContentCanAccessRemoteUrls, True)
+        self.loadStarted.connect(self._on_load_started)
+
+        self._load_page()
+
+    def add_plot(self, colspan=1, rowspan=1, **kwargs):
+        """Add a plot to the grid and return it (a DashboardPlot)
+
+        kwargs are passed on to DashboardPlot (binary_arrays,
+        incremental_updates, threaded_serialization, transport, memory_lean).  The
+        plot's div is added to the page in place: the other plots are left
+        as they are.
+        """
+        plot = DashboardPlot(self, f"plot_{self._plot_count}", colspan, rowspan, **kwargs)
+        self._plot_count += 1
+        self.plots.append(plot)
+        self.channel.registerObject(plot.name, plot.callbacks)
+        self._sync_page()
+        return plot
+
+    def remove_plot(self, plot):
+        """Remove a plot (a DashboardPlot, or its index) from the grid"""
+        if isinstance(plot, int):
+            plot = self.plots[plot]
+        self.plots.remove(plot)
+        self.channel.deregisterObject(plot.callbacks)
+        self._sync_page()
+        plot.deleteLater()
+
+    def plot(self, index):
+        return self.plots[index]
+
+    def set_grid(self, columns=None, row_height=None, gap=None):
+        """Change the grid layout; plots keep their figures"""
+        if columns is not None:
+            self.columns = columns
+        if row_height is not None:
+            self.row_height = row_height
+        if gap is not None:
+            self.gap = gap
+        self._sync_page()
+
+    def set_plotly_bundle(self, bundle):
+        """Reload the page with another plotly.js build"""
+        self.plotly_bundle = bundle
+        for plot in self.plots:
+            plot._on_load_started()
+        self._load_page()
+
+    def grid_style(self):
+        """CSS properties of the grid for the current plots and layout"""
+        if self.row_height is None:
+            rows = -(-sum(p.colspan * p.rowspan for p in self.plots) // self.columns) or 1
+            auto_rows = f"calc((100vh - {(rows + 1) * self.gap}px) / {rows})"
+        else:
+            auto_rows = f"{self.row_height}px"
+        return {
+            "gridTemplateColumns": f"repeat({self.columns}, minmax(0, 1fr))",
+            "gridAutoRows": auto_rows,
+            "gap": f"{self.gap}px",
+            "padding": f"{self.gap}px",
+        }
+
+    def page_html(self):
+        """The dashboard page for the current plots and grid"""
+        style = self.grid_style()
+        divs = "\n".join(
+            f'    <div id="{p.name}" class="plot" '
+            f'style="grid-column: span {p.colspan}; grid-row: span {p.rowspan};"></div>'
+            for p in self.plots
+        )
+        names = [p.name for p in self.plots]
+        return f'''
+<!DOCTYPE html>
+<html>
+<head>
+    <meta charset="utf-8" />
+    <script src="qrc:///qtwebchannel/qwebchannel.js"></script>
+    <script src="{bundle_url(self.plotly_bundle)}"></script>
+    <style>
+        body, html {{ margin: 0; padding: 0; }}
+        #grid {{
+            display: grid;
+            grid-template-columns: {style["gridTemplateColumns"]};
+            grid-auto-rows: {style["gridAutoRows"]};
+            gap: {style["gap"]};
+            padding: {style["padding"]};
+        }}
+        .plot {{ min-width: 0; min-height: 0; }}
+    </style>
+</head>
+<body>
+<div id="grid">
+{divs}
+</div>
+    <script>
+        {TYPED_ARRAY_JS}
+        {EVENTS_JS}
+        {PLOT_JS}
+
+        // the grid is changed in place by the dashboard object
+        function connectDashboard(dashboard) {{
+            const grid = document.getElementById("grid");
+            dashboard.plot_added.connect(function(name, colspan, rowspan) {{
+                const div = document.createElement("div");
+                div.id = name;
+                div.className = "plot";
+                div.style.gridColumn = `span ${{colspan}}`;
+                div.style.gridRow = `span ${{rowspan}}`;
+                grid.appendChild(div);
+                dashboard.plot_callbacks(name, (callbacks) => {{
+                    if (callbacks) connectPlot(div, callbacks);
+                }});
+            }});
+            dashboard.plot_removed.connect(function(name) {{
+                const div = document.getElementById(name);
+                if (!div) return;
+                Plotly.purge(div);
+                div.remove();
+            }});
+            dashboard.grid_changed.connect(function(styleJson) {{
+                Object.assign(grid.style, JSON.parse(styleJson));
+                // plots with responsive: true follow the window, not the grid
+                for (const div of grid.children) {{
+                    if (div._fullLayout) Plotly.Plots.resize(div);
+                }}
+            }});
+            dashboard.on_page_ready();
+        }}
+
+        document.addEventListener("DOMContentLoaded", function() {{
+            new QWebChannel(qt.webChannelTransport, function(channel) {{
+                for (const name of {names!r}) {{
+                    // plots removed while the page loaded are gone from the channel
+                    const callbacks = channel.objects[name];
+                    if (callbacks) connectPlot(document.getElementById(name), callbacks);
+                }}
+                connectDashboard(channel.objects.dashboard);
+            }});
+        }});
+    </script>
+</body>
+</html>
+'''
+
+    def _load_page(self):
+        install_scheme_handler(self.page().profile(), self.plotly_bundle)
+        self.html_content = self.page_html()
+        self._page_plots = None
+        self._loading_plots = [plot.name for plot in self.plots]
+        self.setHtml(self.html_content)
+
+    def _sync_page(self):
+        # bring the loaded page's divs and grid in line with self.plots; a
+        # page still loading is brought in line once it is ready
+        if self._page_plots is None:
+            return
+        names = [plot.name for plot in self.plots]
+        for name in self._page_plots:
+            if name not in names:
+                self.callbacks.plot_removed.emit(name)
+        for plot in self.plots:
+            if plot.name not in self._page_plots:
+                self.callbacks.plot_added.emit(plot.name, plot.colspan, plot.rowspan)
+        self._page_plots = names
+        self.callbacks.grid_changed.emit(json.dumps(self.grid_style()))
+
+    def _on_page_ready(self):
+        self._page_plots = self._loading_plots
+        self._sync_page()
+
+    def _on_load_started(self):
+        self._page_plots = None
+        for plot in self.plots:
+            plot._on_load_started()
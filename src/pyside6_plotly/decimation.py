@@ -0,0 +1,228 @@
+"""Zoom-aware downsampling of large traces.
+
+The full-resolution arrays stay in Python; the page only gets about as many
+points as there are pixels across the plot.  When the user zooms or pans,
+the visible window is downsampled again so detail appears as it comes into
+view.  Both methods return indices into the original arrays, so the points
+sent can always be traced back to the source rows.
+
+    minmax  the first, min, max and last point of each bin: keeps every
+            spike, cheap enough for tens of millions of points
+    lttb    Largest-Triangle-Three-Buckets: visually faithful line shape
+            with a single point per bucket
+
+x and y may be lazy array sources (np.memmap, h5py datasets, ..., see
+array_sources.py): they are read a chunk at a time, and only the visible
+window is read at all.
+"""
+import re
+
+import numpy as np
+
+from .array_sources import CHUNK_SIZE, as_source, is_lazy, nbytes, read, searchsorted, take
+
+METHODS = ("minmax", "lttb")
+
+
+def _bin_size(n, n_out):
+    n_bins = max(n_out // 2, 1)
+    return -(-n // n_bins)
+
+
+def _bin_extremes(y, bin_size):
+    # indices of the min and max of each bin_size bin of y
+    n = len(y)
+    n_bins = -(-n // bin_size)
+    padded = n_bins * bin_size
+    values = np.asarray(y, dtype=np.float64)
+    nan = np.isnan(values)
+    low = np.full(padded, np.inf)
+    low[:n] = np.where(nan, np.inf, values)
+    high = np.full(padded, -np.inf)
+    high[:n] = np.where(nan, -np.inf, values)
+    offsets = np.arange(n_bins) * bin_size
+    argmin = low.reshape(n_bins, bin_size).argmin(axis=1) + offsets
+    argmax = high.reshape(n_bins, bin_size).argmax(axis=1) + offsets
+    return np.minimum(np.concatenate((argmin, argmax)), n - 1)
+
+
+def minmax_indices(y, n_out):
+    """Indices of the first/min/max/last points of about n_out / 2 bins"""
+    n = len(y)
+    if n <= n_out:
+        return np.arange(n)
+    indices = np.concatenate(([0, n - 1], _bin_extremes(y, _bin_size(n, n_out))))
+    return np.unique(indices)
+
+
+def minmax_indices_chunked(y, start, stop, n_out, chunk_size=CHUNK_SIZE):
+    """minmax_indices of y[start:stop], offset by start, reading chunk by chunk
+
+    The chunks are whole numbers of bins, so the result is the same as
+    minmax_indices on the window.
+    """
+    n = stop - start
+    if n <= n_out:
+        return np.arange(start, stop)
+    bin_size = _bin_size(n, n_out)
+    step = bin_size * max(chunk_size // bin_size, 1)
+    parts = [np.array([start, stop - 1])]
+    for first in range(start, stop, step):
+        parts.append(_bin_extremes(read(y, first, min(first + step, stop)), bin_size) + first)
+    return np.unique(np.concatenate(parts))
+
+
+def lttb_indices(x, y, n_out):
+    """Indices chosen by Largest-Triangle-Three-Buckets"""
+    n = len(y)
+    if n <= n_out or n_out < 3:
+        return np.arange(n)
+    x = as_float(x)
+    y = np.asarray(y, dtype=np.float64)
+    # n_out - 2 buckets between the fixed first and last points
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.intp)
+    out = np.empty(n_out, dtype=np.intp)
+    out[0] = 0
+    out[-1] = n - 1
+    a = 0
+    for i in range(n_out - 2):
+        start, stop = edges[i], edges[i + 1]
+        next_stop = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[stop:next_stop].mean()
+        avg_y = y[stop:next_stop].mean()
+        area = np.abs(
+            (x[a] - avg_x) * (y[start:stop] - y[a])
+            - (x[a] - x[start:stop]) * (avg_y - y[a])
+        )
+        a = start + int(np.nanargmax(area)) if not np.isnan(area).all() else start
+        out[i + 1] = a
+    return out
+
+
+def as_float(x):
+    """x as float64, with datetimes as their integer time stamps"""
+    x = np.asarray(x)
+    if x.dtype.kind in "mM":
+        return x.view(np.int64).astype(np.float64)
+    return x.astype(np.float64, copy=False)
+
+
+def to_axis_value(value, x):
+    """Convert a Plotly axis range value to the type of the x data"""
+    if x.dtype.kind == "M":
+        # plotly sends dates as "2024-01-01 12:00:00.5"
+        return np.datetime64(str(value).replace(" ", "T")).astype(x.dtype)
+    return float(value)
+
+
+_RANGE_KEY = re.compile(r"^(xaxis\d*)\.(range(?:\[([01])\])?|autorange)$")
+
+
+def parse_axis_ranges(event):
+    """Extract x axis range changes from a plotly_relayout event
+
+    Returns {axis name ("xaxis", "xaxis2", ...): (start, stop) or None},
+    where None means the axis went back to autorange.
+    """
+    ranges = {}
+    partial = {}
+    for key, value in event.items():
+        match = _RANGE_KEY.match(key)
+        if not match:
+            continue
+        axis, attr, bound = match.groups()
+        if attr == "autorange":
+            if value:
+                ranges[axis] = None
+        elif bound is None:
+            ranges[axis] = (value[0], value[1])
+        else:
+            partial.setdefault(axis, [None, None])[int(bound)] = value
+    for axis, (start, stop) in partial.items():
+        if start is not None and stop is not None:
+            ranges[axis] = (start, stop)
+    return ranges
+
+
+class DecimatedTrace:
+    """Full-resolution data of one trace and how to downsample it"""
+
+    def __init__(self, y, x=None, method="minmax", xaxis="x", max_points=None):
+        if method not in METHODS:
+            raise ValueError(f"unknown decimation method {method!r}, use one of {METHODS}")
+        self.y = as_source(y)
+        # None: the x of each point is its index
+        self.x = None if x is None else as_source(x)
+        if self.x is not None and len(self.x) != len(self.y):
+            raise ValueError("x and y must have the same length")
+        self.method = method
+        # number of points to send; None to size by the plot width
+        self.max_points = max_points
+        # layout key of the x axis the trace is drawn on: "x2" -> "xaxis2"
+        self.axis = "xaxis" + xaxis[1:]
+        # indices of the points last sent to the page, as int32 when they
+        # fit: kept to translate the point numbers of events (see events.py)
+        self.indices = None
+        # (x, y) the trace had in the caller's figure, which the decimated
+        # points stand in for; set by the widget
+        self.replaces = None
+
+    def __len__(self):
+        return len(self.y)
+
+    @property
+    def lazy(self):
+        """True if x or y is read from a lazy source"""
+        return is_lazy(self.y) or is_lazy(self.x)
+
+    @property
+    def nbytes(self):
+        """Bytes of the full-resolution data held in memory"""
+        return nbytes(self.x) + nbytes(self.y)
+
+    def x_values(self, indices):
+        """x of the points at (sorted) indices"""
+        if self.x is None:
+            return np.array(indices)
+        return take(self.x, indices)
+
+    def points(self, indices):
+        """(x, y) arrays of the points at (sorted) indices"""
+        return self.x_values(indices), take(self.y, indices)
+
+    def window(self, x_range):
+        """start, stop indices of the points in x_range (None: everything)"""
+        n = len(self.y)
+        if x_range is None:
+            return 0, n
+        # x is assumed sorted; keep one point beyond each edge so lines
+        # run off the plot instead of stopping short of it
+        if self.x is None:
+            low, high = sorted(float(v) for v in x_range)
+            left = min(max(int(np.ceil(low)), 0), n)
+            right = min(max(int(np.floor(high)) + 1, 0), n)
+        else:
+            low, high = sorted(to_axis_value(v, self.x) for v in x_range)
+            left = searchsorted(self.x, low, side="left")
+            right = searchsorted(self.x, high, side="right")
+        return max(left - 1, 0), min(right + 1, n)
+
+    def select(self, x_range, n_out):
+        """Indices of the points to plot for x_range (None: everything)"""
+        start, stop = self.window(x_range)
+        if self.method != "lttb":
+            indices = minmax_indices_chunked(self.y, start, stop, n_out)
+        elif stop - start <= CHUNK_SIZE or not self.lazy:
+            if self.x is None:
+                x = np.arange(start, stop)
+            else:
+                x = read(self.x, start, stop)
+            indices = lttb_indices(x, read(self.y, start, stop), n_out) + start
+        else:
+            # too much to read at once: LTTB over the minmax candidates
+            candidates = minmax_indices_chunked(self.y, start, stop, 4 * n_out)
+            x, y = self.points(candidates)
+            indices = candidates[lttb_indices(x, y, n_out)]
+        compact = np.int32 if len(self.y) <= np.iinfo(np.int32).max else np.int64
+        self.indices = indices.astype(compact)
+        return indices
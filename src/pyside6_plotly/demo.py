@@ -2,7 +2,7 @@ import json
 import sys
 
 from PySide6.QtWidgets import QApplication, QMainWindow, QVBoxLayout, QWidget, QLabel
-from plotly_widget import PlotlyQtWidget
+from pyside6_plotly.plotly_widget import PlotlyQtWidget
 import plotly.graph_objects as go
 
 class DemoWidget(QWidget):
@@ -24,7 +24,7 @@ class DemoWidget(QWidget):
         # Connect signals to slots
         self.plotly_widget.callbacks.plotly_click.connect(self.handle_plotly_click)
         self.plotly_widget.callbacks.plotly_hover.connect(self.handle_plotly_hover)
-        self.plotly_widget.callbacks.plotly_selected.connect(self.handle_plotly_selected)
+        self.plotly_widget.callbacks.selection_changed.connect(self.handle_selection_changed)
         self.plotly_widget.callbacks.plot_ready.connect(self.handle_plot_ready)
         self.plotly_widget.callbacks.all_plotly_events.connect(self.handle_all_events)
 
@@ -46,10 +46,11 @@ class DemoWidget(QWidget):
         self.status_label.setText(f"Hover: {point_info}")
         print(f"Hover event: {point_info}")
 
-    def handle_plotly_selected(self, data):
-        event_data = json.loads(data)
-        self.status_label.setText(f"Selection: {len(event_data.get('points', []))} points")
-        print(f"Selection event: {data}")
+    def handle_selection_changed(self, selection):
+        # {curve number: ndarray of point indices}
+        n_points = sum(len(indices) for indices in selection.values())
+        self.status_label.setText(f"Selection: {n_points} points")
+        print(f"Selection: {selection}")
 
     @staticmethod
     def _extract_point_info(event_data):
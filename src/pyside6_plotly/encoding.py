@@ -0,0 +1,262 @@
+"""Serialization of plotly figures for transfer to the page.
+
+Numeric NumPy arrays are packed into the plotly.js typed-array spec
+({"dtype": "f8", "bdata": <base64>, "shape": "rows, cols"}) instead of being
+expanded into lists of decimal text.  The page rebuilds them as JS typed arrays
+with the decoder in TYPED_ARRAY_JS before handing the figure to Plotly.
+"""
+import base64
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+# numpy dtype -> plotly.js typed array dtype code
+DTYPE_CODES = {
+    "int8": "i1",
+    "uint8": "u1",
+    "int16": "i2",
+    "uint16": "u2",
+    "int32": "i4",
+    "uint32": "u4",
+    "float32": "f4",
+    "float64": "f8",
+}
+CODE_DTYPES = {code: np.dtype(name).newbyteorder("<") for name, code in DTYPE_CODES.items()}
+CODE_DTYPES["u1c"] = np.dtype(np.uint8)
+
+# same keys that plotly.py leaves alone when it base64-encodes a figure
+SKIPPED_KEYS = {"geojson", "layer", "layers", "range"}
+
+
+def figure_to_dict(fig):
+    """Return the {"data": [...], "layout": {...}} dict for a figure
+
+    Plain dicts are returned as-is.  For plotly Figure objects the validated
+    properties are read directly, which avoids the deepcopy done by
+    fig.to_plotly_json() and keeps the figure's own NumPy arrays.
+    """
+    if isinstance(fig, dict):
+        return fig
+    fig_dict = {"data": fig._data, "layout": fig._layout}
+    if fig._frame_objs:
+        fig_dict["frames"] = [frame.to_plotly_json() for frame in fig._frame_objs]
+    return fig_dict
+
+
+def to_typed_array_spec(value):
+    """Pack a numeric ndarray into a typed array spec, or return None"""
+    if value.size == 0:
+        return None
+    dtype = value.dtype
+    if dtype.kind == "b":
+        value = value.astype(np.uint8)
+    elif dtype.kind in "iu" and dtype.itemsize == 8:
+        # there is no BigInt64Array support in plotly.js: narrow when lossless
+        vmin, vmax = value.min(), value.max()
+        if vmin >= np.iinfo(np.int32).min and vmax <= np.iinfo(np.int32).max:
+            value = value.astype(np.int32)
+        elif vmin >= 0 and vmax <= np.iinfo(np.uint32).max:
+            value = value.astype(np.uint32)
+        else:
+            value = value.astype(np.float64)
+    elif dtype.kind == "f" and dtype.itemsize == 2:
+        value = value.astype(np.float32)
+    code = DTYPE_CODES.get(value.dtype.name)
+    if code is None:
+        return None
+    # typed arrays are little-endian on every platform QtWebEngine supports
+    value = np.ascontiguousarray(value, dtype=value.dtype.newbyteorder("<"))
+    spec = {"dtype": code, "bdata": base64.b64encode(value.data).decode("ascii")}
+    if value.ndim > 1:
+        spec["shape"] = ", ".join(str(n) for n in value.shape)
+    return spec
+
+
+def from_typed_array_spec(spec):
+    """Unpack a typed array spec (e.g. sent back from the page) into an ndarray"""
+    data = np.frombuffer(base64.b64decode(spec["bdata"]), dtype=CODE_DTYPES[spec["dtype"]])
+    shape = spec.get("shape")
+    if shape:
+        data = data.reshape([int(n) for n in str(shape).split(",")])
+    return data
+
+
+def is_typed_array_spec(value):
+    return isinstance(value, dict) and isinstance(value.get("bdata"), str) and value.get("dtype") in CODE_DTYPES
+
+
+def encode_arrays(obj):
+    """Return a copy of obj with numeric arrays replaced by typed array specs
+
+    Containers are copied (shallowly) as they are walked, so the input figure
+    is never modified.  Arrays that can't be packed (strings, dates, objects)
+    are left for the JSON encoder to expand.
+    """
+    if isinstance(obj, dict):
+        return {
+            key: (value if key in SKIPPED_KEYS else encode_arrays(value))
+            for key, value in obj.items()
+        }
+    if isinstance(obj, (list, tuple)):
+        return [encode_arrays(value) for value in obj]
+    if isinstance(obj, np.ndarray) and obj.dtype.kind in "biuf":
+        spec = to_typed_array_spec(obj)
+        if spec is not None:
+            return spec
+    return obj
+
+
+def serialize_figure(fig, binary=True):
+    """Serialize a figure (or figure dict) to the JSON string sent to the page
+
+    With binary=False this is the plain JSON path: every array is written out
+    as a list of numbers.
+    """
+    return serialize(figure_to_dict(fig), binary=binary)
+
+
+def serialize(obj, binary=True):
+    """Serialize any JSON-able structure containing arrays (e.g. update calls)"""
+    if binary:
+        obj = encode_arrays(obj)
+    return to_json(obj)
+
+
+def serialize_async(obj, binary=True):
+    """Run serialize() in a worker thread; returns a concurrent.futures.Future"""
+    return serialization_executor().submit(serialize, obj, binary)
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def serialization_executor():
+    """The worker threads shared by all widgets for serialize_async"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=min(4, os.cpu_count() or 1),
+                thread_name_prefix="pyside6_plotly-serialize",
+            )
+    return _executor
+
+
+def to_json(obj):
+    """JSON-encode obj, falling back to PlotlyJSONEncoder only when needed
+
+    PlotlyJSONEncoder re-parses its own output to replace NaN/Inf with null,
+    which doubles the cost for large payloads; the plain encoder is tried first.
+    """
+    try:
+        return json.dumps(obj, allow_nan=False, default=_plotly_default)
+    except ValueError:
+        from plotly.utils import PlotlyJSONEncoder
+        return json.dumps(obj, cls=PlotlyJSONEncoder)
+
+
+_plotly_encoder = None
+
+
+def _plotly_default(obj):
+    # plotly is only imported once something plain json can't handle shows up
+    global _plotly_encoder
+    if _plotly_encoder is None:
+        from plotly.utils import PlotlyJSONEncoder
+        _plotly_encoder = PlotlyJSONEncoder()
+    return _plotly_encoder.default(obj)
+
+
+# Page-side decoder: replaces every {dtype, bdata[, shape]} object with the
+# corresponding typed array (2D specs become an array of typed array rows,
+# which is what plotly.js expects for e.g. heatmap z).  packColumn() is the
+# encoder for data sent back to Python.
+TYPED_ARRAY_JS = '''
+const TYPED_ARRAYS = {
+    "i1": Int8Array, "u1": Uint8Array, "u1c": Uint8ClampedArray,
+    "i2": Int16Array, "u2": Uint16Array,
+    "i4": Int32Array, "u4": Uint32Array,
+    "f4": Float32Array, "f8": Float64Array,
+};
+
+function b64ToBuffer(b64) {
+    const bin = atob(b64);
+    const bytes = new Uint8Array(bin.length);
+    for (let i = 0; i < bin.length; i++) bytes[i] = bin.charCodeAt(i);
+    return bytes.buffer;
+}
+
+function toTypedArray(spec) {
+    const flat = new TYPED_ARRAYS[spec.dtype](b64ToBuffer(spec.bdata));
+    if (!spec.shape) return flat;
+    const shape = String(spec.shape).split(",").map(Number);
+    if (shape.length !== 2) return flat;
+    const [rows, cols] = shape;
+    const out = new Array(rows);
+    for (let r = 0; r < rows; r++) out[r] = flat.subarray(r * cols, (r + 1) * cols);
+    return out;
+}
+
+function decodeTypedArrays(obj) {
+    if (obj === null || typeof obj !== "object" || ArrayBuffer.isView(obj)) return obj;
+    if (Array.isArray(obj)) {
+        for (let i = 0; i < obj.length; i++) obj[i] = decodeTypedArrays(obj[i]);
+        return obj;
+    }
+    if (typeof obj.bdata === "string" && obj.dtype in TYPED_ARRAYS) return toTypedArray(obj);
+    for (const key of Object.keys(obj)) obj[key] = decodeTypedArrays(obj[key]);
+    return obj;
+}
+
+// Append insert to target keeping the last maxPoints (undefined: all), as
+// Plotly.extendTraces does, for any mix of plain and typed arrays: the
+// result is a typed array only when both are of the same type
+function appendWindow(target, insert, maxPoints) {
+    target = target ?? [];
+    const length = target.length + insert.length;
+    const keep = maxPoints === undefined ? length : Math.min(maxPoints, length);
+    const skip = length - keep;
+    if (ArrayBuffer.isView(target) && target.constructor === insert.constructor) {
+        const out = new target.constructor(keep);
+        const head = target.subarray(Math.min(skip, target.length));
+        out.set(head);
+        out.set(insert.subarray(insert.length - (keep - head.length)), head.length);
+        return out;
+    }
+    const out = new Array(keep);
+    for (let i = 0; i < keep; i++) {
+        const j = skip + i;
+        out[i] = j < target.length ? target[j] : insert[j - target.length];
+    }
+    return out;
+}
+
+function bufferToB64(view) {
+    const bytes = new Uint8Array(view.buffer, view.byteOffset, view.byteLength);
+    let bin = "";
+    for (let i = 0; i < bytes.length; i += 0x8000) {
+        bin += String.fromCharCode.apply(null, bytes.subarray(i, i + 0x8000));
+    }
+    return btoa(bin);
+}
+
+function toTypedArraySpec(typed) {
+    const dtype = Object.keys(TYPED_ARRAYS).find((code) => typed instanceof TYPED_ARRAYS[code]);
+    return {dtype: dtype, bdata: bufferToB64(typed)};
+}
+
+// Pack a list of numbers as an Int32Array or Float64Array spec; lists with
+// anything else in them (strings, dates, nested arrays) are returned as-is.
+function packColumn(values) {
+    let integer = true;
+    for (const v of values) {
+        if (typeof v !== "number") return values;
+        if (integer && !(Number.isInteger(v) && v >= -2147483648 && v <= 2147483647)) integer = false;
+    }
+    return toTypedArraySpec(integer ? Int32Array.from(values) : Float64Array.from(values));
+}
+'''
@@ -0,0 +1,437 @@
+"""Forwarding of Plotly events from the page to Python.
+
+Each event type has a delivery policy that decides how often it crosses the
+web channel:
+
+    "immediate"         every event is delivered
+    throttle(ms)        at most one event per ms, the latest one is kept
+    debounce(ms)        the latest event, once none arrived for ms
+    LATEST_PER_FRAME    the latest event, at most once per animation frame
+
+Coalescing policies never lose the final state: the most recent event of a
+burst is always delivered.  Relayout and restyle events only carry what
+changed, so those of a burst are merged key by key instead.  Hover and
+unhover events are coalesced together, keeping their order, and an event
+delivered immediately first flushes the coalesced events that came before
+it.  Events in DISCRETE_EVENTS (clicks, selections) are always delivered
+immediately.  Event types not listed in
+DEFAULT_EVENT_POLICIES are immediate unless configured otherwise.
+"""
+import json
+
+import numpy as np
+
+from .encoding import from_typed_array_spec, is_typed_array_spec, to_typed_array_spec
+
+# source: https://plotly.com/javascript/plotlyjs-events/
+PLOTLY_EVENTS = (
+    "plotly_click",
+    "plotly_legendclick",
+    "plotly_selecting",
+    "plotly_selected",
+    "plotly_hover",
+    "plotly_unhover",
+    "plotly_legenddoubleclick",
+    "plotly_restyle",
+    "plotly_relayout",
+    "plotly_webglcontextlost",
+    "plotly_afterplot",
+    "plotly_autosize",
+    "plotly_deselect",
+    "plotly_doubleclick",
+    "plotly_redraw",
+    "plotly_animated",
+)
+
+# events whose payload carries points
+POINT_EVENTS = frozenset({
+    "plotly_click",
+    "plotly_hover",
+    "plotly_unhover",
+    "plotly_selecting",
+    "plotly_selected",
+})
+
+# point fields that index into the trace's arrays
+POINT_INDEX_FIELDS = ("pointNumber", "pointIndex")
+
+# events behind PlotlyCallbacks.selection_changed
+SELECTION_EVENTS = ("plotly_selected", "plotly_deselect")
+
+# events that stand for a user action and must never be merged
+DISCRETE_EVENTS = frozenset({
+    "plotly_click",
+    "plotly_legendclick",
+    "plotly_legenddoubleclick",
+    "plotly_selected",
+    "plotly_deselect",
+    "plotly_doubleclick",
+    "plotly_webglcontextlost",
+})
+
+IMMEDIATE = "immediate"
+LATEST_PER_FRAME = "raf"
+
+
+def throttle(ms):
+    return {"mode": "throttle", "ms": ms}
+
+
+def debounce(ms):
+    return {"mode": "debounce", "ms": ms}
+
+
+DEFAULT_EVENT_POLICIES = {
+    "plotly_hover": LATEST_PER_FRAME,
+    "plotly_unhover": LATEST_PER_FRAME,
+    "plotly_selecting": LATEST_PER_FRAME,
+    "plotly_relayout": throttle(50),
+    "plotly_afterplot": LATEST_PER_FRAME,
+    "plotly_redraw": LATEST_PER_FRAME,
+}
+
+
+def normalize_policy(event_type, policy):
+    """Validate a policy and return it in the {"mode": ..., "ms": ...} form"""
+    if event_type not in PLOTLY_EVENTS:
+        raise ValueError(f"unknown Plotly event {event_type!r}")
+    if policy is None:
+        policy = IMMEDIATE
+    if isinstance(policy, str):
+        policy = {"mode": policy}
+    mode = policy.get("mode")
+    if mode not in ("immediate", "throttle", "debounce", "raf"):
+        raise ValueError(f"unknown event policy {mode!r}")
+    if mode in ("throttle", "debounce") and not policy.get("ms", 0) > 0:
+        raise ValueError(f"{mode} policy needs a positive 'ms'")
+    if mode != "immediate" and event_type in DISCRETE_EVENTS:
+        raise ValueError(f"{event_type} is a discrete event and is always delivered immediately")
+    return dict(policy)
+
+
+def normalize_fields(event_type, fields, binary=True):
+    """Validate a point-field selection; None means full point dicts"""
+    if event_type not in PLOTLY_EVENTS:
+        raise ValueError(f"unknown Plotly event {event_type!r}")
+    if fields is None:
+        return None
+    if isinstance(fields, str):
+        fields = [fields]
+    fields = list(fields)
+    if any(field in POINT_INDEX_FIELDS for field in fields) and "curveNumber" not in fields:
+        # needed to translate the indices of decimated traces, see remap_event
+        fields.append("curveNumber")
+    return {"fields": fields, "binary": bool(binary)}
+
+
+def decode_event_data(data):
+    """Parse an event payload, turning columnar point data into NumPy arrays
+
+    For events with selected fields the page sends
+    {"columns": {field: values}, "n_points": n, ...}: every column comes back
+    as an ndarray (numeric columns are decoded from their binary form).
+    Other payloads are returned as parsed JSON.
+    """
+    event = json.loads(data) if isinstance(data, str) else data
+    columns = event.get("columns") if isinstance(event, dict) else None
+    if columns is not None:
+        event["columns"] = {
+            field: (from_typed_array_spec(values) if is_typed_array_spec(values) else np.asarray(values))
+            for field, values in columns.items()
+        }
+    return event
+
+
+def decode_selection(data):
+    """{curve number: ndarray of point indices} from a selection payload
+
+    The page sends {"curves": {curve: Int32Array spec}, "n_points": n}.
+    """
+    event = json.loads(data) if isinstance(data, str) else data
+    return {int(curve): from_typed_array_spec(spec) for curve, spec in event["curves"].items()}
+
+
+def map_point_indices(mapping, indices):
+    """Source indices of points of a reduced trace
+
+    mapping is the array of source indices of the points plotted (decimated
+    traces) or the number of points dropped from the start (streamed
+    windows).  Indices outside of the mapping, e.g. from an event that
+    raced a view update, become -1.
+    """
+    indices = np.asarray(indices)
+    if not isinstance(mapping, np.ndarray):
+        return indices + mapping
+    if not len(mapping):
+        return np.full(indices.shape, -1)
+    valid = (indices >= 0) & (indices < len(mapping))
+    return np.where(valid, mapping[np.where(valid, indices, 0)], -1)
+
+
+def _column(values):
+    if is_typed_array_spec(values):
+        return from_typed_array_spec(values)
+    return np.asarray(values)
+
+
+def remap_event(event, index_maps):
+    """Translate the point indices of a parsed event in place
+
+    index_maps is {curve number: mapping} (see map_point_indices).  Point
+    dicts and point columns (with a curveNumber column) are translated;
+    returns True if anything changed.
+    """
+    changed = False
+    for point in event.get("points") or ():
+        mapping = index_maps.get(point.get("curveNumber"))
+        if mapping is None:
+            continue
+        for field in POINT_INDEX_FIELDS:
+            if isinstance(point.get(field), int):
+                point[field] = int(map_point_indices(mapping, point[field]))
+                changed = True
+    columns = event.get("columns")
+    if columns and "curveNumber" in columns:
+        curves = _column(columns["curveNumber"])
+        for field in POINT_INDEX_FIELDS:
+            if field not in columns:
+                continue
+            values = _column(columns[field])
+            if values.dtype.kind not in "iu":
+                # points of traces without this field (sent as a plain list)
+                continue
+            mapped = values.astype(np.int64)
+            for curve, mapping in index_maps.items():
+                rows = curves == curve
+                if rows.any():
+                    mapped[rows] = map_point_indices(mapping, values[rows])
+                    changed = True
+            if is_typed_array_spec(columns[field]):
+                columns[field] = to_typed_array_spec(mapped) or []
+            else:
+                columns[field] = mapped.tolist()
+    return changed
+
+
+def remap_selection(selection, index_maps):
+    """Translate a {curve number: point indices} selection"""
+    return {
+        curve: map_point_indices(index_maps[curve], indices) if curve in index_maps else indices
+        for curve, indices in selection.items()
+    }
+
+
+# Page-side forwarding: createEventForwarder(callbacks) holds the forwarding
+# state of one plot.  Its sync(el) subscribes to the Plotly events that have
+# Python subscribers and routes them through dispatch, which applies the
+# policy for the event type.  Events are only sanitized and stringified when
+# they are actually delivered.
+EVENTS_JS = '''
+const PLOTLY_EVENTS = ''' + json.dumps(PLOTLY_EVENTS) + ''';
+const SELECTION_EVENTS = ''' + json.dumps(SELECTION_EVENTS) + ''';
+
+function createEventForwarder(callbacks) {
+    // {event type: policy}, see events.normalize_policy
+    let policies = {};
+    // {event type: {fields: [...], binary: bool}}: send points as columns
+    let fields = {};
+    // only events that have a subscriber on the Python side are listened to
+    let subscribed = new Set();
+    // whether selection_changed has subscribers
+    let selection = false;
+    const listeners = {};
+    // {slot: {name, event, timer, last, queued}}, see dispatch
+    const pending = {};
+    let queued = 0;
+    const stats = {};
+    let statsTimer = null;
+
+    function countEvent(name, field) {
+        const counts = stats[name] ??= {delivered: 0, merged: 0};
+        counts[field] += 1;
+        if (field === "merged" && statsTimer === null) {
+            // report coalescing at most once a second
+            statsTimer = setTimeout(reportStats, 1000);
+        }
+    }
+
+    function reportStats() {
+        statsTimer = null;
+        callbacks.on_event_stats?.(JSON.stringify(stats));
+    }
+
+    function columnarEvent(event, spec) {
+        const points = event.points;
+        const columns = {};
+        for (const field of spec.fields) {
+            const values = points.map((p) => p[field]);
+            columns[field] = spec.binary ? packColumn(values) : values;
+        }
+        return {
+            ...event,
+            points: undefined,
+            xaxes: undefined,
+            yaxes: undefined,
+            n_points: points.length,
+            columns: columns,
+        };
+    }
+
+    // The selected point indices of each curve as Int32Array specs: much
+    // cheaper than stringifying every point dict of a large selection
+    function selectionIndices(event) {
+        const points = event?.points ?? [];
+        // curve number -> {n: points, filled, indices}
+        const byCurve = new Map();
+        for (const p of points) {
+            const curve = byCurve.get(p.curveNumber);
+            if (curve === undefined) byCurve.set(p.curveNumber, {n: 1, filled: 0, indices: null});
+            else curve.n++;
+        }
+        for (const curve of byCurve.values()) curve.indices = new Int32Array(curve.n);
+        for (const p of points) {
+            const curve = byCurve.get(p.curveNumber);
+            curve.indices[curve.filled++] = p.pointIndex ?? p.pointNumber;
+        }
+        const curves = {};
+        for (const [number, curve] of byCurve) curves[number] = toTypedArraySpec(curve.indices);
+        return {curves: curves, n_points: points.length};
+    }
+
+    function wanted(name) {
+        return subscribed.has(name) || (selection && SELECTION_EVENTS.includes(name));
+    }
+
+    function deliver(name, event) {
+        countEvent(name, "delivered");
+        if (selection && SELECTION_EVENTS.includes(name)) {
+            const selected = name === "plotly_selected" ? event : null;
+            callbacks.on_selection?.(JSON.stringify(selectionIndices(selected)));
+            if (!subscribed.has(name)) return;
+        }
+        const spec = fields[name];
+        if (spec && event?.points) {
+            callbacks.on_plotly_event?.(name, JSON.stringify(columnarEvent(event, spec)));
+            return;
+        }
+        // remove elements of event and points that are not serializable
+        const args = {
+            ...event,
+            points: event?.points?.map((p) => ({
+            ...p,
+            fullData: undefined,
+            xaxis: undefined,
+            yaxis: undefined,
+            })),
+            xaxes: undefined,
+            yaxes: undefined,
+        };
+        callbacks.on_plotly_event?.(name, JSON.stringify(args));
+    }
+
+    // Relayout ({path: value}) and restyle ([{path: value}, traces]) events
+    // only carry what changed: keeping the latest one would lose keys.
+    // Later keys replace earlier ones along with the paths under them;
+    // null means the events can't be merged (restyles of other traces).
+    function mergeUpdate(earlier, later) {
+        const keys = Object.keys(later ?? {});
+        const merged = {};
+        for (const [path, value] of Object.entries(earlier ?? {})) {
+            const under = (key) => path === key || path.startsWith(key + ".") || path.startsWith(key + "[");
+            if (!keys.some(under)) merged[path] = value;
+        }
+        return Object.assign(merged, later);
+    }
+
+    function mergeEvents(name, earlier, later) {
+        if (name === "plotly_relayout") return mergeUpdate(earlier, later);
+        if (name === "plotly_restyle") {
+            if (JSON.stringify(earlier?.[1]) !== JSON.stringify(later?.[1])) return null;
+            return [mergeUpdate(earlier?.[0], later?.[0]), later?.[1]];
+        }
+        return later;
+    }
+
+    // hover and unhover are coalesced in one slot: apart, hover(A),
+    // unhover(A), hover(B) would come out as hover(B), unhover(A)
+    const SLOTS = {plotly_unhover: "plotly_hover"};
+
+    function flushSlot(state) {
+        if (state.name === null) return;
+        const [name, event] = [state.name, state.event];
+        state.name = null;
+        state.event = null;
+        state.last = performance.now();
+        deliver(name, event);
+    }
+
+    // deliver what is waiting, in the order it was queued
+    function flushAll() {
+        const waiting = Object.values(pending).filter((state) => state.name !== null);
+        waiting.sort((a, b) => a.queued - b.queued);
+        waiting.forEach(flushSlot);
+    }
+
+    function dispatch(name, event) {
+        const policy = policies[name];
+        if (!policy || policy.mode === "immediate") {
+            flushAll();
+            deliver(name, event);
+            return;
+        }
+        const slot = SLOTS[name] ?? name;
+        const state = pending[slot] ??= {name: null, event: null, timer: null, last: -Infinity, queued: 0};
+        if (state.name !== null) {
+            const merged = state.name === name ? mergeEvents(name, state.event, event) : event;
+            if (merged === null) {
+                flushSlot(state);
+            } else {
+                countEvent(name, "merged");
+                event = merged;
+            }
+        }
+        if (state.name === null) state.queued = queued++;
+        state.name = name;
+        state.event = event;
+        // a timer already running delivers whatever is pending when it fires
+        const flush = () => {
+            state.timer = null;
+            flushSlot(state);
+        };
+        if (policy.mode === "raf") {
+            if (state.timer === null) state.timer = requestAnimationFrame(flush);
+        } else if (policy.mode === "debounce") {
+            clearTimeout(state.timer);
+            state.timer = setTimeout(flush, policy.ms);
+        } else if (policy.mode === "throttle" && state.timer === null) {
+            const wait = state.last + policy.ms - performance.now();
+            if (wait <= 0) flush();
+            else state.timer = setTimeout(flush, wait);
+        }
+    }
+
+    function sync(el) {
+        for (const name of PLOTLY_EVENTS) {
+            const listening = name in listeners;
+            if (wanted(name) && !listening) {
+                listeners[name] = (event) => dispatch(name, event);
+                el.on(name, listeners[name]);
+            } else if (!wanted(name) && listening) {
+                el.removeListener(name, listeners[name]);
+                delete listeners[name];
+            }
+        }
+    }
+
+    return {
+        dispatch: dispatch,
+        sync: sync,
+        setPolicies: (value) => { policies = value; },
+        setFields: (value) => { fields = value; },
+        setSubscriptions: (names, withSelection) => {
+            subscribed = new Set(names);
+            selection = Boolean(withSelection);
+        },
+    };
+}
+'''
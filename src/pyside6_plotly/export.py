@@ -0,0 +1,392 @@
+"""Batch export of figures to image and PDF files.
+
+Starting a browser per figure is what makes exporting slow.  BatchExporter
+keeps a few offscreen pages with plotly.js already loaded and feeds them a
+queue of figures; each page draws one figure at a time and exports it with
+Plotly.toImage (png, jpeg, webp, svg) or QWebEnginePage.printToPdf (pdf).
+
+    exporter = BatchExporter(concurrency=4)
+    for i, fig in enumerate(figures):
+        exporter.add(fig, f"report/{i}.png", width=1200, height=800)
+    jobs = exporter.run()       # blocks until the queue is empty
+    exporter.stats()            # figures per second, latency percentiles
+
+A QApplication must exist; no display is needed with QT_QPA_PLATFORM=offscreen.
+Jobs that take longer than timeout seconds fail, and their page is replaced.
+"""
+import base64
+import os
+import time
+import urllib.parse
+from collections import deque
+
+from PySide6.QtCore import QEventLoop, QMarginsF, QObject, QSizeF, QTimer, Signal, Slot
+from PySide6.QtGui import QPageLayout, QPageSize
+from PySide6.QtWebChannel import QWebChannel
+from PySide6.QtWebEngineCore import QWebEnginePage
+
+from .encoding import TYPED_ARRAY_JS, figure_to_dict, serialize
+from .figure_diff import snapshot_figure
+from .plotly_js import full_bundle, partial_bundle
+from .timing import TimingStats
+from .url_scheme import bundle_url, install_scheme_handler, register_scheme
+
+# the plotly-local: scheme must be known before the QApplication exists
+register_scheme()
+
+# file suffix -> export format
+FORMATS = {
+    ".png": "png",
+    ".jpg": "jpeg",
+    ".jpeg": "jpeg",
+    ".webp": "webp",
+    ".svg": "svg",
+    ".pdf": "pdf",
+}
+
+EXPORT_JS = '''
+function connectExporter(plotDiv, callbacks) {
+    callbacks.render.connect(async function(jobId, jobJson) {
+        try {
+            const job = decodeTypedArrays(JSON.parse(jobJson));
+            const layout = {...job.figure.layout, width: job.width, height: job.height};
+            plotDiv.style.width = job.width + "px";
+            plotDiv.style.height = job.height + "px";
+            // drawn once, without interactivity
+            await Plotly.react(plotDiv, job.figure.data ?? [], layout, {staticPlot: true});
+            if (job.format === "pdf") {
+                // printed from Python
+                callbacks.on_plotted(jobId);
+                return;
+            }
+            const url = await Plotly.toImage(plotDiv, {
+                format: job.format, width: job.width, height: job.height, scale: job.scale,
+            });
+            callbacks.on_image(jobId, url);
+        } catch (err) {
+            callbacks.on_error(jobId, String(err));
+        }
+    });
+    callbacks.on_page_ready();
+}
+'''
+
+
+def export_page_html(plotly_js_url):
+    return f'''
+<!DOCTYPE html>
+<html>
+<head>
+    <meta charset="utf-8" />
+    <script src="qrc:///qtwebchannel/qwebchannel.js"></script>
+    <script src="{plotly_js_url}"></script>
+    <style>
+        body, html {{ margin: 0; padding: 0; }}
+        @page {{ margin: 0; }}
+    </style>
+</head>
+<body>
+    <div id="plot"></div>
+    <script>
+        {TYPED_ARRAY_JS}
+        {EXPORT_JS}
+
+        document.addEventListener("DOMContentLoaded", function() {{
+            new QWebChannel(qt.webChannelTransport, function(channel) {{
+                connectExporter(document.getElementById('plot'), channel.objects.exporter);
+            }});
+        }});
+    </script>
+</body>
+</html>
+'''
+
+
+def decode_data_url(url):
+    """The bytes of a data: URL as returned by Plotly.toImage"""
+    header, _, data = url.partition(",")
+    if header.endswith(";base64"):
+        return base64.b64decode(data)
+    return urllib.parse.unquote_to_bytes(data)
+
+
+class ExportJob:
+    """One figure to export; error is None once it succeeded"""
+
+    def __init__(self, job_id, fig_dict, path, format, width, height, scale):
+        self.id = job_id
+        self.fig_dict = fig_dict
+        self.path = path
+        self.format = format
+        self.width = width
+        self.height = height
+        self.scale = scale
+        self.error = None
+        # from dispatch to the file being written
+        self.seconds = None
+        self._started = None
+
+    def __repr__(self):
+        status = self.error or ("done" if self.seconds is not None else "pending")
+        return f"<ExportJob {self.id} {self.path!r} {status}>"
+
+
+class ExportCallbacks(QObject):
+    """Channel object between an export page and Python"""
+
+    # Python -> JS
+    render = Signal(int, str)  # job id, {figure, format, width, height, scale}
+
+    # JS -> Python
+    page_ready = Signal()
+    image_ready = Signal(int, str)  # job id, data: URL
+    plotted = Signal(int)  # job id, ready to print
+    failed = Signal(int, str)  # job id, error
+
+    @Slot()
+    def on_page_ready(self):
+        self.page_ready.emit()
+
+    @Slot(int, str)
+    def on_image(self, job_id, url):
+        self.image_ready.emit(job_id, url)
+
+    @Slot(int)
+    def on_plotted(self, job_id):
+        self.plotted.emit(job_id)
+
+    @Slot(int, str)
+    def on_error(self, job_id, error):
+        self.failed.emit(job_id, error)
+
+
+class _ExportPage:
+    # an offscreen page with its channel and the job it is working on
+
+    def __init__(self, exporter):
+        self.page = QWebEnginePage(exporter)
+        # hidden pages don't run animation frames, which Plotly may wait for
+        self.page.setVisible(True)
+        self.callbacks = ExportCallbacks(self.page)
+        self.channel = QWebChannel(self.page)
+        self.channel.registerObject("exporter", self.callbacks)
+        self.page.setWebChannel(self.channel)
+        self.ready = False
+        self.job = None
+        self.timer = QTimer(self.page)
+        self.timer.setSingleShot(True)
+
+        install_scheme_handler(self.page.profile(), exporter.plotly_bundle)
+        self.callbacks.page_ready.connect(lambda: exporter._on_page_ready(self))
+        self.callbacks.image_ready.connect(lambda job_id, url: exporter._on_image(self, job_id, url))
+        self.callbacks.plotted.connect(lambda job_id: exporter._on_plotted(self, job_id))
+        self.callbacks.failed.connect(lambda job_id, error: exporter._finish(self, job_id, error))
+        self.page.pdfPrintingFinished.connect(lambda path, ok: exporter._on_pdf_printed(self, path, ok))
+        self.page.renderProcessTerminated.connect(
+            lambda status, code: exporter._replace_page(self, f"renderer terminated ({code})")
+        )
+        self.timer.timeout.connect(
+            lambda: exporter._replace_page(self, f"timed out after {exporter.timeout} s", timed_out=True)
+        )
+        self.page.setHtml(export_page_html(bundle_url(exporter.plotly_bundle)))
+
+
+class BatchExporter(QObject):
+    # each finished job, successful or not (see ExportJob.error)
+    job_finished = Signal(object)
+    # the queue is empty and no job is running
+    finished = Signal()
+
+    def __init__(self, concurrency=4, width=800, height=600, scale=1, timeout=30, plotly_bundle=None, parent=None):
+        """
+        concurrency: number of pages exporting at the same time
+        width, height, scale: defaults for add()
+        timeout: seconds a job may take before it fails
+        plotly_bundle: plotly.js build to load, as for PlotlyQtWidget;
+            figures needing trace types it lacks are refused by add()
+        """
+        super().__init__(parent)
+        self.width = width
+        self.height = height
+        self.scale = scale
+        self.timeout = timeout
+        if isinstance(plotly_bundle, str):
+            plotly_bundle = partial_bundle(plotly_bundle)
+        self.plotly_bundle = plotly_bundle or full_bundle()
+
+        self._queue = deque()
+        self._next_id = 0
+        self.completed = 0
+        self.failures = 0
+        self.timeouts = 0
+        # {"total": ms} per successful job
+        self.timing_stats = TimingStats()
+        self._first_dispatch = None
+        self._last_finish = None
+
+        # pages are created right away, so plotly.js loads while jobs are added
+        self._pages = [_ExportPage(self) for _ in range(concurrency)]
+
+    def add(self, fig, path, format=None, width=None, height=None, scale=None):
+        """Queue fig for export to path; returns its ExportJob
+
+        format defaults to the file suffix (png, jpeg, webp, svg or pdf).
+        scale multiplies the resolution of raster images.  fig is copied
+        (but for its read-only arrays): it may be modified and added again
+        before the job runs.
+        """
+        path = os.fspath(path)
+        if format is None:
+            format = FORMATS.get(os.path.splitext(path)[1].lower())
+            if format is None:
+                raise ValueError(f"can't tell the export format of {path!r}: pass format=")
+        elif format not in FORMATS.values():
+            raise ValueError(f"unknown export format {format!r}, use one of {sorted(set(FORMATS.values()))}")
+        fig_dict = snapshot_figure(figure_to_dict(fig))
+        missing = self.plotly_bundle.missing_trace_types(fig_dict)
+        if missing:
+            raise ValueError(
+                f"the plotly.js bundle {self.plotly_bundle.name!r} can't draw trace type(s) {', '.join(missing)}"
+            )
+        job = ExportJob(
+            self._next_id, fig_dict, path, format,
+            width or self.width, height or self.height, scale or self.scale,
+        )
+        self._next_id += 1
+        self._queue.append(job)
+        QTimer.singleShot(0, self._dispatch)
+        return job
+
+    def run(self):
+        """Run the event loop until every queued job is done; returns them"""
+        jobs = list(self._queue) + [p.job for p in self._pages if p.job is not None]
+        if jobs:
+            loop = QEventLoop()
+            self.finished.connect(loop.quit)
+            self._dispatch()
+            if not self._idle():
+                loop.exec()
+            self.finished.disconnect(loop.quit)
+        return sorted(jobs, key=lambda job: job.id)
+
+    def stats(self):
+        """Throughput (figures per second) and latency percentiles (ms)"""
+        elapsed = None
+        if self._first_dispatch is not None and self._last_finish is not None:
+            elapsed = self._last_finish - self._first_dispatch
+        return {
+            "completed": self.completed,
+            "failed": self.failures,
+            "timeouts": self.timeouts,
+            "queued": len(self._queue),
+            "running": sum(p.job is not None for p in self._pages),
+            "seconds": elapsed,
+            "per_second": self.completed / elapsed if elapsed else None,
+            "latency_ms": self.timing_stats.summary(("total",)).get("total"),
+        }
+
+    def close(self):
+        """Drop the queue and dispose of the pages"""
+        self._queue.clear()
+        for page in self._pages:
+            page.timer.stop()
+            page.page.deleteLater()
+        self._pages = []
+
+    def _idle(self):
+        return not self._queue and all(p.job is None for p in self._pages)
+
+    def _dispatch(self):
+        for page in self._pages:
+            if not self._queue:
+                return
+            if not page.ready or page.job is not None:
+                continue
+            job = self._queue.popleft()
+            page.job = job
+            job._started = time.perf_counter()
+            if self._first_dispatch is None:
+                self._first_dispatch = job._started
+            message = {
+                "figure": job.fig_dict,
+                "format": job.format,
+                "width": job.width,
+                "height": job.height,
+                "scale": job.scale,
+            }
+            # the page has its own copy now
+            job.fig_dict = None
+            page.timer.start(int(self.timeout * 1000))
+            page.callbacks.render.emit(job.id, serialize(message))
+
+    def _on_page_ready(self, page):
+        page.ready = True
+        self._dispatch()
+
+    def _on_image(self, page, job_id, url):
+        if page.job is None or page.job.id != job_id:
+            return
+        try:
+            self._write(page.job.path, decode_data_url(url))
+        except (OSError, ValueError) as exc:
+            self._finish(page, job_id, str(exc))
+            return
+        self._finish(page, job_id, None)
+
+    def _on_plotted(self, page, job_id):
+        if page.job is None or page.job.id != job_id:
+            return
+        job = page.job
+        directory = os.path.dirname(job.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # CSS pixels are 0.75 pt
+        size = QPageSize(QSizeF(job.width * 0.75, job.height * 0.75), QPageSize.Unit.Point)
+        layout = QPageLayout(size, QPageLayout.Orientation.Portrait, QMarginsF())
+        page.page.printToPdf(os.path.abspath(job.path), layout)
+
+    def _on_pdf_printed(self, page, path, ok):
+        if page.job is None:
+            return
+        self._finish(page, page.job.id, None if ok else f"printing {path} failed")
+
+    @staticmethod
+    def _write(path, data):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(data)
+
+    def _finish(self, page, job_id, error):
+        job = page.job
+        if job is None or job.id != job_id:
+            # a late answer for a job that already timed out
+            return
+        page.timer.stop()
+        page.job = None
+        now = time.perf_counter()
+        job.seconds = now - job._started
+        job.error = error
+        self._last_finish = now
+        if error is None:
+            self.completed += 1
+            self.timing_stats.add({"total": job.seconds * 1e3})
+        else:
+            self.failures += 1
+        self.job_finished.emit(job)
+        self._dispatch()
+        if self._idle():
+            self.finished.emit()
+
+    def _replace_page(self, page, error, timed_out=False):
+        # the page is stuck or gone: fail its job and start a fresh one
+        if page not in self._pages:
+            return
+        page.timer.stop()
+        self._pages[self._pages.index(page)] = _ExportPage(self)
+        if page.job is not None:
+            if timed_out:
+                self.timeouts += 1
+            self._finish(page, page.job.id, error)
+        page.page.deleteLater()
@@ -0,0 +1,259 @@
+"""Structural diff of figure dicts into Plotly.js update calls.
+
+diff_figures() compares the figure last sent to the page with a new one and
+returns the list of Plotly calls ({"method": ..., "args": [...]}) that turns
+the former into the latter, so a small edit to a large figure only transfers
+the edited attributes.  Arrays are compared by identity first: snapshots
+(snapshot_figure) reuse the previous snapshot's copy of an unchanged array,
+so an unchanged array is usually the very same object.
+"""
+import hashlib
+import weakref
+
+import numpy as np
+
+# attributes that are always replaced as a whole instead of being diffed
+# key by key (Plotly.relayout/restyle can't address inside of them)
+ATOMIC_KEYS = {"template"}
+
+# arrays smaller than this are kept by release_arrays
+RELEASE_MIN_BYTES = 1 << 16
+
+
+def _digest(array):
+    return hashlib.blake2b(np.ascontiguousarray(array).data, digest_size=16).digest()
+
+
+class SnapshotArray(np.ndarray):
+    """Read-only copy of a writeable array, made by snapshot_figure
+
+    source is a weak reference to the array copied (None once it's gone).
+    """
+
+    def __array_finalize__(self, obj):
+        # only snapshot_figure sets it: views and results of operations
+        # aren't copies of anything
+        self.source = None
+
+
+class ArrayRef:
+    """Weak stand-in for an array the page already has
+
+    Compares equal to the array as long as something else (typically the
+    caller's plotly Figure) keeps it alive; once it is gone the attribute
+    counts as changed.  With a digest the array may be writeable: it also
+    counts as changed once its content no longer matches.
+    """
+    __slots__ = ("_ref", "shape", "dtype", "digest", "__weakref__")
+
+    def __init__(self, array, digest=None):
+        self._ref = weakref.ref(array)
+        self.shape = array.shape
+        self.dtype = array.dtype
+        self.digest = digest
+
+    def get(self):
+        """The array, or None if it was freed (or modified)"""
+        array = self._ref()
+        if array is not None and self.digest is not None:
+            if array.shape != self.shape or array.dtype != self.dtype or _digest(array) != self.digest:
+                return None
+        return array
+
+    def __repr__(self):
+        array = self._ref()
+        state = f"at 0x{id(array):x}" if array is not None else "released"
+        return f"ArrayRef({self.dtype.str}{list(self.shape)} {state})"
+
+
+def release_arrays(obj, min_bytes=RELEASE_MIN_BYTES):
+    """Copy of a figure dict with its large arrays replaced by ArrayRefs
+
+    Snapshot copies refer to the caller's array they were made from, as
+    long as it is alive, checked by content.
+    """
+    if isinstance(obj, dict):
+        return {key: release_arrays(value, min_bytes) for key, value in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [release_arrays(value, min_bytes) for value in obj]
+    if isinstance(obj, np.ndarray) and obj.nbytes >= min_bytes:
+        source = obj.source() if isinstance(obj, SnapshotArray) and obj.source is not None else None
+        if source is not None:
+            return ArrayRef(source, _digest(obj))
+        return ArrayRef(obj)
+    return obj
+
+
+def resolve_arrays(obj):
+    """Undo release_arrays: return (copy with arrays, number of freed arrays)
+
+    Freed arrays become None.
+    """
+    released = 0
+
+    def resolve(value):
+        nonlocal released
+        if isinstance(value, dict):
+            return {key: resolve(v) for key, v in value.items()}
+        if isinstance(value, (list, tuple)):
+            return [resolve(v) for v in value]
+        if isinstance(value, ArrayRef):
+            array = value.get()
+            if array is None:
+                released += 1
+            return array
+        return value
+
+    return resolve(obj), released
+
+
+def snapshot_figure(obj, previous=None):
+    """Copy the structure of a figure dict for later comparison
+
+    Dicts and lists are copied so in-place edits of the caller's figure show
+    up in the next diff.  Read-only arrays are kept by reference (they can't
+    change underneath us); writeable arrays are copied, except memory-mapped
+    ones, which are lazy array sources (see array_sources.py).  With the
+    previous snapshot, an array equal to the one at the same place in it
+    reuses that copy instead: it costs a comparison rather than a copy, and
+    diff_figures finds it unchanged by identity.
+    """
+    if isinstance(obj, dict):
+        if not isinstance(previous, dict):
+            previous = {}
+        return {key: snapshot_figure(value, previous.get(key)) for key, value in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        if not isinstance(previous, list) or len(previous) != len(obj):
+            previous = [None] * len(obj)
+        return [snapshot_figure(value, old) for value, old in zip(obj, previous)]
+    if isinstance(obj, np.ndarray) and obj.flags.writeable and not isinstance(obj, np.memmap):
+        if isinstance(previous, ArrayRef) and previous.digest is not None:
+            # memory_lean: a released snapshot copy of obj
+            if previous._ref() is obj and previous.get() is not None:
+                return previous
+        elif (
+            isinstance(previous, SnapshotArray)
+            and previous.shape == obj.shape
+            and previous.dtype == obj.dtype
+            and np.array_equal(previous, obj, equal_nan=obj.dtype.kind in "fc")
+        ):
+            return previous
+        copy = SnapshotArray(obj.shape, obj.dtype)
+        copy[...] = obj
+        copy.flags.writeable = False
+        copy.source = weakref.ref(obj)
+        return copy
+    return obj
+
+
+def values_equal(a, b):
+    """Compare two attribute values, cheaply when they are the same array"""
+    if a is b:
+        return True
+    if isinstance(a, ArrayRef):
+        a = a.get()
+        if a is None:
+            return False
+    if isinstance(b, ArrayRef):
+        b = b.get()
+        if b is None:
+            return False
+    if a is b:
+        return True
+    a_is_array = isinstance(a, np.ndarray)
+    b_is_array = isinstance(b, np.ndarray)
+    if a_is_array or b_is_array:
+        if not (a_is_array and b_is_array):
+            return False
+        if a.shape != b.shape or a.dtype != b.dtype:
+            return False
+        return np.array_equal(a, b, equal_nan=a.dtype.kind in "fc")
+    if isinstance(a, dict) and isinstance(b, dict):
+        if a.keys() != b.keys():
+            return False
+        return all(values_equal(a[key], b[key]) for key in a)
+    if isinstance(a, (list, tuple)) and isinstance(b, (list, tuple)):
+        if len(a) != len(b):
+            return False
+        return all(values_equal(x, y) for x, y in zip(a, b))
+    try:
+        return bool(a == b)
+    except (TypeError, ValueError):
+        return False
+
+
+def diff_attributes(old, new, prefix=""):
+    """Return {dotted.path: value} of the attributes that differ
+
+    Nested dicts are walked so that e.g. a title change becomes
+    {"title.text": ...}; attributes removed in new are set to None, which
+    Plotly interprets as "reset to default".
+    """
+    changes = {}
+    for key, value in new.items():
+        path = prefix + key
+        if key not in old:
+            changes[path] = value
+            continue
+        old_value = old[key]
+        if (
+            isinstance(value, dict)
+            and isinstance(old_value, dict)
+            and key not in ATOMIC_KEYS
+        ):
+            changes.update(diff_attributes(old_value, value, path + "."))
+        elif not values_equal(old_value, value):
+            changes[path] = value
+    for key in old:
+        if key not in new:
+            changes[prefix + key] = None
+    return changes
+
+
+def diff_figures(old, new):
+    """Return the Plotly calls that update figure old into new
+
+    Returns None when an incremental update isn't possible (trace type
+    changed, animation frames) and the figure has to be re-plotted with
+    Plotly.react; returns an empty list when nothing changed.
+    """
+    if old.get("frames") or new.get("frames"):
+        return None
+    old_traces = list(old.get("data", ()))
+    new_traces = list(new.get("data", ()))
+    n_common = min(len(old_traces), len(new_traces))
+
+    calls = []
+    if len(old_traces) > n_common:
+        calls.append({
+            "method": "deleteTraces",
+            "args": [list(range(n_common, len(old_traces)))],
+        })
+    if len(new_traces) > n_common:
+        calls.append({"method": "addTraces", "args": [new_traces[n_common:]]})
+
+    # group traces by the set of attributes that changed, so e.g. new y data on
+    # every trace is a single restyle (and a single redraw) on the page
+    groups = {}
+    for index in range(n_common):
+        old_trace, new_trace = old_traces[index], new_traces[index]
+        if old_trace.get("type", "scatter") != new_trace.get("type", "scatter"):
+            return None
+        changes = diff_attributes(old_trace, new_trace)
+        if changes:
+            groups.setdefault(tuple(sorted(changes)), []).append((index, changes))
+
+    layout_changes = diff_attributes(old.get("layout", {}), new.get("layout", {}))
+
+    updates = []
+    for paths, members in groups.items():
+        restyle = {path: [changes[path] for _, changes in members] for path in paths}
+        updates.append([restyle, {}, [index for index, _ in members]])
+    if layout_changes:
+        if updates:
+            # fold the relayout into the first update
+            updates[0][1] = layout_changes
+        else:
+            updates.append([{}, layout_changes, []])
+    calls.extend({"method": "update", "args": args} for args in updates)
+    return calls
@@ -0,0 +1,172 @@
+"""Bulk export of figures to standalone HTML pages.
+
+plotly.offline.plot(include_plotlyjs=True) inlines the 3.5 MB plotly.js into
+every file.  export_html writes plotly.js once, next to the reports, and
+refers to it from each page; the figures are serialized (with packed typed
+arrays) and written by a pool of worker processes, a bounded number at a
+time, so memory use doesn't grow with the number of figures:
+
+    export_html(
+        ((fig, f"reports/{name}.html") for name, fig in figures),
+        "reports/plotly.min.js",
+        compress=True,     # reports/<name>.html.gz
+    )
+
+Nothing here imports Qt, so the worker processes start quickly.
+"""
+import gzip
+import html
+import json
+import os
+import shutil
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from .encoding import TYPED_ARRAY_JS, figure_to_dict, serialize
+from .figure_diff import snapshot_figure
+from .plotly_js import full_bundle
+
+# pieces of the serialized figure are written this many characters at a
+# time, so they aren't encoded to UTF-8 all at once
+WRITE_CHUNK = 1 << 20
+
+PAGE_HEAD = '''<!DOCTYPE html>
+<html>
+<head>
+    <meta charset="utf-8" />
+    <title>{title}</title>
+    <script src="{plotly_js_src}"></script>
+    <style>
+        body, html {{ margin: 0; padding: 0; height: 100%; }}
+        #plot {{ width: 100%; height: 100%; }}
+    </style>
+</head>
+<body>
+    <div id="plot"></div>
+    <script type="application/json" id="figure">'''
+
+PAGE_TAIL = '''</script>
+    <script>
+        {typed_array_js}
+        const figure = decodeTypedArrays(JSON.parse(document.getElementById("figure").textContent));
+        Plotly.newPlot("plot", figure.data ?? [], figure.layout ?? {{}}, {{responsive: true}});
+    </script>
+</body>
+</html>
+'''
+
+
+def write_plotly_js(path, bundle=None):
+    """Copy plotly.js (or a plotly_js.PlotlyBundle) to path, unless it is there
+
+    An existing file of the same size is assumed to be the same build.
+    """
+    source = (bundle or full_bundle()).path
+    if os.path.exists(path) and os.path.getsize(path) == os.path.getsize(source):
+        return path
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    shutil.copyfile(source, path)
+    return path
+
+
+def figure_pieces(fig_dict, binary_arrays=True):
+    """The JSON of a figure dict in pieces: a trace, the layout, ... at a time
+
+    Joined, the pieces are the figure's JSON; the whole string is never
+    built, only that of its largest trace.
+    """
+    yield '{"data": ['
+    for i, trace in enumerate(fig_dict.get("data") or ()):
+        yield (", " if i else "") + serialize(trace, binary_arrays)
+    yield "]"
+    for key, value in fig_dict.items():
+        if key != "data":
+            yield f", {json.dumps(key)}: {serialize(value, binary_arrays)}"
+    yield "}"
+
+
+def write_page(fig_dict, path, plotly_js_src, compress=False, binary_arrays=True, title=None):
+    """Write one figure as an HTML page loading plotly.js from plotly_js_src
+
+    The figure is serialized and written a trace at a time (figure_pieces).
+    Returns the number of bytes written (compressed, with compress=True).
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    opener = gzip.open if compress else open
+    with opener(path, "wt", encoding="utf-8") as f:
+        f.write(PAGE_HEAD.format(
+            title=html.escape(title or os.path.basename(path).split(".")[0]),
+            plotly_js_src=html.escape(plotly_js_src),
+        ))
+        for piece in figure_pieces(fig_dict, binary_arrays):
+            # the figure sits in a JSON script element: only "</" could end
+            # it early (and can't span pieces, which are whole JSON values)
+            piece = piece.replace("</", "<\\/")
+            for start in range(0, len(piece), WRITE_CHUNK):
+                f.write(piece[start:start + WRITE_CHUNK])
+        f.write(PAGE_TAIL.format(typed_array_js=TYPED_ARRAY_JS))
+    return os.path.getsize(path)
+
+
+def _write_page_job(args):
+    # worker process entry point
+    return write_page(*args)
+
+
+def export_html(items, plotly_js, processes=None, compress=False, binary_arrays=True, max_pending=None):
+    """Write (figure, path) pairs from items as HTML pages
+
+    plotly_js: where to write the shared plotly.js, or an http(s) URL to
+        load it from instead (nothing is written then)
+    processes: worker processes (None: one per CPU; 0: write in this
+        process, one page at a time)
+    compress: gzip the pages, adding ".gz" to paths that don't end in it
+    max_pending: figures handed to the workers but not yet written (None:
+        twice the number of workers); bounds memory use with large items
+
+    items may be any iterable, e.g. a generator creating the figures, and
+    is consumed as the workers make progress.  Returns the list of
+    (path, bytes written) in the order of items.
+    """
+    remote = plotly_js.startswith(("http://", "https://"))
+    if not remote:
+        plotly_js = os.path.abspath(write_plotly_js(plotly_js))
+
+    def jobs():
+        for fig, path in items:
+            path = os.fspath(path)
+            if compress and not path.endswith(".gz"):
+                path += ".gz"
+            if remote:
+                src = plotly_js
+            else:
+                src = os.path.relpath(plotly_js, os.path.dirname(os.path.abspath(path)))
+                src = src.replace(os.sep, "/")
+            yield figure_to_dict(fig), path, src, compress, binary_arrays
+
+    results = []
+    if processes == 0:
+        for job in jobs():
+            results.append((job[1], write_page(*job)))
+        return results
+
+    if max_pending is None:
+        max_pending = 2 * (processes or os.cpu_count() or 1)
+    with ProcessPoolExecutor(processes) as pool:
+        pending = deque()
+        for fig_dict, *job in jobs():
+            # the job is pickled later, in another thread: don't let the
+            # caller's next changes to the figure get into it
+            job = (snapshot_figure(fig_dict), *job)
+            pending.append((job[1], pool.submit(_write_page_job, job)))
+            while len(pending) >= max_pending:
+                path, future = pending.popleft()
+                results.append((path, future.result()))
+        while pending:
+            path, future = pending.popleft()
+            results.append((path, future.result()))
+    return results
@@ -0,0 +1,220 @@
+"""Local HTTP server for plotly.js and large figure payloads.
+
+With transport="http" a PlotlyQtWidget publishes large messages here and only
+sends their URL over the QWebChannel; the page fetches them with fetch().
+This avoids pushing tens of megabytes of JSON through the channel, which
+copies the string several times on both sides.
+
+One threaded server runs per process (get_server()) and is shared by every
+widget.  It serves:
+
+    /plotly.min.js    the bundled plotly.js (and partial bundles added
+                      with add_bundle), with ETag and long-lived
+                      Cache-Control, streamed from disk
+    /figures/<id>     published payloads; each id is random and stays
+                      valid until the publisher discards it (or all the
+                      payloads of its owner, see discard_owner)
+
+Responses are gzip/deflate compressed when the client accepts it, and sent
+with chunked transfer encoding so large payloads stream as they compress.
+The server only listens on the loopback interface.
+"""
+import os
+import threading
+import uuid
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from .plotly_js import plotly_js_path, plotly_version
+
+CHUNK_SIZE = 1 << 16
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        server = self.server.plotly_server
+        path = self.path.split("?", 1)[0]
+        filename = server.files.get(path.lstrip("/"))
+        if filename is not None:
+            self._send_script(filename)
+        elif path.startswith("/figures/"):
+            payload = server.get(path[len("/figures/"):])
+            if payload is None:
+                self.send_error(404)
+                return
+            self._send_chunked(
+                (payload[i:i + CHUNK_SIZE] for i in range(0, len(payload), CHUNK_SIZE)),
+                "application/json",
+                {"Cache-Control": "no-store"},
+            )
+        else:
+            self.send_error(404)
+
+    def _send_script(self, filename):
+        try:
+            stat = os.stat(filename)
+        except OSError:
+            self.send_error(404)
+            return
+        etag = f'"{plotly_version()}-{stat.st_size}-{int(stat.st_mtime)}"'
+        headers = {
+            "ETag": etag,
+            "Cache-Control": "public, max-age=31536000, immutable",
+        }
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        def blocks():
+            with open(filename, "rb") as f:
+                while block := f.read(CHUNK_SIZE):
+                    yield block
+
+        self._send_chunked(blocks(), "application/javascript", headers)
+
+    def _send_chunked(self, blocks, content_type, headers):
+        compressor = self._compressor()
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Transfer-Encoding", "chunked")
+        # the pages are loaded with setHtml, so their origin is not this server
+        self.send_header("Access-Control-Allow-Origin", "*")
+        if compressor is not None:
+            self.send_header("Content-Encoding", self._encoding)
+            self.send_header("Vary", "Accept-Encoding")
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        for block in blocks:
+            if compressor is not None:
+                block = compressor.compress(block)
+            self._write_chunk(block)
+        if compressor is not None:
+            self._write_chunk(compressor.flush())
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _write_chunk(self, data):
+        if data:
+            self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+
+    def _compressor(self):
+        level = self.server.plotly_server.compresslevel
+        accepted = [e.split(";")[0].strip() for e in self.headers.get("Accept-Encoding", "").split(",")]
+        self._encoding = None
+        if level is None:
+            return None
+        if "gzip" in accepted:
+            self._encoding = "gzip"
+            return zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        if "deflate" in accepted:
+            self._encoding = "deflate"
+            return zlib.compressobj(level, zlib.DEFLATED, zlib.MAX_WBITS)
+        return None
+
+    def log_message(self, format, *args):
+        pass
+
+
+class PlotlyHTTPServer:
+    def __init__(self, host="127.0.0.1", port=0, compresslevel=1):
+        """
+        port: 0 to pick a free port
+        compresslevel: zlib level for compressed responses, None to never
+            compress (on the loopback interface speed matters more than size)
+        """
+        self.compresslevel = compresslevel
+        # url path -> plotly.js bundle on disk
+        self.files = {"plotly.min.js": plotly_js_path()}
+        # id -> payload bytes
+        self._payloads = {}
+        # owner -> ids of its payloads, and id -> owner
+        self._owned = {}
+        self._owners = {}
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), _Handler)
+        self._httpd.daemon_threads = True
+        self._httpd.plotly_server = self
+        self._thread = threading.Thread(
+            target=self._httpd.serve_forever, name="pyside6_plotly-http", daemon=True,
+        )
+        self._thread.start()
+
+    @property
+    def url(self):
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def plotly_js_url(self):
+        return f"{self.url}/plotly.min.js?v={plotly_version()}"
+
+    def add_bundle(self, bundle):
+        """Serve a plotly_js.PlotlyBundle; returns its URL"""
+        self.files[bundle.filename] = bundle.path
+        return f"{self.url}/{bundle.filename}?v={bundle.version}"
+
+    def publish(self, payload, owner=None):
+        """Make payload (str or bytes) available; returns its id
+
+        owner: any hashable, for discard_owner
+        """
+        if isinstance(payload, str):
+            payload = payload.encode("utf-8")
+        payload_id = uuid.uuid4().hex
+        with self._lock:
+            self._payloads[payload_id] = payload
+            if owner is not None:
+                self._owned.setdefault(owner, set()).add(payload_id)
+                self._owners[payload_id] = owner
+        return payload_id
+
+    def payload_url(self, payload_id):
+        return f"{self.url}/figures/{payload_id}"
+
+    def get(self, payload_id):
+        with self._lock:
+            return self._payloads.get(payload_id)
+
+    def discard(self, payload_id):
+        with self._lock:
+            self._payloads.pop(payload_id, None)
+            owner = self._owners.pop(payload_id, None)
+            if owner is not None:
+                owned = self._owned[owner]
+                owned.discard(payload_id)
+                if not owned:
+                    del self._owned[owner]
+
+    def discard_owner(self, owner):
+        """Discard every payload published for owner, e.g. a widget that is gone"""
+        with self._lock:
+            for payload_id in self._owned.pop(owner, ()):
+                self._payloads.pop(payload_id, None)
+                del self._owners[payload_id]
+
+    def __len__(self):
+        return len(self._payloads)
+
+    def close(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        self._thread.join()
+
+
+_server = None
+_server_lock = threading.Lock()
+
+
+def get_server():
+    """The process-wide server, started on first use"""
+    global _server
+    with _server_lock:
+        if _server is None:
+            _server = PlotlyHTTPServer()
+    return _server
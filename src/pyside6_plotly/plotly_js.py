@@ -0,0 +1,111 @@
+"""Where the bundled plotly.js lives, without importing plotly.
+
+Importing plotly (and plotly.offline in particular) is slow, and nothing
+here needs more than the package's location and version.  The script itself
+is streamed from disk by whoever serves it and never held in memory.
+"""
+import importlib.metadata
+import importlib.util
+import os
+from functools import lru_cache
+
+
+@lru_cache(maxsize=None)
+def plotly_version():
+    """Version of the installed plotly package"""
+    try:
+        return importlib.metadata.version("plotly")
+    except importlib.metadata.PackageNotFoundError:
+        # e.g. a vendored copy without metadata
+        import plotly
+        return plotly.__version__
+
+
+@lru_cache(maxsize=None)
+def plotly_package_dir():
+    spec = importlib.util.find_spec("plotly")
+    return list(spec.submodule_search_locations)[0]
+
+
+def plotly_js_path():
+    """Path of the plotly.min.js bundled with the plotly package"""
+    return os.path.join(plotly_package_dir(), "package_data", "plotly.min.js")
+
+
+# Trace types in each of the official partial bundles (plotly-<name>.min.js)
+# of plotly.js 4, the major version plotly ships; see
+# https://github.com/plotly/plotly.js/blob/master/dist/README.md.  plotly.js 3
+# removed heatmapgl and pointcloud, and 4 the *mapbox traces and bundle.
+PARTIAL_BUNDLES = {
+    "basic": {"bar", "pie", "scatter"},
+    "cartesian": {
+        "bar", "box", "contour", "heatmap", "histogram", "histogram2d",
+        "histogram2dcontour", "image", "pie", "scatter", "scatterternary", "violin",
+    },
+    "geo": {"choropleth", "scatter", "scattergeo"},
+    "gl2d": {"parcoords", "scatter", "scattergl", "splom"},
+    "gl3d": {"cone", "isosurface", "mesh3d", "scatter", "scatter3d", "streamtube", "surface", "volume"},
+    "map": {"choroplethmap", "densitymap", "scatter", "scattermap"},
+    "finance": {
+        "bar", "candlestick", "funnel", "funnelarea", "histogram", "ohlc",
+        "pie", "scatter", "waterfall",
+    },
+}
+
+# directory holding plotly-<name>.min.js files, for partial_bundle(name)
+BUNDLE_DIR_ENV = "PYSIDE6_PLOTLY_BUNDLE_DIR"
+
+
+class PlotlyBundle:
+    """A plotly.js build: a file on disk and the trace types it contains"""
+
+    def __init__(self, name, path, trace_types=None):
+        """trace_types: set of supported trace types, None for all of them"""
+        self.name = name
+        self.path = path
+        self.trace_types = None if trace_types is None else frozenset(trace_types)
+
+    def __repr__(self):
+        return f"PlotlyBundle({self.name!r}, {self.path!r})"
+
+    @property
+    def filename(self):
+        return f"{self.name}.min.js"
+
+    @property
+    def version(self):
+        """Changes whenever the file does, for cache busting"""
+        if self.trace_types is None and self.name == "plotly":
+            return plotly_version()
+        stat = os.stat(self.path)
+        return f"{stat.st_size}-{int(stat.st_mtime)}"
+
+    def missing_trace_types(self, fig_dict):
+        """Trace types used by a figure dict that this bundle can't draw"""
+        if self.trace_types is None:
+            return []
+        used = {trace.get("type") or "scatter" for trace in fig_dict.get("data", ())}
+        return sorted(used - self.trace_types)
+
+
+def full_bundle():
+    """The complete plotly.js shipped with the plotly package"""
+    return PlotlyBundle("plotly", plotly_js_path())
+
+
+def partial_bundle(name, path=None):
+    """One of the official partial bundles (see PARTIAL_BUNDLES)
+
+    The file isn't shipped with plotly: pass its path, or put it in the
+    directory named by $PYSIDE6_PLOTLY_BUNDLE_DIR as plotly-<name>.min.js.
+    """
+    if name not in PARTIAL_BUNDLES:
+        raise ValueError(f"unknown plotly.js bundle {name!r}, use one of {sorted(PARTIAL_BUNDLES)}")
+    if path is None:
+        directory = os.environ.get(BUNDLE_DIR_ENV)
+        if directory is None:
+            raise ValueError(f"no path given for the {name!r} bundle and ${BUNDLE_DIR_ENV} is not set")
+        path = os.path.join(directory, f"plotly-{name}.min.js")
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"plotly.js bundle {name!r} not found at {path}")
+    return PlotlyBundle(f"plotly-{name}", path, PARTIAL_BUNDLES[name])
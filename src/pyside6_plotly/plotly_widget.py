@@ -1,16 +1,259 @@
 import json
-from PySide6.QtCore import QObject, Signal, Slot
+import threading
+import time
+import uuid
+import warnings
+from collections import deque
+from concurrent.futures import Future
+
+import numpy as np
+from PySide6.QtCore import QMetaMethod, QObject, QThread, QTimer, Qt, Signal, Slot
+from PySide6.QtWebEngineCore import QWebEngineSettings
 from PySide6.QtWebEngineWidgets import QWebEngineView
 from PySide6.QtWebChannel import QWebChannel
-import plotly.offline
+
+from .array_sources import is_lazy
+from .cache import content_key
+from .encoding import TYPED_ARRAY_JS, figure_to_dict, serialization_executor, serialize
+from .decimation import DecimatedTrace, parse_axis_ranges
+from .events import (
+    DEFAULT_EVENT_POLICIES,
+    EVENTS_JS,
+    PLOTLY_EVENTS,
+    decode_event_data,
+    POINT_EVENTS,
+    decode_selection,
+    normalize_fields,
+    normalize_policy,
+    remap_event,
+    remap_selection,
+)
+from .figure_diff import ArrayRef, diff_figures, release_arrays, resolve_arrays, snapshot_figure, values_equal
+from .http_server import get_server
+from .plotly_js import full_bundle, partial_bundle
+from .streaming import RingBuffer
+from .timing import TimingStats, timed
+from .url_scheme import PLOTLY_JS_URL, bundle_url, install_scheme_handler, register_scheme
+from .webgl import promote_traces
+
+# the plotly-local: scheme must be known before the QApplication exists
+register_scheme()
+
+# Page-side half of a plot: connectPlot(plotDiv, callbacks) applies the
+# updates arriving on one PlotlyCallbacks object to plotDiv and forwards its
+# events back.  All state is per plot, so several plots can share a page.
+PLOT_JS = '''
+function connectPlot(plotDiv, callbacks) {
+    const events = createEventForwarder(callbacks);
+    let plotCreated = false;
+
+    // Parse a message, timing each step (milliseconds)
+    function receive(json) {
+        const t0 = performance.now();
+        const msg = JSON.parse(json);
+        const t1 = performance.now();
+        decodeTypedArrays(msg);
+        const t2 = performance.now();
+        const timing = {received: performance.timeOrigin + t0, parse: t1 - t0, decode: t2 - t1};
+        return [msg, timing, t2];
+    }
+
+    // Large messages may come as {payload_url} (transport="http"): fetch
+    // them from the local server
+    async function resolve(msg, timing) {
+        if (!msg?.payload_url) return msg;
+        const t0 = performance.now();
+        const response = await fetch(msg.payload_url);
+        const data = decodeTypedArrays(await response.json());
+        timing.fetch = performance.now() - t0;
+        return data;
+    }
+
+    // Plot updates are chained so they are applied in the order sent; each
+    // one is acknowledged with its timings once painted, so Python can hold
+    // back the next
+    let plotQueue = Promise.resolve();
+    function enqueue(task, timing, queued) {
+        plotQueue = plotQueue.then(async () => {
+            const start = performance.now();
+            timing.wait = start - queued;
+            try {
+                await task();
+            } catch (err) {
+                console.error(err);
+                timing.error = String(err);
+            }
+            const end = performance.now();
+            timing.plot = end - start - (timing.fetch ?? 0);
+            if (!document.hidden) {
+                // hidden pages don't paint (nor run animation frames)
+                await new Promise(requestAnimationFrame);
+                timing.paint = performance.now() - end;
+            }
+            // Chromium only (and coarse without --enable-precise-memory-info)
+            if (performance.memory) timing.heap = performance.memory.usedJSHeapSize;
+            callbacks.on_render_done?.(JSON.stringify(timing));
+        });
+    }
+
+    const PATCH_METHODS = ["update", "restyle", "relayout", "addTraces", "deleteTraces"];
+    async function applyPatch(calls) {
+        for (const call of calls) {
+            if (!PATCH_METHODS.includes(call.method)) continue;
+            await Plotly[call.method](plotDiv, ...call.args);
+        }
+    }
+
+    async function reactPlot(plotData) {
+        await Plotly.react(plotDiv, plotData.data, plotData.layout, { responsive: true });
+        if (!plotCreated) {
+            // Plotly only adds .on() to the div once it has plotted
+            plotCreated = true;
+            events.sync(plotDiv);
+            callbacks.on_plot_ready("Plot initialized");
+        }
+    }
+
+    // Listen for plot updates
+    callbacks.update_plot.connect(function(plotDataJson) {
+        const [newPlotData, timing, queued] = receive(plotDataJson);
+        enqueue(async () => reactPlot(await resolve(newPlotData, timing)), timing, queued);
+    });
+    callbacks.patch_plot.connect(function(callsJson) {
+        const [calls, timing, queued] = receive(callsJson);
+        enqueue(async () => applyPatch(await resolve(calls, timing)), timing, queued);
+    });
+    // Plotly.extendTraces fails on typed arrays of another type than the
+    // trace's (int samples on a float trace, a list-seeded trace) and on
+    // typed arrays shorter than max_points: build the windows here instead
+    function extendTraces(update, indices, maxPoints) {
+        const restyle = {};
+        for (const [attr, inserts] of Object.entries(update)) {
+            restyle[attr] = indices.map((index, i) => appendWindow(plotDiv.data[index][attr], inserts[i], maxPoints));
+        }
+        return Plotly.restyle(plotDiv, restyle, indices);
+    }
+    callbacks.extend_plot.connect(function(extendJson) {
+        const [received, timing, queued] = receive(extendJson);
+        const extend = async () => {
+            const msg = await resolve(received, timing);
+            await extendTraces(msg.update, msg.indices, msg.max_points ?? undefined);
+        };
+        enqueue(extend, timing, queued);
+    });
+
+    // Event forwarding configuration
+    callbacks.set_subscriptions.connect(function(subscriptionsJson) {
+        const subscriptions = JSON.parse(subscriptionsJson);
+        events.setSubscriptions(subscriptions.events, subscriptions.selection);
+        if (plotCreated) events.sync(plotDiv);
+    });
+    callbacks.set_event_fields.connect(function(fieldsJson) {
+        events.setFields(JSON.parse(fieldsJson));
+    });
+    callbacks.set_event_policies.connect(function(policiesJson) {
+        events.setPolicies(JSON.parse(policiesJson));
+    });
+
+    callbacks.on_page_ready();
+}
+'''
+
+# The page doesn't depend on the figure: it loads plotly.js, connects the web
+# channel and waits for the figure to arrive on update_plot.  That way a page
+# can be loaded (warmed up) before there is anything to plot.
+def page_html(plotly_js_url=PLOTLY_JS_URL):
+    return f'''
+<!DOCTYPE html>
+<html>
+<head>
+    <meta charset="utf-8" />
+    <script src="qrc:///qtwebchannel/qwebchannel.js"></script>
+    <script src="{plotly_js_url}"></script>
+    <style>
+        body, html {{ margin: 0; padding: 0; height: 100%; }}
+        #plot {{ width: 100%; height: 100%; }}
+    </style>
+
+</head>
+<body>
+    <div id="plot"></div>
+    <script>
+        {TYPED_ARRAY_JS}
+        {EVENTS_JS}
+        {PLOT_JS}
+
+        document.addEventListener("DOMContentLoaded", function() {{
+            new QWebChannel(qt.webChannelTransport, function(channel) {{
+                connectPlot(document.getElementById('plot'), channel.objects.callbacks);
+            }});
+        }});
+    </script>
+</body>
+</html>
+'''
+
+
+PAGE_HTML = page_html()
+
+TRANSPORTS = ("channel", "http")
+
+# what an empty plot looks like, e.g. for a widget returned to a pool
+EMPTY_FIGURE = {"data": [], "layout": {}}
+
 
 class PlotlyCallbacks(QObject):
     # Signal to update the plot: sent from Python to JS with new plot data
     update_plot = Signal(str)
 
+    # Signal to patch the plot: sent from Python to JS with a list of
+    # incremental Plotly calls (restyle/relayout/addTraces/deleteTraces)
+    patch_plot = Signal(str)
+
+    # Signal to append points to traces: sent from Python to JS with the new
+    # samples only, applied as Plotly.extendTraces would
+    extend_plot = Signal(str)
+
+    # Signal to configure how often each Plotly event is forwarded: sent from
+    # Python to JS with {event type: policy}
+    set_event_policies = Signal(str)
+
+    # Signal to select the point fields sent for each event: sent from Python
+    # to JS with {event type: {"fields": [...], "binary": bool}}
+    set_event_fields = Signal(str)
+
+    # Signal with the list of Plotly events that have Python subscribers:
+    # sent from Python to JS, which only listens to those
+    set_subscriptions = Signal(str)
+
+    # Emitted (in Python) when the set of subscribed Plotly events changes
+    subscriptions_changed = Signal()
+
     # Signal to indicate the plot is ready, sent from JS to Python
     plot_ready = Signal(str)
 
+    # Signal with per-event delivered/merged counts, sent from JS to Python
+    # (at most once a second, when events are being coalesced)
+    event_stats = Signal(str)
+
+    # Signal to indicate the page has loaded plotly.js and connected the
+    # channel, sent from JS to Python: updates can be sent from then on
+    page_ready = Signal()
+
+    # Signal to acknowledge that the page has applied an update (plot, patch
+    # or extend), sent from JS to Python with the page-side timings (JSON)
+    render_done = Signal(str)
+
+    # Stage timings of each acknowledged update, see timing.py
+    update_timing = Signal(object)  # timing record (dict)
+
+    # traces of the latest figure switched to WebGL, see webgl.py
+    traces_promoted = Signal(object)  # [{"index", "from", "to", "points"}]
+
+    # an update that couldn't be serialized (e.g. a value JSON can't hold):
+    # it never reached the page, which keeps showing the previous figure
+    update_failed = Signal(object)  # the exception
+
     # Signals for all Plotly events: sent from JS to Python
     plotly_click = Signal(str)
     plotly_legendclick = Signal(str)
@@ -32,150 +275,1096 @@ class PlotlyCallbacks(QObject):
     # catch-all signal: sent from JS to Python with all event data
     all_plotly_events = Signal(str, str)  # event type, data
 
+    # internal: set_figure calls from other threads, and serialized
+    # payloads becoming ready; both are queued to the GUI thread
+    figure_submitted = Signal(int, object, object)  # sequence number, figure dict, cache key
+    payload_ready = Signal()
+
+    # decoded payloads of events with selected point fields: the point
+    # columns are NumPy arrays (see events.decode_event_data)
+    plotly_event_data = Signal(str, object)  # event type, decoded data
+
+    # the current selection as {curve number: ndarray of point indices},
+    # sent by the page as packed Int32Arrays; {} when it is cleared
+    selection_changed = Signal(object)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._subscriptions_dirty = False
+        # {event type: {"fields": [...], "binary": bool}}, see set_event_fields
+        self.event_fields = {}
+        # {curve number: source indices of the points plotted, or the number
+        # of points streamed out of the window}: point numbers in events are
+        # translated back to the caller's arrays (see events.remap_event)
+        self.index_maps = {}
+
+    def subscribed_events(self):
+        """Return the Plotly event types that have at least one Python receiver"""
+        meta = self.metaObject()
+
+        def connected(signature):
+            return self.isSignalConnected(meta.method(meta.indexOfSignal(signature)))
+
+        if connected("all_plotly_events(QString,QString)"):
+            return list(PLOTLY_EVENTS)
+        decoded = connected("plotly_event_data(QString,PyObject)")
+        return [
+            name for name in PLOTLY_EVENTS
+            if connected(f"{name}(QString)") or (decoded and name in self.event_fields)
+        ]
+
+    # signals meant for the plot's users, as opposed to those the widget
+    # itself is connected to (page_ready, render_done, ...)
+    RECEIVER_SIGNALS = frozenset({
+        *PLOTLY_EVENTS,
+        "all_plotly_events",
+        "plotly_event_data",
+        "selection_changed",
+        "update_timing",
+        "traces_promoted",
+        "plot_ready",
+    })
+
+    def disconnect_receivers(self):
+        """Disconnect everything connected to RECEIVER_SIGNALS"""
+        meta = self.metaObject()
+        for index in range(meta.methodCount()):
+            method = meta.method(index)
+            if method.methodType() != QMetaMethod.MethodType.Signal:
+                continue
+            name = method.name().data().decode()
+            if name in self.RECEIVER_SIGNALS and self.isSignalConnected(method):
+                getattr(self, name).disconnect()
+
+    def selection_subscribed(self):
+        """True if selection_changed has a Python receiver"""
+        meta = self.metaObject()
+        return self.isSignalConnected(meta.method(meta.indexOfSignal("selection_changed(PyObject)")))
+
+    def connectNotify(self, signal):
+        self._subscriptions_may_change(signal)
+        super().connectNotify(signal)
+
+    def disconnectNotify(self, signal):
+        self._subscriptions_may_change(signal)
+        super().disconnectNotify(signal)
+
+    def _subscriptions_may_change(self, signal):
+        # an invalid signal means "all connections were removed"
+        name = signal.name().data().decode() if signal.isValid() else None
+        if (
+            name not in (None, "all_plotly_events", "plotly_event_data", "selection_changed")
+            and name not in PLOTLY_EVENTS
+        ):
+            return
+        # recompute once control returns to the event loop: the connection
+        # list isn't final while (dis)connectNotify runs
+        if not self._subscriptions_dirty:
+            self._subscriptions_dirty = True
+            QTimer.singleShot(0, self._emit_subscriptions_changed)
+
+    def _emit_subscriptions_changed(self):
+        self._subscriptions_dirty = False
+        self.subscriptions_changed.emit()
+
     @Slot(str)
     def on_plot_ready(self, message):
         self.plot_ready.emit(message)
 
+    @Slot()
+    def on_page_ready(self):
+        self.page_ready.emit()
+
+    @Slot(str)
+    def on_render_done(self, timing):
+        self.render_done.emit(timing)
+
+    @Slot(str)
+    def on_event_stats(self, stats):
+        self.event_stats.emit(stats)
+
+    @Slot(str)
+    def on_selection(self, data):
+        selection = decode_selection(data)
+        if self.index_maps:
+            selection = remap_selection(selection, self.index_maps)
+        self.selection_changed.emit(selection)
+
     @Slot(str, str)
     def on_plotly_event(self, event_type, data):
         """Generic slot that handles all Plotly events"""
+        if self.index_maps and event_type in POINT_EVENTS:
+            event = json.loads(data)
+            if remap_event(event, self.index_maps):
+                data = json.dumps(event)
         # Get the signal attribute by name
         signal_attr = getattr(self, event_type, None)
         if signal_attr and hasattr(signal_attr, 'emit'):
             signal_attr.emit(data)
         self.all_plotly_events.emit(event_type, data)
+        if event_type in self.event_fields:
+            self.plotly_event_data.emit(event_type, decode_event_data(data))
 
-    @Slot(result=str)
-    def get_plotlyjs(self):
-        """ Plotly.js is too big to be sent as a data url, so provide it via this method """
-        return plotly.offline.get_plotlyjs()
 
+class PlotlyFigureMixin:
+    """Keeps a figure on a page in sync through a PlotlyCallbacks object
 
-class PlotlyQtWidget(QWebEngineView):
-    def __init__(self, parent=None):
-        super().__init__(parent)
+    Holds the figure state (last figure sent, streamed and decimated traces,
+    event configuration) and turns set_figure/extend_traces/... calls into
+    messages for the page.  Used by PlotlyQtWidget, and by each plot of a
+    PlotlyDashboardWidget.  The host provides self.callbacks, calls
+    _on_page_ready/_on_load_started, and may override _plot_width.  A host
+    that knows its plotly.js bundle returns it from _plotly_bundle and
+    implements _use_bundle(bundle), which reloads the page with another one;
+    with the default _plotly_bundle (None) figures are never checked
+    against the bundle and _use_bundle isn't needed.
+    """
 
-        # Set up web channel for communication
-        self.channel = QWebChannel()
-        self.callbacks = PlotlyCallbacks()
-        self.channel.registerObject("callbacks", self.callbacks)
-        self.page().setWebChannel(self.channel)
+    # settings restored by reset()
+    OPTIONS = (
+        "binary_arrays", "incremental_updates", "threaded_serialization", "backpressure", "memory_lean",
+        "webgl_threshold", "http_min_bytes", "bundle_fallback", "decimation_density", "cache_diffed_figures",
+    )
+
+    def _init_figure_state(
+        self, binary_arrays=True, incremental_updates=True, threaded_serialization=True, transport="channel",
+        memory_lean=False,
+    ):
+        # Send numeric arrays as packed binary (typed array specs) rather than
+        # as JSON lists of numbers
+        self.binary_arrays = binary_arrays
+
+        # Send only what changed since the last figure, instead of the
+        # whole figure for every update
+        self.incremental_updates = incremental_updates
+        self._last_figure = None
+
+        # Encode updates in worker threads instead of on the GUI thread.
+        # Outgoing messages wait in _outbox until their payload is ready, so
+        # they still reach the page in the order they were made.
+        self.threaded_serialization = threaded_serialization
+        self._outbox = deque()
+        # set_figure calls are numbered so the latest one wins across threads
+        self._figure_lock = threading.Lock()
+        self._figure_seq = 0
+        self._applied_seq = 0
+
+        # Backpressure: at most one update is in flight (sent but not yet
+        # rendered).  Updates made meanwhile are merged into one frame, sent
+        # as the difference between _sent_figure (what the page will show)
+        # and _last_figure once the page acknowledges the render.
+        self.backpressure = True
+        self._sent_figure = None
+        self._in_flight = 0
+        self._frame_pending = False
+        self.rendered_frames = 0
+        # updates that were merged into a later one instead of being rendered
+        self.skipped_frames = 0
+
+        # Stage timings (ms) of the most recent updates, see timing.py.
+        # _frame_times collects the Python stages of the next message;
+        # records of sent messages wait in _awaiting_ack for the page's part.
+        self.timing_stats = TimingStats()
+        self._frame_times = {}
+        self._awaiting_ack = deque()
+
+        # Optional cache.SerializationCache of whole-figure payloads, which
+        # may be shared by several widgets.  A figure found in it is sent
+        # from the cache when it has to be sent whole (first plot, page
+        # reload, changed trace types); smaller changes are still diffed.
+        # With cache_diffed_figures, figures reached with a diff are also
+        # serialized whole (in a worker thread) and cached: twice the
+        # encoding work, for cache hits on them later.
+        # _figure_key is the cache key of _last_figure (None: not known
+        # yet) and _sent_key that of the figure the page shows.
+        self.serialization_cache = None
+        self.cache_diffed_figures = False
+        self._figure_key = None
+        self._sent_key = None
+
+        # Memory-lean mode: once the page has rendered everything sent, the
+        # large arrays of _last_figure and _sent_figure are replaced by weak
+        # references (figure_diff.ArrayRef), so the widget doesn't keep its
+        # own copy of data that Plotly already holds in the page.  Arrays
+        # the caller still holds (the snapshot's copies refer to the
+        # caller's arrays, checked by content) are diffed as before; freed
+        # or modified ones count as changed, and can't be sent again if the
+        # page reloads.
+        self.memory_lean = memory_lean
+        # usedJSHeapSize of the page at the last render, where available
+        self.js_heap_bytes = None
+
+        # Opt-in: scatter traces with more points than this are drawn as
+        # scattergl (see webgl.py); promoted_traces lists those of the
+        # latest figure.  None leaves trace types alone.
+        self.webgl_threshold = None
+        self.promoted_traces = []
+
+        # With transport="http", messages of at least http_min_bytes are
+        # published on the local HTTP server (see http_server.py) and the page
+        # fetches them; only their URL goes over the web channel
+        if transport not in TRANSPORTS:
+            raise ValueError(f"unknown transport {transport!r}, use one of {TRANSPORTS}")
+        self.transport = transport
+        self.http_min_bytes = 1 << 20
+        self._http_server = get_server() if transport == "http" else None
+        if self._http_server is not None:
+            # payloads the page hasn't fetched go with the widget; the slot
+            # can't use self, which is being destroyed by then
+            self._http_owner = uuid.uuid4().hex
+            self.destroyed.connect(
+                lambda *args, server=self._http_server, owner=self._http_owner: server.discard_owner(owner)
+            )
+
+        # What to do with a figure that needs trace types missing from a
+        # partial plotly.js bundle: "upgrade" reloads the page with the full
+        # plotly.js, "error" raises ValueError
+        self.bundle_fallback = "upgrade"
+
+        # How often each Plotly event type is forwarded (see events.py)
+        self.event_policies = {
+            event_type: normalize_policy(event_type, policy)
+            for event_type, policy in DEFAULT_EVENT_POLICIES.items()
+        }
+        # Latest {event type: {"delivered": n, "merged": m}} from the page
+        self.event_counts = {}
+
+        # Python-side copies of streamed traces: {trace index: {attr: RingBuffer}}
+        self.trace_buffers = {}
+        # {trace index: attrs} whose window in _last_figure is behind its
+        # buffer: copied out of the buffer only when the figure is read
+        # (diff, snapshot, decimation), not on every extend_traces call
+        self._stale_windows = {}
+
+        # Full-resolution data of downsampled traces: {trace index: DecimatedTrace}
+        self.decimated_traces = {}
+        # Points per pixel of plot width sent for decimated traces
+        self.decimation_density = 2
+        # Current x ranges from relayout events: {"xaxis": (start, stop)}
+        self._axis_ranges = {}
+        self._decimation_connected = False
 
         # Flag to track if the plot has been initialized
         self.plot_initialized = False
 
+        # Flag to track if the page can receive updates; until it can, the
+        # figure is held back and sent whole once the page is ready
+        self.page_ready = False
+        self._pending_figure = False
+        # restored by reset(); hosts record the options they set themselves
+        self._default_options = {name: getattr(self, name) for name in self.OPTIONS}
+
+        self.callbacks.page_ready.connect(self._on_page_ready)
+        self.callbacks.event_stats.connect(self._on_event_stats)
+        self.callbacks.subscriptions_changed.connect(self._send_subscriptions)
+        self.callbacks.figure_submitted.connect(self._apply_figure, Qt.ConnectionType.QueuedConnection)
+        self.callbacks.payload_ready.connect(self._flush_outbox, Qt.ConnectionType.QueuedConnection)
+        self.callbacks.render_done.connect(self._on_render_done)
+
+    def reset(self):
+        """Return to the state of a new widget, ready for another user
+
+        Clears the figure, disconnects the callbacks' RECEIVER_SIGNALS (the
+        page stops forwarding events nobody listens to), restores the
+        OPTIONS given to the constructor, the default event policies and
+        fields, serialization_cache and the plotly.js bundle, and zeroes the
+        frame counters and timings.  Connections to the widget's other
+        signals are left alone.
+        """
+        self.clear_figure()
+        self.callbacks.disconnect_receivers()
+        # disconnected along with plotly_relayout
+        self._decimation_connected = False
+        self.event_policies = {
+            event_type: normalize_policy(event_type, policy)
+            for event_type, policy in DEFAULT_EVENT_POLICIES.items()
+        }
+        self.callbacks.event_fields = {}
+        self.event_counts = {}
+        options = dict(self._default_options)
+        bundle = options.pop("plotly_bundle", None)
+        for name, value in options.items():
+            setattr(self, name, value)
+        self.promoted_traces = []
+        self.serialization_cache = None
+        self.rendered_frames = 0
+        self.skipped_frames = 0
+        self.timing_stats.clear()
+        self.js_heap_bytes = None
+        if bundle is not None and self._plotly_bundle() is not bundle:
+            # upgraded for a figure of the previous user; the page reloads
+            # and sends the policies once it is ready
+            self._on_load_started()
+            self._use_bundle(bundle)
+        elif self.page_ready:
+            self.callbacks.set_event_policies.emit(json.dumps(self.event_policies))
+            self.callbacks.set_event_fields.emit(json.dumps(self.callbacks.event_fields))
+            self._send_subscriptions()
+
+    def _plot_width(self):
+        """Width of the plot in pixels, used to size decimated traces"""
+        return 800
+
+    def _plotly_bundle(self):
+        """The plotly_js.PlotlyBundle loaded in the page (None: unknown)"""
+        return None
+
+    def _check_bundle(self, fig_dict):
+        bundle = self._plotly_bundle()
+        missing = bundle.missing_trace_types(fig_dict) if bundle is not None else None
+        if not missing:
+            return
+        if self.bundle_fallback != "upgrade":
+            raise ValueError(
+                f"the plotly.js bundle {bundle.name!r} can't draw trace type(s) "
+                f"{', '.join(missing)}: use a bundle that includes them, or "
+                f"bundle_fallback=\"upgrade\" to switch to the full plotly.js"
+            )
+        # the page starts over; the figure is sent once it is ready again
+        self._on_load_started()
+        self._use_bundle(full_bundle())
 
-    def initialize_plot(self, fig):
+    def _promote_traces(self, fig_dict):
+        if self.webgl_threshold is None:
+            self.promoted_traces = []
+            return fig_dict
+        fig_dict, self.promoted_traces = promote_traces(fig_dict, self.webgl_threshold)
+        if self.promoted_traces:
+            self.callbacks.traces_promoted.emit(self.promoted_traces)
+        return fig_dict
+
+    def initialize_plot(self, fig, cache_key=None):
         """Initialize the plot for the first time"""
-        # Convert plotly figure to JSON
-        plot_json = json.dumps(fig.to_plotly_json())
-
-        # Create HTML content with the plot and embedded Plotly.js
-        html_content = f'''
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <meta charset="utf-8" />
-            <script src="qrc:///qtwebchannel/qwebchannel.js"></script>
-            <style>
-                body, html {{ margin: 0; padding: 0; height: 100%; }}
-                #plot {{ width: 100%; height: 100%; }}
-            </style>
-
-        </head>
-        <body>
-            <div id="plot"></div>
-            <script>
-                // Initialize Qt web channel
-                let callbacks;
-                const plotData = {plot_json};
-                const plotDiv = document.getElementById('plot');
-
-                document.addEventListener("DOMContentLoaded", function() {{
-                    new QWebChannel(qt.webChannelTransport, async function(channel) {{
-                        callbacks = channel.objects.callbacks;
-
-                        // Load Plotly.js dynamically
-                        const plotlyScript = document.createElement('script');
-                        plotlyScript.type = 'text/javascript';
-                        plotlyScript.text = await callbacks.get_plotlyjs();
-                        document.head.appendChild(plotlyScript);
-
-                        function set_handlers(el) {{
-                            // forward events
-                            for (const name of [
-                                // source: https://plotly.com/javascript/plotlyjs-events/
-                                "plotly_click",
-                                "plotly_legendclick",
-                                "plotly_selecting",
-                                "plotly_selected",
-                                "plotly_hover",
-                                "plotly_unhover",
-                                "plotly_legenddoubleclick",
-                                "plotly_restyle",
-                                "plotly_relayout",
-                                "plotly_webglcontextlost",
-                                "plotly_afterplot",
-                                "plotly_autosize",
-                                "plotly_deselect",
-                                "plotly_doubleclick",
-                                "plotly_redraw",
-                                "plotly_animated",
-                            ]) {{
-                                el.on(name, (event) => {{
-                                    // remove elements of event and points that are not serializable
-                                    const args = {{
-                                        ...event,
-                                        points: event?.points?.map((p) => ({{
-                                        ...p,
-                                        fullData: undefined,
-                                        xaxis: undefined,
-                                        yaxis: undefined,
-                                        }})),
-                                        xaxes: undefined,
-                                        yaxes: undefined,
-                                    }};
-                                    if (callbacks) callbacks.on_plotly_event?.(name, JSON.stringify(args));
-                                }});
-                            }}
-                        }};
-
-                        // Create the plot
-                        Plotly.react('plot', plotData.data, plotData.layout)
-                            .then(function() {{
-                                callbacks.on_plot_ready("Plot initialized");
-
-                                set_handlers(plotDiv);
-
-                                // Listen for plot updates
-                                callbacks.update_plot.connect(function(plotDataJson) {{
-                                    const newPlotData = JSON.parse(plotDataJson);
-                                    Plotly.react(plotDiv, newPlotData.data, newPlotData.layout, {{ responsive: true }});
-                                }});
-                            }});
-                    }});
-                }});
-            </script>
-        </body>
-        </html>
-        '''
-
-        self.setHtml(html_content)
-        self.html_content = html_content
+        start = time.perf_counter()
+        fig_dict = self._promote_traces(figure_to_dict(fig))
+        self._check_bundle(fig_dict)
+        self.trace_buffers = {}
+        self._stale_windows = {}
+        self.decimated_traces = {}
+        self._axis_ranges = {}
+        self._adopt_lazy_sources(fig_dict)
+        self._last_figure = snapshot_figure(self._apply_decimation(fig_dict))
+        self._figure_key = None if self.decimated_traces else cache_key
+        self._update_index_maps()
+        self._add_frame_time("figure", start)
         self.plot_initialized = True
+        self._send_figure()
+
+    def set_figure(self, fig, cache_key=None):
+        """Set or update the figure
+
+        cache_key: identifies the figure in serialization_cache, if one is
+            set (any hashable; the same key must always mean the same
+            figure).  Without it the figure is looked up by content hash.
+
+        Traces whose x or y is a lazy array source (np.memmap, h5py
+        dataset, ..., see array_sources.py) are plotted decimated, read in
+        chunks.  Only plain figure dicts keep them lazy: go.Figure copies
+        them into memory when the trace is created.
+
+        Thread-safe: may be called from any thread.  From other threads the
+        figure is copied before set_figure returns (so the caller is free to
+        modify it afterwards) and applied on the GUI thread; when several
+        threads update the same plot, the most recent call wins.  With
+        threaded_serialization the JSON encoding runs in worker threads and
+        only the finished payload is sent from the GUI thread.
+        """
+        with self._figure_lock:
+            self._figure_seq += 1
+            seq = self._figure_seq
+        if QThread.currentThread() == self.callbacks.thread():
+            self._apply_figure(seq, fig, cache_key)
+        else:
+            self.callbacks.figure_submitted.emit(seq, snapshot_figure(figure_to_dict(fig)), cache_key)
 
-    def set_figure(self, fig):
-        """Set or update the figure"""
+    def _apply_figure(self, seq, fig, cache_key=None):
+        if seq < self._applied_seq:
+            # a later set_figure call got here first
+            return
+        self._applied_seq = seq
         if not self.plot_initialized:
-            self.initialize_plot(fig)
+            self.initialize_plot(fig, cache_key)
         else:
-            self.update_figure(fig)
+            self.update_figure(fig, cache_key)
 
-    def update_figure(self, fig):
+    def update_figure(self, fig, cache_key=None):
         """Update an existing plot with new data"""
-        # Convert plotly figure to JSON
-        plot_json = json.dumps(fig.to_plotly_json())
+        start = time.perf_counter()
+        fig_dict = self._promote_traces(figure_to_dict(fig))
+        self._check_bundle(fig_dict)
+        self._adopt_lazy_sources(fig_dict)
+        # _sent_figure has to be up to date for the diff
+        self._materialize_windows()
+        self._last_figure = snapshot_figure(self._apply_decimation(fig_dict), self._last_figure)
+        # decimated traces show the current zoom, which the caller's key
+        # doesn't know about
+        self._figure_key = None if self.decimated_traces else cache_key
+        self._add_frame_time("figure", start)
+        # a new figure replaces whatever was streamed into the old one
+        self.trace_buffers = {}
+        self._stale_windows = {}
+        self._update_index_maps()
+        self._schedule_render()
+
+    def _can_send(self):
+        # True if an update can go to the page now rather than be merged
+        # into the next frame
+        return (
+            self.page_ready
+            and not self._frame_pending
+            and not (self.backpressure and self._in_flight)
+        )
+
+    def _schedule_render(self):
+        if not self.page_ready:
+            self._pending_figure = True
+        elif self._can_send():
+            self._render()
+        else:
+            if self._frame_pending:
+                self.skipped_frames += 1
+            self._frame_pending = True
+
+    def _cache_key(self):
+        # key of _last_figure in serialization_cache, None without a cache
+        if self.serialization_cache is None:
+            return None
+        if self._figure_key is None:
+            self._materialize_windows()
+            start = time.perf_counter()
+            self._figure_key = ("content", content_key(self._last_figure))
+            self._add_frame_time("cache", start)
+        # the same figure is a different payload with and without typed
+        # arrays, or with other traces promoted to WebGL
+        return (self._figure_key, self.binary_arrays, self.webgl_threshold)
+
+    def _render(self):
+        self._frame_pending = False
+        self._materialize_windows()
+        calls = None
+        key = self._cache_key()
+        if key is not None and self._sent_figure is not None and key == self._sent_key:
+            # the page already shows this figure
+            return
+        # a diff is smaller than any cached whole figure: the cache is for
+        # when the figure has to be sent whole (see _send_figure)
+        if self.incremental_updates and self._sent_figure is not None:
+            start = time.perf_counter()
+            calls = diff_figures(self._sent_figure, self._last_figure)
+            self._add_frame_time("diff", start)
+        if calls is None:
+            # Convert plotly figure to JSON and send the whole figure
+            self._send_figure()
+        elif calls:
+            # Send only the changed attributes
+            self._post(self.callbacks.patch_plot, calls, "patch")
+            self._sent_figure = self._copy_figure(self._last_figure)
+            self._sent_key = key
+            if key is not None and self.cache_diffed_figures:
+                # _sent_figure's trace list changes with extend_traces
+                self._cache_figure(key, self._copy_figure(self._sent_figure))
+
+    def _on_render_done(self, page_timing):
+        self._in_flight = max(self._in_flight - 1, 0)
+        self.rendered_frames += 1
+        if self._awaiting_ack:
+            record = self._record_timing(self._awaiting_ack.popleft(), page_timing)
+            if record.get("error") and record["kind"] in ("patch", "extend"):
+                # the page is out of step with _sent_figure: send it whole
+                self._sent_figure = None
+                self._sent_key = None
+                self._frame_pending = True
+        if self._frame_pending and self._in_flight == 0:
+            self._render()
+        if (
+            self.memory_lean
+            and self._in_flight == 0
+            and not self._frame_pending
+            and self._sent_figure is not None
+        ):
+            # the page shows _last_figure: let go of the data
+            self._last_figure = release_arrays(self._last_figure)
+            self._sent_figure = self._copy_figure(self._last_figure)
+
+    def _add_frame_time(self, stage, start):
+        # Python stages add up until the next message is posted: with
+        # backpressure, several set_figure calls may go out as one update
+        elapsed = (time.perf_counter() - start) * 1e3
+        self._frame_times[stage] = self._frame_times.get(stage, 0.0) + elapsed
+
+    def _record_timing(self, record, page_timing):
+        now = time.perf_counter()
+        page = json.loads(page_timing) if page_timing else {}
+        received = page.pop("received", None)
+        if received is not None:
+            record["channel"] = received - record["sent"] * 1e3
+        record["total"] = (now - record.pop("posted")) * 1e3
+        del record["sent"]
+        payload_id = record.pop("payload_id", None)
+        if payload_id is not None:
+            # the page has fetched it
+            self._http_server.discard(payload_id)
+        heap = page.pop("heap", None)
+        if heap is not None:
+            self.js_heap_bytes = heap
+        record.update(page)
+        self.timing_stats.add(record)
+        self.callbacks.update_timing.emit(record)
+        return record
+
+    def memory_report(self):
+        """Bytes held for this plot on the Python side, and the page's JS heap
+
+        python: {"figure", "streaming", "decimation", "outbox", "http"} bytes
+        of arrays and payloads kept alive by the widget (arrays are counted
+        once, even if the caller holds them too).  js_heap_bytes is the
+        page's used JS heap at the last render (None where Chromium doesn't
+        report it); plots of a dashboard share one page.
+        """
+        arrays = {}
+
+        def collect(obj):
+            if isinstance(obj, dict):
+                for value in obj.values():
+                    collect(value)
+            elif isinstance(obj, (list, tuple)):
+                for value in obj:
+                    collect(value)
+            elif isinstance(obj, np.ndarray):
+                arrays[id(obj)] = obj.nbytes
+
+        for fig in (self._last_figure, self._sent_figure):
+            if fig is not None:
+                collect(fig)
+        python = {
+            "figure": sum(arrays.values()),
+            "streaming": sum(
+                buffer.nbytes for buffers in self.trace_buffers.values() for buffer in buffers.values()
+            ),
+            "decimation": sum(
+                source.nbytes for source in self.decimated_traces.values()
+            ),
+            "outbox": sum(
+                len(payload[0]) for _, payload, _, _ in self._outbox
+                if not isinstance(payload, Future)
+            ),
+            "http": sum(
+                len(self._http_server.get(record["payload_id"]) or b"")
+                for record in self._awaiting_ack if "payload_id" in record
+            ),
+        }
+        return {
+            "python_bytes": sum(python.values()),
+            "python": python,
+            "js_heap_bytes": self.js_heap_bytes,
+            "memory_lean": self.memory_lean,
+        }
+
+    def timing_summary(self):
+        """Rolling p50/p95/max (ms) of each update stage, see timing.py"""
+        return self.timing_stats.summary()
+
+    def frame_stats(self):
+        """Rendered and skipped (merged) update counts, and updates in flight"""
+        return {
+            "rendered": self.rendered_frames,
+            "skipped": self.skipped_frames,
+            "in_flight": self._in_flight,
+            "pending": self._frame_pending,
+        }
+
+    @staticmethod
+    def _copy_figure(fig_dict):
+        # the trace list is modified in place (streaming, decimation); the
+        # traces and everything else are replaced, so this copy stays valid
+        return {**fig_dict, "data": list(fig_dict["data"])}
+
+    def clear_figure(self):
+        """Remove the figure, leaving the page loaded and ready for the next one"""
+        self.plot_initialized = False
+        self._last_figure = None
+        self._figure_key = None
+        self.trace_buffers = {}
+        self._stale_windows = {}
+        self.decimated_traces = {}
+        self._axis_ranges = {}
+        self.callbacks.index_maps = {}
+        self._pending_figure = False
+        self._frame_pending = False
+        self._sent_figure = None
+        # updates still being serialized are for the old figure
+        self._in_flight -= len(self._outbox)
+        self._outbox.clear()
+        self._frame_times = {}
+        if self.page_ready:
+            self._in_flight += 1
+            self._awaiting_ack.append({"kind": "clear", "posted": time.perf_counter(), "sent": time.time()})
+            self.callbacks.update_plot.emit(serialize(EMPTY_FIGURE))
+
+    def _send_figure(self):
+        if not self.page_ready:
+            self._pending_figure = True
+            return
+        self._pending_figure = False
+        self._frame_pending = False
+        self._materialize_windows()
+        key = self._cache_key()
+        # the trace list may change while this is serialized: send a copy
+        self._sent_figure = self._copy_figure(self._last_figure)
+        self._sent_key = key
+        self._post(self.callbacks.update_plot, self._copy_figure(self._last_figure), "figure", key)
+
+    def _post(self, signal, obj, kind, cache_key=None):
+        """Emit obj, serialized, on signal after all messages posted before it
+
+        With a cache_key the payload is taken from serialization_cache, or
+        added to it once serialized.
+        """
+        record = {"kind": kind, **self._frame_times, "posted": time.perf_counter()}
+        self._frame_times = {}
+        if self.memory_lean:
+            obj, released = resolve_arrays(obj)
+            if released:
+                warnings.warn(
+                    f"memory_lean: {released} array(s) of the figure were released and are "
+                    f"sent as null; call set_figure again to restore them",
+                    stacklevel=3,
+                )
+        cached = self.serialization_cache.get(cache_key) if cache_key is not None else None
+        if cached is not None:
+            record["cached"] = True
+            payload = (cached, 0.0)
+            cache_key = None
+        elif self.threaded_serialization:
+            payload = serialization_executor().submit(timed, serialize, obj, self.binary_arrays)
+            payload.add_done_callback(self._payload_done)
+        else:
+            try:
+                payload = timed(serialize, obj, self.binary_arrays)
+            except Exception as error:
+                self._update_failed(error)
+                raise
+        self._outbox.append((signal, payload, record, cache_key))
+        self._in_flight += 1
+        self._flush_outbox()
+
+    def _update_failed(self, error):
+        # the page didn't get the update, and may be behind _sent_figure:
+        # the next one is sent whole
+        self._sent_figure = None
+        self._sent_key = None
+        self.callbacks.update_failed.emit(error)
+
+    def _cache_figure(self, key, fig):
+        # put the payload of a whole figure in serialization_cache, in a
+        # worker thread with threaded_serialization
+        cache = self.serialization_cache
+        if key in cache:
+            return
+        if self.memory_lean:
+            fig, released = resolve_arrays(fig)
+            if released:
+                return
+        if self.threaded_serialization:
+            serialization_executor().submit(lambda: cache.put(key, serialize(fig, self.binary_arrays)))
+        else:
+            cache.put(key, serialize(fig, self.binary_arrays))
+
+    def _payload_done(self, future):
+        # runs in the worker thread: wake up the GUI thread
+        try:
+            self.callbacks.payload_ready.emit()
+        except RuntimeError:
+            # the widget was deleted in the meantime
+            pass
+
+    def _flush_outbox(self):
+        failed = False
+        while self._outbox:
+            signal, payload, record, cache_key = self._outbox[0]
+            if isinstance(payload, Future):
+                if not payload.done():
+                    return
+                self._outbox.popleft()
+                error = payload.exception()
+                if error is not None:
+                    self._in_flight = max(self._in_flight - 1, 0)
+                    self._update_failed(error)
+                    failed = True
+                    continue
+                payload = payload.result()
+            else:
+                self._outbox.popleft()
+            payload, record["serialize"] = payload
+            record["bytes"] = len(payload)
+            if cache_key is not None and self.serialization_cache is not None:
+                self.serialization_cache.put(cache_key, payload)
+            if self._http_server is not None and len(payload) >= self.http_min_bytes:
+                record["payload_id"] = self._http_server.publish(payload, owner=self._http_owner)
+                payload = json.dumps({"payload_url": self._http_server.payload_url(record["payload_id"])})
+            record["outbox"] = (time.perf_counter() - record["posted"]) * 1e3
+            record["sent"] = time.time()
+            self._awaiting_ack.append(record)
+            signal.emit(payload)
+        if failed and self._frame_pending and self._in_flight == 0:
+            # updates merged while waiting for the failed one
+            self._render()
+
+    def set_event_policy(self, event_type, policy):
+        """Set how often a Plotly event is forwarded to Python
+
+        policy is "immediate", events.LATEST_PER_FRAME, events.throttle(ms)
+        or events.debounce(ms).  Discrete events (clicks, selections) can only
+        be immediate.
+        """
+        self.event_policies[event_type] = normalize_policy(event_type, policy)
+        if self.page_ready:
+            self.callbacks.set_event_policies.emit(json.dumps(self.event_policies))
+
+    def set_event_fields(self, event_type, fields, binary=True):
+        """Send only the given point fields for an event, as columns
+
+        e.g. set_event_fields("plotly_selected", ["curveNumber", "pointIndex"])
+        makes the page send {"columns": {"curveNumber": [...], "pointIndex": [...]},
+        "n_points": n} instead of a list of point dicts; with binary=True
+        numeric columns are packed as typed arrays.  Connect to
+        callbacks.plotly_event_data to receive them as NumPy arrays, or use
+        events.decode_event_data on the string signals.  fields=None restores
+        the full point dicts.
+        """
+        spec = normalize_fields(event_type, fields, binary)
+        if spec is None:
+            self.callbacks.event_fields.pop(event_type, None)
+        else:
+            self.callbacks.event_fields[event_type] = spec
+        if self.page_ready:
+            self.callbacks.set_event_fields.emit(json.dumps(self.callbacks.event_fields))
+        self._send_subscriptions()
+
+    def _send_subscriptions(self):
+        if self.page_ready:
+            self.callbacks.set_subscriptions.emit(json.dumps({
+                "events": self.callbacks.subscribed_events(),
+                "selection": self.callbacks.selection_subscribed(),
+            }))
+
+    def _on_event_stats(self, stats):
+        self.event_counts = json.loads(stats)
+
+    def _on_page_ready(self):
+        self.page_ready = True
+        self.callbacks.set_event_policies.emit(json.dumps(self.event_policies))
+        self.callbacks.set_event_fields.emit(json.dumps(self.callbacks.event_fields))
+        self._send_subscriptions()
+        if self._pending_figure:
+            self._send_figure()
+
+    def _on_load_started(self):
+        # a (re)loaded page starts out empty: resend the figure once it's ready
+        self.page_ready = False
+        self._pending_figure = self.plot_initialized
+        self._outbox.clear()
+        self._in_flight = 0
+        self._frame_pending = False
+        self._sent_figure = None
+        for record in self._awaiting_ack:
+            if "payload_id" in record:
+                self._http_server.discard(record["payload_id"])
+        self._awaiting_ack.clear()
+        self._frame_times = {}
+
+    def decimate_trace(self, trace_index, y, x=None, method="minmax", max_points=None):
+        """Plot a downsampled view of full-resolution data on an existing trace
+
+        The arrays are kept in Python and only about max_points of them are
+        sent (by default decimation_density points per pixel of widget width).
+        Whenever the x axis range changes (zoom, pan, autorange) the visible
+        window is downsampled again and pushed to the page with a restyle.
+        x must be sorted; method is "minmax" or "lttb".  Later set_figure
+        calls keep the trace decimated as long as it exists with the same x
+        and y as now; a figure with other data for it plots that data
+        instead (call decimate_trace again to decimate it).
+
+        x and y may also be lazy array sources, such as np.memmap or h5py
+        datasets, larger than memory (see array_sources.py): they are read
+        in chunks, and only over the visible window.
+        """
+        if not self.plot_initialized:
+            raise RuntimeError("decimate_trace requires a figure: call set_figure first")
+        self._materialize_windows()
+        trace = self._last_figure["data"][trace_index]
+        self._add_decimated_trace(trace_index, trace, y, x, method, max_points)
+        self._push_decimated([trace_index])
+
+    def _add_decimated_trace(self, trace_index, trace, y, x=None, method="minmax", max_points=None):
+        source = DecimatedTrace(y, x=x, method=method, xaxis=trace.get("xaxis", "x"), max_points=max_points)
+        previous = self.decimated_traces.get(trace_index)
+        if previous is not None:
+            # trace holds the points of the previous decimation
+            source.replaces = previous.replaces
+        else:
+            source.replaces = (trace.get("x"), trace.get("y"))
+        self.decimated_traces[trace_index] = source
+        if not self._decimation_connected:
+            # subscribing also makes the page forward relayout events
+            self.callbacks.plotly_relayout.connect(self._on_relayout_decimate)
+            self._decimation_connected = True
+
+    def _adopt_lazy_sources(self, fig_dict):
+        # traces whose x or y is a lazy array source (np.memmap, h5py
+        # dataset, ...) can't be sent whole: decimate them instead
+        for index, trace in enumerate(fig_dict.get("data", ())):
+            x, y = trace.get("x"), trace.get("y")
+            if y is None or not (is_lazy(y) or is_lazy(x)):
+                continue
+            source = self.decimated_traces.get(index)
+            if source is not None and source.replaces[0] is x and source.replaces[1] is y:
+                continue
+            self._add_decimated_trace(index, trace, y, x)
+            self.decimated_traces[index].replaces = (x, y)
+
+    def _decimated_points(self, trace_index, layout=None):
+        source = self.decimated_traces[trace_index]
+        n_out = source.max_points or max(self._plot_width(), 200) * self.decimation_density
+        if source.axis in self._axis_ranges:
+            x_range = self._axis_ranges[source.axis]
+        else:
+            # not zoomed yet: use the range set in the figure, if any
+            if layout is None:
+                layout = self._last_figure["layout"]
+            x_range = layout.get(source.axis, {}).get("range")
+        indices = source.select(x_range, n_out)
+        x, y = source.points(indices)
+        x.flags.writeable = False
+        y.flags.writeable = False
+        return x, y
+
+    def _apply_decimation(self, fig_dict):
+        # replace decimated traces' data in a new figure with the current view
+        traces = fig_dict.get("data", ())
+        for index, source in list(self.decimated_traces.items()):
+            if index >= len(traces) or not self._same_trace_data(source, traces[index]):
+                # gone, or the caller sent new data for it
+                del self.decimated_traces[index]
+        if not self.decimated_traces:
+            return fig_dict
+        data = list(fig_dict["data"])
+        layout = fig_dict.get("layout") or {}
+        for index in self.decimated_traces:
+            x, y = self._decimated_points(index, layout)
+            data[index] = {**data[index], "x": x, "y": y}
+        return {**fig_dict, "data": data}
+
+    @staticmethod
+    def _same_trace_data(source, trace):
+        for old, new in zip(source.replaces, (trace.get("x"), trace.get("y"))):
+            if old is new:
+                continue
+            # lazy sources are only compared by identity: reading them is slow
+            if is_lazy(old) or is_lazy(new) or not values_equal(old, new):
+                return False
+        return True
+
+    def _push_decimated(self, trace_indices):
+        xs, ys = [], []
+        self._materialize_windows()
+        data = self._last_figure["data"]
+        self._figure_key = None
+        for index in trace_indices:
+            x, y = self._decimated_points(index)
+            # traces are replaced, not modified: they may be serializing
+            data[index] = {**data[index], "x": x, "y": y}
+            xs.append(x)
+            ys.append(y)
+        self._update_index_maps()
+        if self._can_send():
+            calls = [{"method": "restyle", "args": [{"x": xs, "y": ys}, list(trace_indices)]}]
+            self._post(self.callbacks.patch_plot, calls, "patch")
+            for index in trace_indices:
+                self._sent_figure["data"][index] = data[index]
+            self._sent_key = None
+        else:
+            self._schedule_render()
+
+    def _on_relayout_decimate(self, data):
+        ranges = parse_axis_ranges(json.loads(data))
+        if not ranges:
+            return
+        self._axis_ranges.update(ranges)
+        affected = [
+            index for index, source in self.decimated_traces.items()
+            if source.axis in ranges
+        ]
+        if affected:
+            self._push_decimated(affected)
+
+    def extend_traces(self, trace_indices, update, max_points=None):
+        """Append points to existing traces, keeping at most max_points each
+
+        Mirrors Plotly.extendTraces: update maps attribute names to one
+        sequence of new values per trace in trace_indices, e.g.
+        extend_traces([0, 1], {"x": [x0, x1], "y": [y0, y1]}, max_points=1000).
+        A single int index with flat sequences is also accepted.  Only the new
+        samples are sent to the page; the retained points are available as
+        NumPy arrays from trace_buffers and get_trace_data().
+        """
+        if not self.plot_initialized:
+            raise RuntimeError("extend_traces requires a figure: call set_figure first")
+        if isinstance(trace_indices, int):
+            trace_indices = [trace_indices]
+            update = {key: [values] for key, values in update.items()}
+        trace_indices = list(trace_indices)
+
+        # copied, as they may be serialized after the caller reuses its arrays
+        new_values = {key: [np.array(v) for v in values] for key, values in update.items()}
+        for key, values in new_values.items():
+            if len(values) != len(trace_indices):
+                raise ValueError(f"update[{key!r}] needs one sequence per trace index")
+        can_send = self._can_send()
+        if not can_send:
+            # the next frame restyles the whole window, against the points
+            # the page has now
+            self._materialize_windows()
+        for key, values in new_values.items():
+            for index, samples in zip(trace_indices, values):
+                self._trace_buffer(index, key, max_points).extend(samples)
+
+        # the windows in the diff snapshot are brought in step with the page
+        # lazily, see _materialize_windows
+        traces = self._last_figure["data"]
+        self._figure_key = None
+        for index in trace_indices:
+            traces[index] = dict(traces[index])
+            self._stale_windows.setdefault(index, set()).update(new_values)
+        self._update_index_maps()
+
+        if can_send:
+            self._post(self.callbacks.extend_plot, {
+                "update": new_values,
+                "indices": trace_indices,
+                "max_points": max_points,
+            }, "extend")
+            for index in trace_indices:
+                self._sent_figure["data"][index] = traces[index]
+            self._sent_key = None
+        else:
+            # merged into the next frame, as a restyle of the whole window
+            self._schedule_render()
+
+    def _materialize_windows(self):
+        # copy the streamed windows out of the ring buffers into _last_figure,
+        # and into _sent_figure where the page got them with extend_plot
+        if not self._stale_windows:
+            return
+        traces = self._last_figure["data"]
+        sent = self._sent_figure["data"] if self._sent_figure is not None else None
+        for index, keys in self._stale_windows.items():
+            trace = dict(traces[index])
+            for key in keys:
+                data = self.trace_buffers[index][key].to_array()
+                data.flags.writeable = False
+                trace[key] = data
+            if sent is not None and sent[index] is traces[index]:
+                sent[index] = trace
+            traces[index] = trace
+        self._stale_windows = {}
+
+    def _update_index_maps(self):
+        # how the points of reduced traces relate to the caller's arrays
+        index_maps = {}
+        for index, buffers in self.trace_buffers.items():
+            dropped = max((buffer.dropped for buffer in buffers.values()), default=0)
+            if dropped:
+                index_maps[index] = dropped
+        for index, source in self.decimated_traces.items():
+            if source.indices is not None:
+                index_maps[index] = source.indices
+        self.callbacks.index_maps = index_maps
+
+    def get_trace_data(self, trace_index, key):
+        """Return the points currently plotted for a streamed trace attribute"""
+        return self.trace_buffers[trace_index][key].to_array()
+
+    def _trace_buffer(self, trace_index, key, max_points):
+        buffers = self.trace_buffers.setdefault(trace_index, {})
+        buffer = buffers.get(key)
+        if buffer is None or buffer.capacity != max_points:
+            # seed from the points already plotted for this trace
+            current = self._last_figure["data"][trace_index].get(key)
+            if isinstance(current, ArrayRef):
+                # memory_lean: the points may only be left in the page
+                current = current.get()
+            current = np.asarray(current) if current is not None else np.empty(0)
+            if buffer is not None:
+                current = buffer.to_array()
+            dropped = buffer.dropped if buffer is not None else 0
+            buffer = RingBuffer(max_points, dtype=current.dtype)
+            buffer.extend(current)
+            buffer.dropped += dropped
+            buffers[key] = buffer
+        return buffer
+
+
+class PlotlyQtWidget(PlotlyFigureMixin, QWebEngineView):
+    def __init__(
+        self, parent=None, binary_arrays=True, incremental_updates=True, threaded_serialization=True,
+        transport="channel", plotly_bundle=None, bundle_fallback="upgrade", memory_lean=False,
+        webgl_threshold=None,
+    ):
+        """
+        plotly_bundle: plotly.js build to load, a plotly_js.PlotlyBundle or
+            the name of a partial bundle ("basic", "cartesian", "gl2d", ...,
+            see plotly_js.partial_bundle); None for the full plotly.js
+        bundle_fallback: "upgrade" or "error", for figures with trace types
+            the bundle doesn't have
+        memory_lean: release the widget's references to large arrays once
+            they are rendered (see _init_figure_state)
+        webgl_threshold: draw scatter traces with more points than this as
+            scattergl (None: never)
+        """
+        super().__init__(parent)
+
+        # Set up web channel for communication
+        self.channel = QWebChannel()
+        self.callbacks = PlotlyCallbacks()
+        self.channel.registerObject("callbacks", self.callbacks)
+        self.page().setWebChannel(self.channel)
+
+        if isinstance(plotly_bundle, str):
+            plotly_bundle = partial_bundle(plotly_bundle)
+        self.plotly_bundle = plotly_bundle or full_bundle()
+
+        self._init_figure_state(
+            binary_arrays, incremental_updates, threaded_serialization, transport, memory_lean,
+        )
+        self.bundle_fallback = bundle_fallback
+        self.webgl_threshold = webgl_threshold
+        self._default_options.update(
+            bundle_fallback=bundle_fallback, webgl_threshold=webgl_threshold, plotly_bundle=self.plotly_bundle,
+        )
+        self.loadStarted.connect(self._on_load_started)
+
+        # Start loading the page (and plotly.js) right away
+        self._load_page()
+
+    def _load_page(self):
+        if self._http_server is not None:
+            # the page is loaded with setHtml: let it fetch from the server
+            self.settings().setAttribute(QWebEngineSettings.WebAttribute.LocalContentCanAccessRemoteUrls, True)
+            script_url = self._http_server.add_bundle(self.plotly_bundle)
+        else:
+            # plotly.js is served to the page from the plotly-local: scheme
+            install_scheme_handler(self.page().profile(), self.plotly_bundle)
+            script_url = bundle_url(self.plotly_bundle)
+        self.html_content = PAGE_HTML if script_url == PLOTLY_JS_URL else page_html(script_url)
+        self.setHtml(self.html_content)
+
+    def _plotly_bundle(self):
+        return self.plotly_bundle
 
-        # Send the update signal with the new plot data
-        self.callbacks.update_plot.emit(plot_json)
+    def _use_bundle(self, bundle):
+        self.plotly_bundle = bundle
+        self._load_page()
 
+    def _plot_width(self):
+        return self.width()
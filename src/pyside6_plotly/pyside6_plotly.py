@@ -5,9 +5,11 @@ from PySide6.QtCore import QUrl, QObject, Signal, Slot
 from PySide6.QtWidgets import QApplication, QMainWindow, QVBoxLayout, QWidget, QLabel
 from PySide6.QtWebEngineWidgets import QWebEngineView
 from PySide6.QtWebChannel import QWebChannel
-from PySide6.QtWebEngineCore import QWebEngineScript
-import plotly.graph_objects as go
-import plotly.offline
+
+from pyside6_plotly.encoding import serialize_figure
+from pyside6_plotly.url_scheme import PLOTLY_JS_URL, install_scheme_handler, register_scheme
+
+register_scheme()
 
 class PlotlyCallbacks(QObject):
     # Define signals for different Plotly events
@@ -53,8 +55,9 @@ class PlotlyQtWidget(QWidget):
         self.callbacks.point_hovered.connect(self.handle_hover)
         self.callbacks.selection_changed.connect(self.handle_selection)
         
-        # Get Plotly.js content from the Python library
-        self.plotly_js = plotly.offline.get_plotlyjs()
+        # plotly.js is streamed to the page from the plotly-local: scheme
+        # rather than read into Python and inlined in every page
+        install_scheme_handler(self.web_view.page().profile())
 
         
     def handle_click(self, data):
@@ -83,19 +86,14 @@ class PlotlyQtWidget(QWidget):
         
     def set_figure(self, fig):
         # Convert plotly figure to JSON
-        plot_json = json.dumps({
-            'data': fig.data,
-            'layout': fig.layout
-        }, cls=go.Figure.get_plotly_json_encoder())
+        plot_json = serialize_figure(fig, binary=False)
         
         # Create HTML content with the plot
         html_content = f'''
         <!DOCTYPE html>
         <html>
         <head>
-            <script>
-                {self.plotly_js}
-            </script>
+            <script src="{PLOTLY_JS_URL}"></script>
             <script src="qrc:///qtwebchannel/qwebchannel.js"></script>
             <style>
                 body, html {{ margin: 0; padding: 0; height: 100%; }}
@@ -107,14 +105,16 @@ class PlotlyQtWidget(QWidget):
             <script>
                 // Initialize Qt web channel
                 var callbacks;
-                var plotData = {plot_json};
+                let plotData = {plot_json};
                 
                 document.addEventListener("DOMContentLoaded", function() {{
                     new QWebChannel(qt.webChannelTransport, function(channel) {{
                         callbacks = channel.objects.callbacks;
                         
-                        // Create the plot
+                        // Create the plot; Plotly keeps what it needs, so
+                        // don't hold on to a second copy of the data
                         Plotly.newPlot('plot', plotData.data, plotData.layout);
+                        plotData = null;
                         
                         // Set up event listeners
                         document.getElementById('plot').on('plotly_click', function(data) {{
@@ -140,6 +140,8 @@ class PlotlyQtWidget(QWidget):
 
 # Example usage
 if __name__ == '__main__':
+    import plotly.graph_objects as go
+
     app = QApplication(sys.argv)
     
     window = QMainWindow()
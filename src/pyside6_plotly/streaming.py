@@ -0,0 +1,81 @@
+"""Ring buffers mirroring the points of streamed (extendTraces) traces.
+
+PlotlyQtWidget.extend_traces sends only the new samples to the page, where
+Plotly.extendTraces keeps a rolling window of max_points.  The buffers here
+hold the same window on the Python side, so the widget's idea of the figure
+stays in sync with what is rendered without keeping the whole history.
+"""
+import numpy as np
+
+
+class RingBuffer:
+    """Fixed-capacity FIFO of samples backed by a single NumPy array
+
+    With capacity=None the buffer is unbounded and grows by doubling.
+    """
+
+    def __init__(self, capacity=None, dtype=float):
+        self.capacity = capacity
+        self._data = np.empty(capacity or 16, dtype=dtype)
+        self._start = 0
+        self._size = 0
+        # samples pushed out of the window so far: the buffer holds samples
+        # dropped ... dropped + len(self) of everything extended
+        self.dropped = 0
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def dtype(self):
+        return self._data.dtype
+
+    @property
+    def nbytes(self):
+        """Size of the allocated buffer"""
+        return self._data.nbytes
+
+    def extend(self, values):
+        values = np.asarray(values)
+        if values.dtype != self._data.dtype:
+            values = values.astype(np.result_type(self._data.dtype, values.dtype))
+            if values.dtype != self._data.dtype:
+                self._reallocate(len(self._data), values.dtype)
+        n = len(values)
+        if self.capacity is None:
+            if self._size + n > len(self._data):
+                self._reallocate(max(2 * len(self._data), self._size + n))
+        elif n >= self.capacity:
+            # only the newest capacity samples survive
+            self.dropped += self._size + n - self.capacity
+            self._data[:] = values[n - self.capacity:]
+            self._start = 0
+            self._size = self.capacity
+            return
+
+        buffer_len = len(self._data)
+        end = (self._start + self._size) % buffer_len
+        first = min(n, buffer_len - end)
+        self._data[end:end + first] = values[:first]
+        self._data[:n - first] = values[first:]
+
+        overflow = self._size + n - buffer_len
+        if overflow > 0:
+            self.dropped += overflow
+            self._start = (self._start + overflow) % buffer_len
+            self._size = buffer_len
+        else:
+            self._size += n
+
+    def to_array(self):
+        """Return the buffered samples, oldest first, as a new array"""
+        stop = self._start + self._size
+        if stop <= len(self._data):
+            return self._data[self._start:stop].copy()
+        return np.concatenate((self._data[self._start:], self._data[:stop - len(self._data)]))
+
+    def _reallocate(self, length, dtype=None):
+        data = np.empty(length, dtype=dtype or self._data.dtype)
+        data[:self._size] = self.to_array()
+        self._data = data
+        self._start = 0
@@ -0,0 +1,75 @@
+"""Per-update stage timings and their rolling statistics.
+
+Every message that changes the plot (a whole figure, a patch, an extend)
+gets a timing record, in milliseconds, once the page acknowledges it:
+
+    figure      figure_to_dict, decimation and snapshot of the new figure(s)
+    cache       hashing the figure for the serialization cache
+    diff        diffing against what the page shows
+    serialize   encoding the message to JSON (in a worker thread by default)
+    outbox      from posting the message until it was emitted
+    channel     from the emit until the page received it (wall clock)
+    parse       JSON.parse in the page
+    decode      rebuilding typed arrays in the page
+    fetch       download, parse and decode from the local HTTP server
+                (transport="http" only)
+    wait        waiting in the page behind earlier updates
+    plot        Plotly.react / update / extendTraces
+    paint       until the next animation frame (absent for hidden pages)
+    total       from posting the message until the acknowledgement
+
+Records also carry "kind" (figure, patch, extend, clear), "bytes" (size
+of the message) and "cached" (True if the payload came from the
+serialization cache).  Stages that didn't apply to an update are left out.
+"""
+import time
+from collections import deque
+
+import numpy as np
+
+STAGES = (
+    "figure", "cache", "diff", "serialize", "outbox", "channel",
+    "parse", "decode", "fetch", "wait", "plot", "paint", "total",
+)
+
+
+def timed(fn, *args):
+    """Call fn(*args); return its result and the time it took in ms"""
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, (time.perf_counter() - start) * 1e3
+
+
+class TimingStats:
+    """The most recent maxlen timing records, with percentiles per stage"""
+
+    def __init__(self, maxlen=500):
+        self.records = deque(maxlen=maxlen)
+
+    def __len__(self):
+        return len(self.records)
+
+    def add(self, record):
+        self.records.append(record)
+
+    def clear(self):
+        self.records.clear()
+
+    def summary(self, stages=STAGES):
+        """{stage: {"n": count, "p50": ms, "p95": ms, "max": ms}}
+
+        Only stages with at least one measurement are included.
+        """
+        result = {}
+        for stage in stages:
+            values = [r[stage] for r in self.records if r.get(stage) is not None]
+            if not values:
+                continue
+            p50, p95 = np.percentile(values, [50, 95])
+            result[stage] = {
+                "n": len(values),
+                "p50": float(p50),
+                "p95": float(p95),
+                "max": float(max(values)),
+            }
+        return result
@@ -0,0 +1,115 @@
+"""Serve the bundled plotly.js to pages through a custom URL scheme.
+
+Pages load plotly.js with an ordinary <script src="plotly-local:plotly.min.js">
+tag, so Chromium can stream, cache and reuse the compiled script across
+widgets and reloads instead of receiving it as a string over the QWebChannel.
+
+Custom schemes have to be registered before the QApplication is created:
+importing pyside6_plotly.plotly_widget does that, or call register_scheme()
+explicitly early in the program.  Importing the pyside6_plotly package alone
+doesn't (it loads its modules on first use), so a widget first used after
+the QApplication exists gets a RuntimeWarning and a page without plotly.js.
+"""
+import os
+import warnings
+
+from PySide6.QtCore import QBuffer, QByteArray, QCoreApplication, QFile, QIODevice
+from PySide6.QtWebEngineCore import (
+    QWebEngineUrlRequestJob,
+    QWebEngineUrlScheme,
+    QWebEngineUrlSchemeHandler,
+)
+
+from .plotly_js import plotly_js_path, plotly_version
+
+SCHEME_NAME = b"plotly-local"
+
+# versioned so a plotly upgrade isn't masked by the browser cache
+PLOTLY_JS_URL = f"plotly-local:plotly.min.js?v={plotly_version()}"
+
+CACHE_HEADERS = {
+    QByteArray(b"Cache-Control"): QByteArray(b"public, max-age=31536000, immutable"),
+}
+
+
+def register_scheme():
+    """Register the plotly-local: scheme with QtWebEngine
+
+    Must run before the QApplication is constructed: later calls can't
+    register it any more and warn.
+    """
+    if QWebEngineUrlScheme.schemeByName(SCHEME_NAME).name().data() == SCHEME_NAME:
+        return
+    if QCoreApplication.instance() is not None:
+        warnings.warn(
+            "the plotly-local: scheme can't be registered once the QApplication exists, so pages "
+            "won't load plotly.js from it: import pyside6_plotly.plotly_widget (or call "
+            "pyside6_plotly.register_scheme()) before creating the QApplication",
+            RuntimeWarning,
+            stacklevel=2,
+        )
+        return
+    scheme = QWebEngineUrlScheme(SCHEME_NAME)
+    scheme.setSyntax(QWebEngineUrlScheme.Syntax.Path)
+    scheme.setFlags(
+        QWebEngineUrlScheme.Flag.SecureScheme
+        | QWebEngineUrlScheme.Flag.CorsEnabled
+    )
+    QWebEngineUrlScheme.registerScheme(scheme)
+
+
+class PlotlyJsSchemeHandler(QWebEngineUrlSchemeHandler):
+    """Answers plotly-local: requests from the files in self.files"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        # url path -> file on disk
+        self.files = {"plotly.min.js": plotly_js_path()}
+
+    def requestStarted(self, job):
+        path = job.requestUrl().path()
+        filename = self.files.get(path)
+        if filename is None:
+            job.fail(QWebEngineUrlRequestJob.Error.UrlNotFound)
+            return
+
+        # the device is parented to the job, so it lives exactly as long as
+        # the request; QFile streams from disk without a copy in Python
+        if os.path.exists(filename):
+            device = QFile(filename, job)
+        elif path != "plotly.min.js":
+            job.fail(QWebEngineUrlRequestJob.Error.UrlNotFound)
+            return
+        else:
+            # plotly installed as a zip: fall back to the in-memory source
+            import plotly.offline
+            device = QBuffer(job)
+            device.setData(plotly.offline.get_plotlyjs().encode("utf-8"))
+        if not device.open(QIODevice.OpenModeFlag.ReadOnly):
+            job.fail(QWebEngineUrlRequestJob.Error.RequestFailed)
+            return
+
+        if hasattr(job, "setAdditionalResponseHeaders"):
+            # Qt >= 6.6
+            job.setAdditionalResponseHeaders(CACHE_HEADERS)
+        job.reply(b"application/javascript", device)
+
+
+def install_scheme_handler(profile, bundle=None):
+    """Install the plotly-local: handler on a QWebEngineProfile, once
+
+    bundle: a plotly_js.PlotlyBundle to serve besides the full plotly.js
+    """
+    handler = profile.urlSchemeHandler(SCHEME_NAME)
+    if handler is None:
+        # parented to the profile so it lives as long as the profile does
+        handler = PlotlyJsSchemeHandler(profile)
+        profile.installUrlSchemeHandler(SCHEME_NAME, handler)
+    if bundle is not None:
+        handler.files[bundle.filename] = bundle.path
+    return handler
+
+
+def bundle_url(bundle):
+    """plotly-local: URL of a bundle served by install_scheme_handler"""
+    return f"plotly-local:{bundle.filename}?v={bundle.version}"
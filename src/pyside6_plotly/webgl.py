@@ -0,0 +1,98 @@
+"""Switching large SVG traces to their WebGL counterparts.
+
+An SVG scatter trace draws one DOM node per point and becomes unusable past
+a few tens of thousands of points; scattergl draws the same data with WebGL.
+promote_traces rewrites the type of traces above a point count and leaves
+every other attribute alone:
+
+    fig_dict, promoted = promote_traces(fig_dict, threshold=50_000)
+    # promoted: [{"index": 0, "from": "scatter", "to": "scattergl", "points": 1000000}]
+
+Traces using attributes the WebGL type doesn't have (stackgroup, spline
+lines, fill patterns, ...) are kept as they are, so the plot looks and
+behaves the same.  There's no counterpart for heatmap: it is drawn as a
+single image already, and plotly.js 3 removed heatmapgl.
+"""
+import numpy as np
+
+# SVG trace type -> WebGL trace type
+GL_EQUIVALENTS = {"scatter": "scattergl"}
+
+# attributes (dotted paths) whose presence, or listed values, scattergl can't
+# reproduce; True means any value other than None
+UNSUPPORTED = {
+    "scatter": {
+        "stackgroup": True,
+        "stackgaps": True,
+        "groupnorm": True,
+        "fillpattern": True,
+        "hoveron": True,
+        "line.shape": {"spline"},
+        "line.smoothing": True,
+        "line.simplify": True,
+        "line.backoff": True,
+        "marker.gradient": True,
+        "marker.maxdisplayed": True,
+        "cliponaxis": {False},
+    },
+}
+
+DEFAULT_THRESHOLD = 50_000
+
+
+def trace_points(trace):
+    """Number of points of a trace: the longest of its coordinate arrays"""
+    n = 0
+    for key in ("x", "y"):
+        value = trace.get(key)
+        if value is None or isinstance(value, (str, dict)):
+            continue
+        n = max(n, value.shape[0] if isinstance(value, np.ndarray) and value.ndim else len(value))
+    return n
+
+
+def _get(trace, path):
+    value = trace
+    for key in path.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(key)
+    return value
+
+
+def unsupported_attributes(trace):
+    """Attributes of trace that its WebGL counterpart can't draw"""
+    found = []
+    for path, values in UNSUPPORTED.get(trace.get("type", "scatter"), {}).items():
+        value = _get(trace, path)
+        if value is None:
+            continue
+        if values is True or value in values:
+            found.append(path)
+    return found
+
+
+def promote_traces(fig_dict, threshold=DEFAULT_THRESHOLD):
+    """Return (figure dict, promoted traces) with large traces switched to WebGL
+
+    The figure dict is copied where it changes, never modified.  Each
+    promoted trace is reported as {"index", "from", "to", "points"}.
+    """
+    data = fig_dict.get("data") or ()
+    promoted = []
+    new_data = None
+    for index, trace in enumerate(data):
+        trace_type = trace.get("type", "scatter")
+        gl_type = GL_EQUIVALENTS.get(trace_type)
+        if gl_type is None:
+            continue
+        points = trace_points(trace)
+        if points <= threshold or unsupported_attributes(trace):
+            continue
+        if new_data is None:
+            new_data = list(data)
+        new_data[index] = {**trace, "type": gl_type}
+        promoted.append({"index": index, "from": trace_type, "to": gl_type, "points": points})
+    if new_data is None:
+        return fig_dict, promoted
+    return {**fig_dict, "data": new_data}, promoted
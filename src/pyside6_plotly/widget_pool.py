@@ -0,0 +1,154 @@
+"""Pool of pre-warmed PlotlyQtWidgets.
+
+Creating a PlotlyQtWidget means building a web channel, loading the page and
+parsing plotly.js before anything can be drawn.  PlotlyWidgetPool does that
+ahead of time for a few widgets, so acquiring one only costs the
+Plotly.react of the figure.
+
+    pool = PlotlyWidgetPool(size=3)
+    widget = pool.acquire()
+    widget.set_figure(fig)
+    ...
+    pool.release(widget)   # or close the widget
+
+Released widgets are reset() before they are handed out again: the next
+user gets no figure, no event connections (on widget.callbacks) and the
+default event policies and options, whatever the previous one set up.
+"""
+import time
+from collections import deque
+
+from PySide6.QtCore import QEvent, QObject, QTimer
+
+from .plotly_widget import PlotlyQtWidget
+
+
+class PlotlyWidgetPool(QObject):
+    def __init__(self, size=2, idle_timeout=None, min_size=1, widget_factory=PlotlyQtWidget, parent=None):
+        """
+        size: number of warm widgets to keep ready
+        idle_timeout: seconds a warm widget may sit unused before it is
+            evicted (None to never evict); at least min_size are kept
+        widget_factory: callable returning a new PlotlyQtWidget
+        """
+        super().__init__(parent)
+        self.size = size
+        self.idle_timeout = idle_timeout
+        self.min_size = min_size
+        self.widget_factory = widget_factory
+
+        # warm (page ready) widgets: list of (widget, time it became idle)
+        self._idle = []
+        # widgets still loading their page: {widget: creation time}
+        self._warming = {}
+        self._in_use = set()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # seconds from creation to page ready, for the most recent widgets
+        self.warmup_times = deque(maxlen=100)
+
+        self._evict_timer = QTimer(self)
+        self._evict_timer.timeout.connect(self.evict_idle)
+        if idle_timeout is not None:
+            self._evict_timer.start(max(int(idle_timeout * 500), 100))
+
+        QTimer.singleShot(0, self.fill)
+
+    def acquire(self, parent=None):
+        """Return a widget ready for set_figure, warm if one is available"""
+        if self._idle:
+            widget, _ = self._idle.pop()
+            self.hits += 1
+        else:
+            # a widget that is still warming up is further along than a new one
+            widget = next(iter(self._warming), None)
+            if widget is not None:
+                del self._warming[widget]
+            else:
+                widget = self._create()
+                del self._warming[widget]
+            self.misses += 1
+        self._in_use.add(widget)
+        widget.installEventFilter(self)
+        if parent is not None:
+            widget.setParent(parent)
+        QTimer.singleShot(0, self.fill)
+        return widget
+
+    def release(self, widget):
+        """Return a widget to the pool (or dispose of it if the pool is full)"""
+        if widget not in self._in_use:
+            return
+        self._in_use.discard(widget)
+        widget.removeEventFilter(self)
+        widget.reset()
+        if widget.page_ready and len(self._idle) + len(self._warming) < self.size:
+            widget.hide()
+            widget.setParent(None)
+            self._idle.append((widget, time.monotonic()))
+        else:
+            widget.deleteLater()
+
+    def fill(self):
+        """Start warming widgets until size are idle or warming"""
+        while len(self._idle) + len(self._warming) < self.size:
+            self._create()
+
+    def evict_idle(self):
+        """Dispose of widgets idle for longer than idle_timeout"""
+        if self.idle_timeout is None:
+            return
+        now = time.monotonic()
+        # oldest first; keep at least min_size
+        self._idle.sort(key=lambda item: item[1])
+        while len(self._idle) > self.min_size and now - self._idle[0][1] > self.idle_timeout:
+            widget, _ = self._idle.pop(0)
+            widget.deleteLater()
+            self.evictions += 1
+
+    def metrics(self):
+        """Pool statistics: hit rate, warm-up time (seconds) and counts"""
+        requests = self.hits + self.misses
+        warmups = self.warmup_times
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / requests if requests else None,
+            "evictions": self.evictions,
+            "idle": len(self._idle),
+            "warming": len(self._warming),
+            "in_use": len(self._in_use),
+            "warmup_mean": sum(warmups) / len(warmups) if warmups else None,
+            "warmup_max": max(warmups) if warmups else None,
+        }
+
+    def clear(self):
+        """Dispose of all idle and warming widgets"""
+        for widget, _ in self._idle:
+            widget.deleteLater()
+        for widget in self._warming:
+            widget.deleteLater()
+        self._idle = []
+        self._warming = {}
+
+    def eventFilter(self, watched, event):
+        # closing an acquired widget hands it back to the pool
+        if event.type() == QEvent.Type.Close and watched in self._in_use:
+            self.release(watched)
+        return False
+
+    def _create(self):
+        widget = self.widget_factory()
+        self._warming[widget] = time.perf_counter()
+        widget.callbacks.page_ready.connect(lambda: self._on_warm(widget))
+        return widget
+
+    def _on_warm(self, widget):
+        started = self._warming.pop(widget, None)
+        if started is None:
+            # already acquired (or discarded) while warming; or a page reload
+            return
+        self.warmup_times.append(time.perf_counter() - started)
+        self._idle.append((widget, time.monotonic()))
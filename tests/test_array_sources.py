@@ -0,0 +1,110 @@
+"""Tests for lazy array sources and their decimation."""
+
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from pyside6_plotly import array_sources
+from pyside6_plotly.array_sources import LazyArray, is_lazy, searchsorted, take
+from pyside6_plotly.figure_diff import snapshot_figure
+from pyside6_plotly.decimation import DecimatedTrace, minmax_indices, minmax_indices_chunked
+
+
+class ChunkedReader(LazyArray):
+    """A lazy source that records the slices read from it"""
+
+    def __init__(self, data):
+        self._data = data
+        self.dtype = data.dtype
+        self.reads = []
+
+    def __len__(self):
+        return len(self._data)
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            self.reads.append(key.stop - key.start)
+        return self._data[key]
+
+
+class TestArraySources(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(2)
+        self.y = rng.standard_normal(50_000)
+        self.y[31_337] = 40.0
+        self.x = np.cumsum(rng.uniform(0.5, 1.5, len(self.y)))
+
+    def test_is_lazy(self):
+        self.assertFalse(is_lazy(self.y))
+        self.assertFalse(is_lazy([1, 2]))
+        self.assertTrue(is_lazy(ChunkedReader(self.y)))
+
+        class Column:
+            # sliceable with a dtype, like a pandas Series: not lazy
+            dtype = self.y.dtype
+
+            def __len__(self):
+                return 3
+
+            def __getitem__(self, key):
+                return np.zeros(3)[key]
+
+        self.assertFalse(is_lazy(Column()))
+        self.assertTrue(is_lazy(LazyArray(Column())))
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "y.npy")
+            np.save(path, self.y)
+            mapped = np.load(path, mmap_mode="r+")
+            self.assertTrue(is_lazy(mapped))
+            # not copied into memory, even though it is writeable
+            self.assertIs(snapshot_figure({"y": mapped})["y"], mapped)
+            trace = DecimatedTrace(mapped)
+            self.assertEqual(trace.nbytes, 0)
+            np.testing.assert_array_equal(trace.select(None, 1000), minmax_indices(self.y, 1000))
+            del trace, mapped
+
+    def test_take_and_searchsorted(self):
+        reader = ChunkedReader(self.x)
+        indices = np.array([0, 5, 20_000, 49_999])
+        with mock.patch.object(array_sources, "CHUNK_SIZE", 100):
+            np.testing.assert_array_equal(take(reader, indices), self.x[indices])
+        self.assertEqual(reader.reads, [6, 1, 1])
+        for value in (self.x[123], self.x[123] + 0.1, -1.0, 1e9):
+            for side in ("left", "right"):
+                self.assertEqual(searchsorted(reader, value, side), np.searchsorted(self.x, value, side))
+
+    def test_chunked_minmax_matches(self):
+        expected = minmax_indices(self.y[1000:41_000], 500) + 1000
+        reader = ChunkedReader(self.y)
+        np.testing.assert_array_equal(minmax_indices_chunked(reader, 1000, 41_000, 500, chunk_size=4096), expected)
+        self.assertLessEqual(max(reader.reads), 4096)
+        self.assertEqual(sum(reader.reads), 40_000)
+
+    def test_lazy_window(self):
+        reader = ChunkedReader(self.y)
+        trace = DecimatedTrace(reader, x=ChunkedReader(self.x), max_points=200)
+        indices = trace.select((self.x[30_000], self.x[33_000]), 200)
+        self.assertIn(31_337, indices)
+        self.assertGreaterEqual(indices.min(), 29_999)
+        self.assertLessEqual(indices.max(), 33_001)
+        # only the window was read
+        self.assertLess(sum(reader.reads), 3100)
+        x, y = trace.points(indices)
+        np.testing.assert_array_equal(x, self.x[indices])
+        np.testing.assert_array_equal(y, self.y[indices])
+
+    def test_lazy_lttb(self):
+        trace = DecimatedTrace(ChunkedReader(self.y), method="lttb")
+        with mock.patch("pyside6_plotly.decimation.CHUNK_SIZE", 1000):
+            indices = trace.select(None, 300)
+        self.assertEqual(len(indices), 300)
+        self.assertIn(31_337, indices)
+        self.assertEqual((indices[0], indices[-1]), (0, len(self.y) - 1))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+"""Tests for the serialized figure cache."""
+
+import unittest
+
+import numpy as np
+
+from pyside6_plotly.cache import SerializationCache, content_key
+
+
+class TestContentKey(unittest.TestCase):
+
+    def test_equal_content_equal_key(self):
+        a = {"data": [{"y": np.arange(10.0)}], "layout": {"title": "t"}}
+        b = {"layout": {"title": "t"}, "data": [{"y": np.arange(10.0)}]}
+        self.assertEqual(content_key(a), content_key(b))
+
+    def test_differences_change_key(self):
+        base = {"data": [{"y": np.arange(10.0)}], "layout": {}}
+        keys = {
+            content_key(base),
+            content_key({"data": [{"y": np.arange(10)}], "layout": {}}),
+            content_key({"data": [{"y": np.arange(10.0).reshape(2, 5)}], "layout": {}}),
+            content_key({"data": [{"y": np.arange(1.0, 11.0)}], "layout": {}}),
+            content_key({"data": [{"y": list(range(10))}], "layout": {}}),
+            content_key({"data": [{"y": np.arange(10.0)}], "layout": {"title": "t"}}),
+        }
+        self.assertEqual(len(keys), 6)
+        self.assertNotEqual(content_key(["ab", "c"]), content_key(["a", "bc"]))
+        self.assertNotEqual(content_key([1]), content_key(["1"]))
+
+    def test_read_only_arrays(self):
+        # hashed once and remembered, with the same result as writeable ones
+        y = np.arange(10.0)
+        frozen = y.copy()
+        frozen.flags.writeable = False
+        self.assertEqual(content_key({"y": frozen}), content_key({"y": y}))
+        self.assertEqual(content_key({"y": frozen}), content_key({"y": y}))
+        self.assertNotEqual(content_key({"y": frozen}), content_key({"y": y + 1}))
+
+
+class TestSerializationCache(unittest.TestCase):
+
+    def test_hit_and_miss(self):
+        cache = SerializationCache()
+        self.assertIsNone(cache.get("a"))
+        cache.put("a", "payload")
+        self.assertEqual(cache.get("a"), "payload")
+        stats = cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 1))
+        self.assertEqual(stats["hit_rate"], 0.5)
+        self.assertEqual(stats["bytes"], len("payload"))
+
+    def test_lru_eviction(self):
+        cache = SerializationCache(max_bytes=10)
+        cache.put("a", "aaaa")
+        cache.put("b", "bbbb")
+        cache.get("a")
+        cache.put("c", "cccc")
+        # b was the least recently used
+        self.assertNotIn("b", cache)
+        self.assertIn("a", cache)
+        self.assertIn("c", cache)
+        self.assertEqual(cache.evictions, 1)
+        self.assertEqual(cache.stats()["bytes"], 8)
+
+    def test_replace_and_oversized(self):
+        cache = SerializationCache(max_bytes=10)
+        cache.put("a", "aaaa")
+        cache.put("a", "aaaaaa")
+        self.assertEqual(cache.stats()["bytes"], 6)
+        cache.put("big", "x" * 11)
+        self.assertNotIn("big", cache)
+        self.assertIn("a", cache)
+        self.assertEqual(cache.evictions, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,93 @@
+"""Tests for `pyside6_plotly.dashboard`, with the page played by the test."""
+
+import json
+import os
+import unittest
+
+import numpy as np
+
+try:
+    from PySide6.QtWidgets import QApplication
+
+    from pyside6_plotly.dashboard import PlotlyDashboardWidget
+except ImportError:  # no QtWebEngine
+    PlotlyDashboardWidget = None
+
+
+@unittest.skipIf(PlotlyDashboardWidget is None, "needs QtWebEngine")
+class TestDashboard(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+        cls.app = QApplication.instance() or QApplication([])
+
+    def setUp(self):
+        self.dashboard = PlotlyDashboardWidget(columns=2)
+        self.plots = [self.dashboard.add_plot(threaded_serialization=False) for _ in range(2)]
+        self.messages = {"added": [], "removed": [], "grid": []}
+        self.dashboard.callbacks.plot_added.connect(lambda *args: self.messages["added"].append(args))
+        self.dashboard.callbacks.plot_removed.connect(self.messages["removed"].append)
+        self.dashboard.callbacks.grid_changed.connect(lambda style: self.messages["grid"].append(json.loads(style)))
+        # added while the (empty) page loaded: added to it once it is ready
+        self.page_ready()
+        self.assertEqual(self.messages["added"], [("plot_0", 1, 1), ("plot_1", 1, 1)])
+        self.messages["added"].clear()
+
+    def page_ready(self):
+        # what the page does once it has connected the channel
+        self.dashboard.callbacks.on_page_ready()
+        for plot in self.dashboard.plots:
+            if not plot.page_ready:
+                plot.callbacks.on_page_ready()
+
+    def test_figures_go_to_their_plot(self):
+        sent = {plot.name: [] for plot in self.plots}
+        for plot in self.plots:
+            plot.callbacks.update_plot.connect(sent[plot.name].append)
+        self.plots[1].set_figure({"data": [{"y": [1, 2]}], "layout": {}})
+        self.assertEqual(sent["plot_0"], [])
+        self.assertEqual(json.loads(sent["plot_1"][0])["data"], [{"y": [1, 2]}])
+        self.plots[0].set_figure({"data": [{"y": [3]}], "layout": {}})
+        self.assertEqual((len(sent["plot_0"]), len(sent["plot_1"])), (1, 1))
+
+    def test_events_go_to_their_plot(self):
+        self.assertIs(self.dashboard.callbacks.plot_callbacks("plot_1"), self.plots[1].callbacks)
+        self.assertIsNone(self.dashboard.callbacks.plot_callbacks("plot_9"))
+        # plot_0 plots a decimated view: its point numbers are translated
+        self.plots[0].set_figure({"data": [{"y": np.zeros(10)}], "layout": {}})
+        self.plots[0].decimate_trace(0, np.arange(100_000.0), max_points=100)
+        clicks = {plot.name: [] for plot in self.plots}
+        for plot in self.plots:
+            plot.callbacks.plotly_click.connect(lambda data, name=plot.name: clicks[name].append(json.loads(data)))
+        click = json.dumps({"points": [{"curveNumber": 0, "pointNumber": 1}]})
+        self.plots[1].callbacks.on_plotly_event("plotly_click", click)
+        self.assertEqual(clicks, {"plot_0": [], "plot_1": [{"points": [{"curveNumber": 0, "pointNumber": 1}]}]})
+        self.plots[0].callbacks.on_plotly_event("plotly_click", click)
+        self.assertNotEqual(clicks["plot_0"][0]["points"][0]["pointNumber"], 1)
+
+    def test_grid_changes_in_place(self):
+        html = self.dashboard.html_content
+        plot = self.dashboard.add_plot(colspan=2)
+        self.assertEqual(self.messages["added"], [("plot_2", 2, 1)])
+        self.dashboard.remove_plot(self.plots[0])
+        self.assertEqual(self.messages["removed"], ["plot_0"])
+        self.dashboard.set_grid(columns=3)
+        self.assertEqual(self.messages["grid"][-1]["gridTemplateColumns"], "repeat(3, minmax(0, 1fr))")
+        # names aren't reused
+        self.assertEqual(self.dashboard.add_plot().name, "plot_3")
+        self.assertEqual([p.name for p in self.dashboard.plots], ["plot_1", "plot_2", "plot_3"])
+        self.assertIs(self.dashboard.html_content, html)
+        self.assertIn(plot, self.dashboard.plots)
+
+    def test_changes_while_loading_wait_for_the_page(self):
+        # reloaded with the plots it has now
+        self.dashboard.set_plotly_bundle(self.dashboard.plotly_bundle)
+        self.dashboard.add_plot()
+        self.assertEqual(self.messages["added"], [])
+        self.page_ready()
+        self.assertEqual(self.messages["added"], [("plot_2", 1, 1)])
+
+
+if __name__ == "__main__":
+    unittest.main()
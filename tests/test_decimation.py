@@ -0,0 +1,49 @@
+"""Tests for `pyside6_plotly.decimation`."""
+
+import unittest
+
+import numpy as np
+
+from pyside6_plotly.decimation import DecimatedTrace, lttb_indices, minmax_indices, parse_axis_ranges
+
+
+class TestDecimation(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(1)
+        self.y = rng.standard_normal(100_000)
+        self.y[12_345] = 50.0
+        self.x = np.arange(len(self.y), dtype=np.float64)
+
+    def test_minmax_keeps_extremes(self):
+        indices = minmax_indices(self.y, 1000)
+        self.assertLessEqual(len(indices), 1002)
+        self.assertIn(12_345, indices)
+        self.assertIn(int(np.argmin(self.y)), indices)
+        self.assertTrue(np.all(np.diff(indices) > 0))
+
+    def test_lttb(self):
+        indices = lttb_indices(self.x, self.y, 500)
+        self.assertEqual(len(indices), 500)
+        self.assertEqual((indices[0], indices[-1]), (0, len(self.y) - 1))
+        self.assertIn(12_345, indices)
+
+    def test_short_data_is_untouched(self):
+        np.testing.assert_array_equal(minmax_indices(self.y[:10], 100), np.arange(10))
+
+    def test_visible_window(self):
+        trace = DecimatedTrace(self.y, x=self.x, max_points=100)
+        indices = trace.select((1000, 2000), 100)
+        self.assertGreaterEqual(indices.min(), 999)
+        self.assertLessEqual(indices.max(), 2001)
+        # the index map kept for events is the same points, compacted
+        np.testing.assert_array_equal(trace.indices, indices)
+        self.assertEqual(trace.indices.dtype, np.int32)
+
+    def test_parse_axis_ranges(self):
+        self.assertEqual(
+            parse_axis_ranges({"xaxis.range[0]": 1, "xaxis.range[1]": 2, "yaxis.range[0]": 0}),
+            {"xaxis": (1, 2)},
+        )
+        self.assertEqual(parse_axis_ranges({"xaxis2.autorange": True}), {"xaxis2": None})
+        self.assertEqual(parse_axis_ranges({"xaxis.range": [3, 4]}), {"xaxis": (3, 4)})
@@ -0,0 +1,80 @@
+"""Tests for `pyside6_plotly.encoding`."""
+
+import base64
+import json
+import shutil
+import subprocess
+import unittest
+
+import numpy as np
+import plotly.graph_objects as go
+
+from pyside6_plotly.encoding import (
+    TYPED_ARRAY_JS, encode_arrays, serialize, serialize_async, serialize_figure,
+)
+
+
+class TestEncoding(unittest.TestCase):
+
+    def test_numeric_arrays_are_packed(self):
+        x = np.linspace(0, 1, 5)
+        spec = encode_arrays({"x": x})["x"]
+        self.assertEqual(spec["dtype"], "f8")
+        decoded = np.frombuffer(base64.b64decode(spec["bdata"]), dtype="<f8")
+        np.testing.assert_array_equal(decoded, x)
+
+    def test_int64_is_narrowed_and_2d_keeps_shape(self):
+        z = np.arange(6, dtype=np.int64).reshape(2, 3)
+        spec = encode_arrays({"z": z})["z"]
+        self.assertEqual(spec["dtype"], "i4")
+        self.assertEqual(spec["shape"], "2, 3")
+
+    def test_json_mode_and_skipped_keys(self):
+        fig = go.Figure(go.Scatter(x=np.arange(3.0), y=np.arange(3.0)))
+        fig.update_xaxes(range=np.array([0.0, 2.0]))
+        plain = json.loads(serialize_figure(fig, binary=False))
+        self.assertEqual(plain["data"][0]["x"], [0.0, 1.0, 2.0])
+        packed = json.loads(serialize_figure(fig))
+        self.assertIn("bdata", packed["data"][0]["x"])
+        self.assertEqual(packed["layout"]["xaxis"]["range"], [0.0, 2.0])
+
+    def test_input_is_not_modified(self):
+        fig_dict = {"data": [{"y": np.arange(4.0)}], "layout": {}}
+        serialize_figure(fig_dict)
+        self.assertIsInstance(fig_dict["data"][0]["y"], np.ndarray)
+
+    def test_serialize_async_matches_serialize(self):
+        obj = {"data": [{"y": np.arange(5.0)}], "layout": {"title": "t"}}
+        future = serialize_async(obj)
+        self.assertEqual(future.result(timeout=10), serialize(obj))
+
+
+@unittest.skipUnless(shutil.which("node"), "needs node")
+class TestAppendWindow(unittest.TestCase):
+    """appendWindow() in the page, fed with samples as extend_traces sends them"""
+
+    def append(self, target, samples, max_points):
+        insert = serialize({"y": np.asarray(samples)})
+        script = TYPED_ARRAY_JS + f"""
+            const insert = decodeTypedArrays(JSON.parse({json.dumps(insert)})).y;
+            const out = appendWindow({target}, insert, {json.dumps(max_points)} ?? undefined);
+            console.log(JSON.stringify([out.constructor.name, Array.from(out)]));
+        """
+        output = subprocess.run(["node", "-e", script], check=True, capture_output=True, text=True).stdout
+        return json.loads(output)
+
+    def test_window_not_full_yet(self):
+        self.assertEqual(self.append("new Float64Array([1, 2])", [3.0], 1000), ["Float64Array", [1, 2, 3]])
+
+    def test_window_rolls(self):
+        self.assertEqual(self.append("new Float64Array([1, 2, 3])", [4.0, 5.0], 3), ["Float64Array", [3, 4, 5]])
+        self.assertEqual(self.append("new Float64Array([1])", [2.0, 3.0, 4.0], 2), ["Float64Array", [3, 4]])
+
+    def test_list_seeded_and_empty_traces(self):
+        self.assertEqual(self.append("[]", [1.5, 2.5], 1000), ["Array", [1.5, 2.5]])
+        self.assertEqual(self.append("[0.5]", [1.5], None), ["Array", [0.5, 1.5]])
+        self.assertEqual(self.append("undefined", [1.5], 1000), ["Array", [1.5]])
+
+    def test_int_samples_on_float_trace(self):
+        # int64 samples are sent as an Int32Array
+        self.assertEqual(self.append("new Float64Array([0.5])", [1, 2], 1000), ["Array", [0.5, 1, 2]])
@@ -0,0 +1,166 @@
+"""Tests for `pyside6_plotly.events`."""
+
+import json
+import shutil
+import subprocess
+import unittest
+
+import numpy as np
+
+from pyside6_plotly.encoding import TYPED_ARRAY_JS, to_typed_array_spec
+from pyside6_plotly.events import (
+    EVENTS_JS, LATEST_PER_FRAME, debounce, decode_event_data, decode_selection, map_point_indices, normalize_fields,
+    normalize_policy, remap_event, remap_selection, throttle,
+)
+
+
+class TestEventPolicies(unittest.TestCase):
+
+    def test_normalize(self):
+        self.assertEqual(normalize_policy("plotly_hover", LATEST_PER_FRAME), {"mode": "raf"})
+        self.assertEqual(normalize_policy("plotly_relayout", throttle(20)), {"mode": "throttle", "ms": 20})
+        self.assertEqual(normalize_policy("plotly_hover", None), {"mode": "immediate"})
+
+    def test_discrete_events_stay_immediate(self):
+        self.assertEqual(normalize_policy("plotly_click", "immediate"), {"mode": "immediate"})
+        with self.assertRaises(ValueError):
+            normalize_policy("plotly_click", throttle(100))
+
+    def test_invalid_policies(self):
+        with self.assertRaises(ValueError):
+            normalize_policy("plotly_hover", {"mode": "debounce"})
+        with self.assertRaises(ValueError):
+            normalize_policy("plotly_nonsense", "immediate")
+
+
+class TestDecodeEventData(unittest.TestCase):
+
+    def test_columns_become_arrays(self):
+        payload = json.dumps({
+            "n_points": 3,
+            "columns": {
+                "pointIndex": to_typed_array_spec(np.array([4, 5, 6], dtype=np.int32)),
+                "text": ["a", "b", "c"],
+            },
+        })
+        event = decode_event_data(payload)
+        np.testing.assert_array_equal(event["columns"]["pointIndex"], [4, 5, 6])
+        self.assertEqual(event["columns"]["pointIndex"].dtype, np.int32)
+        self.assertEqual(list(event["columns"]["text"]), ["a", "b", "c"])
+
+    def test_point_dicts_are_left_alone(self):
+        event = decode_event_data('{"points": [{"x": 1}]}')
+        self.assertEqual(event, {"points": [{"x": 1}]})
+
+
+class TestDecodeSelection(unittest.TestCase):
+
+    def test_indices_per_curve(self):
+        payload = json.dumps({
+            "n_points": 4,
+            "curves": {
+                "0": to_typed_array_spec(np.array([1, 2, 3], dtype=np.int32)),
+                "2": to_typed_array_spec(np.array([7], dtype=np.int32)),
+            },
+        })
+        selection = decode_selection(payload)
+        self.assertEqual(sorted(selection), [0, 2])
+        np.testing.assert_array_equal(selection[0], [1, 2, 3])
+        self.assertEqual(selection[2].dtype, np.int32)
+        self.assertEqual(decode_selection('{"curves": {}, "n_points": 0}'), {})
+
+
+class TestRemapIndices(unittest.TestCase):
+
+    index_maps = {0: np.array([0, 10, 20, 30], dtype=np.int32), 2: 100}
+
+    def test_map_point_indices(self):
+        np.testing.assert_array_equal(map_point_indices(self.index_maps[0], [1, 3, 4, -1]), [10, 30, -1, -1])
+        np.testing.assert_array_equal(map_point_indices(100, [0, 5]), [100, 105])
+        np.testing.assert_array_equal(map_point_indices(np.empty(0, dtype=np.int32), [0]), [-1])
+
+    def test_point_dicts(self):
+        event = {"points": [
+            {"curveNumber": 0, "pointNumber": 2, "pointIndex": 2},
+            {"curveNumber": 1, "pointNumber": 2},
+            {"curveNumber": 2, "pointNumber": 2},
+        ]}
+        self.assertTrue(remap_event(event, self.index_maps))
+        self.assertEqual([p["pointNumber"] for p in event["points"]], [20, 2, 102])
+        self.assertEqual(event["points"][0]["pointIndex"], 20)
+        self.assertFalse(remap_event({"points": [{"curveNumber": 1, "pointNumber": 0}]}, self.index_maps))
+
+    def test_columns(self):
+        event = {"columns": {
+            "curveNumber": to_typed_array_spec(np.array([0, 1, 2], dtype=np.int32)),
+            "pointNumber": to_typed_array_spec(np.array([3, 3, 3], dtype=np.int32)),
+        }}
+        self.assertTrue(remap_event(event, self.index_maps))
+        event = decode_event_data(event)
+        np.testing.assert_array_equal(event["columns"]["pointNumber"], [30, 3, 103])
+
+    def test_selection(self):
+        selection = remap_selection({0: np.array([0, 1]), 1: np.array([5])}, self.index_maps)
+        np.testing.assert_array_equal(selection[0], [0, 10])
+        np.testing.assert_array_equal(selection[1], [5])
+
+    def test_index_fields_bring_curve_number(self):
+        self.assertEqual(normalize_fields("plotly_click", "pointNumber")["fields"], ["pointNumber", "curveNumber"])
+        self.assertEqual(normalize_fields("plotly_click", ["x"])["fields"], ["x"])
+
+
+@unittest.skipUnless(shutil.which("node"), "needs node")
+class TestEventForwarder(unittest.TestCase):
+    """createEventForwarder() in the page, fed with Plotly events"""
+
+    def forward(self, policies, events):
+        policies = {name: normalize_policy(name, policy) for name, policy in policies.items()}
+        script = TYPED_ARRAY_JS + EVENTS_JS + f"""
+            globalThis.requestAnimationFrame = (callback) => setTimeout(callback, 5);
+            const delivered = [];
+            const events = createEventForwarder({{
+                on_plotly_event: (name, data) => delivered.push([name, JSON.parse(data)]),
+            }});
+            events.setPolicies({json.dumps(policies)});
+            for (const [name, event] of {json.dumps(events)}) events.dispatch(name, event);
+            setTimeout(() => console.log(JSON.stringify(delivered)), 100);
+        """
+        output = subprocess.run(["node", "-e", script], check=True, capture_output=True, text=True).stdout
+        return [tuple(event) for event in json.loads(output)]
+
+    def test_hover_and_unhover_keep_their_order(self):
+        policies = {"plotly_hover": LATEST_PER_FRAME, "plotly_unhover": LATEST_PER_FRAME}
+        events = [["plotly_hover", {"id": "a"}], ["plotly_unhover", {"id": "a"}], ["plotly_hover", {"id": "b"}]]
+        self.assertEqual(self.forward(policies, events), [("plotly_hover", {"id": "b"})])
+        self.assertEqual(self.forward(policies, events[:2]), [("plotly_unhover", {"id": "a"})])
+
+    def test_immediate_events_come_after_waiting_ones(self):
+        events = [["plotly_hover", {"id": "a"}], ["plotly_click", {"id": "a"}]]
+        self.assertEqual(
+            self.forward({"plotly_hover": LATEST_PER_FRAME}, events),
+            [("plotly_hover", {"id": "a"}), ("plotly_click", {"id": "a"})],
+        )
+
+    def test_relayouts_are_merged(self):
+        events = [
+            # delivered at once, then the throttle holds the others back
+            ["plotly_relayout", {"dragmode": "pan"}],
+            ["plotly_relayout", {"xaxis.range[0]": 0, "xaxis.range[1]": 1, "yaxis.range[0]": 5}],
+            ["plotly_relayout", {"xaxis.range": [2, 3]}],
+            ["plotly_relayout", {"xaxis.range[1]": 4}],
+        ]
+        self.assertEqual(
+            self.forward({"plotly_relayout": throttle(50)}, events),
+            [("plotly_relayout", {"dragmode": "pan"}),
+             ("plotly_relayout", {"yaxis.range[0]": 5, "xaxis.range": [2, 3], "xaxis.range[1]": 4})],
+        )
+
+    def test_restyles_of_other_traces_are_not_merged(self):
+        events = [
+            ["plotly_restyle", [{"visible": False}, [0]]],
+            ["plotly_restyle", [{"opacity": 0.5}, [0]]],
+            ["plotly_restyle", [{"visible": True}, [1]]],
+        ]
+        # the page sends [update, traces] as {"0": update, "1": traces}
+        delivered = [[event["0"], event["1"]] for _, event in self.forward({"plotly_restyle": debounce(20)}, events)]
+        self.assertEqual(delivered, [[{"visible": False, "opacity": 0.5}, [0]], [{"visible": True}, [1]]])
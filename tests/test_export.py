@@ -0,0 +1,98 @@
+"""Tests for `pyside6_plotly.export`."""
+
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+import plotly.graph_objects as go
+
+try:
+    from PySide6.QtCore import QObject, QTimer
+    from PySide6.QtWidgets import QApplication
+
+    from pyside6_plotly import export
+    from pyside6_plotly.export import BatchExporter, ExportCallbacks
+except ImportError:  # no QtWebEngine
+    BatchExporter = None
+
+
+if BatchExporter is not None:
+    class FakeExportPage:
+        """Stands in for export._ExportPage: "exports" every figure but those
+        titled "hang", which never render, and "fail", which fail to"""
+
+        def __init__(self, exporter):
+            self.page = QObject(exporter)
+            self.callbacks = ExportCallbacks(self.page)
+            self.ready = False
+            self.job = None
+            self.timer = QTimer(self.page)
+            self.timer.setSingleShot(True)
+            self.timer.timeout.connect(
+                lambda: exporter._replace_page(self, f"timed out after {exporter.timeout} s", timed_out=True)
+            )
+            self.callbacks.page_ready.connect(lambda: exporter._on_page_ready(self))
+            self.callbacks.image_ready.connect(lambda job_id, url: exporter._on_image(self, job_id, url))
+            self.callbacks.failed.connect(lambda job_id, error: exporter._finish(self, job_id, error))
+            self.callbacks.render.connect(self.render)
+            QTimer.singleShot(0, self.callbacks.on_page_ready)
+
+        def render(self, job_id, job_json):
+            title = json.loads(job_json)["figure"]["layout"].get("title", {}).get("text")
+            if title == "fail":
+                QTimer.singleShot(0, lambda: self.callbacks.on_error(job_id, "Error: no such trace"))
+            elif title != "hang":
+                QTimer.singleShot(0, lambda: self.callbacks.on_image(job_id, "data:,image"))
+
+
+@unittest.skipIf(BatchExporter is None, "needs QtWebEngine")
+class TestBatchExporter(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+        cls.app = QApplication.instance() or QApplication([])
+
+    def setUp(self):
+        self.exporter = BatchExporter(concurrency=1)
+        self.addCleanup(self.exporter.close)
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+
+    def test_reused_figure_is_exported_as_added(self):
+        fig = go.Figure(go.Scatter(y=np.arange(3.0)))
+        jobs = []
+        for i in range(3):
+            fig.data[0].y = np.full(3, float(i))
+            fig.update_layout(title=f"figure {i}")
+            jobs.append(self.exporter.add(fig, os.path.join(self.tmpdir.name, f"{i}.png")))
+        for i, job in enumerate(jobs):
+            np.testing.assert_array_equal(job.fig_dict["data"][0]["y"], np.full(3, float(i)))
+            self.assertEqual(job.fig_dict["layout"]["title"]["text"], f"figure {i}")
+
+    def test_failed_and_stuck_jobs(self):
+        with mock.patch.object(export, "_ExportPage", FakeExportPage):
+            exporter = BatchExporter(concurrency=2, timeout=0.2)
+            self.addCleanup(exporter.close)
+            titles = ["a", "hang", "b", "fail", "c"]
+            for i, title in enumerate(titles):
+                exporter.add(go.Figure(layout={"title": title}), os.path.join(self.tmpdir.name, f"{i}.png"))
+            jobs = exporter.run()
+        self.assertEqual([job.error is None for job in jobs], [True, False, True, False, True])
+        self.assertIn("timed out", jobs[1].error)
+        self.assertEqual(jobs[3].error, "Error: no such trace")
+        self.assertEqual(sorted(os.listdir(self.tmpdir.name)), ["0.png", "2.png", "4.png"])
+        stats = exporter.stats()
+        self.assertEqual((stats["completed"], stats["failed"], stats["timeouts"]), (3, 2, 1))
+        self.assertEqual(len(exporter._pages), 2)
+
+    def test_unknown_format(self):
+        with self.assertRaises(ValueError):
+            self.exporter.add(go.Figure(), os.path.join(self.tmpdir.name, "figure.bmp"))
+
+
+if __name__ == "__main__":
+    unittest.main()
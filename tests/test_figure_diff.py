@@ -0,0 +1,117 @@
+"""Tests for `pyside6_plotly.figure_diff`."""
+
+import unittest
+
+import numpy as np
+import plotly.graph_objects as go
+
+from pyside6_plotly.encoding import figure_to_dict
+from pyside6_plotly.figure_diff import (
+    ArrayRef, diff_figures, release_arrays, resolve_arrays, snapshot_figure,
+)
+
+
+class TestFigureDiff(unittest.TestCase):
+
+    def setUp(self):
+        self.fig = go.Figure([
+            go.Scatter(x=np.arange(1000.0), y=np.arange(1000.0)),
+            go.Scatter(x=np.arange(10.0), y=np.ones(10)),
+        ])
+        self.old = snapshot_figure(figure_to_dict(self.fig))
+
+    def test_unchanged_figure_has_no_calls(self):
+        self.assertEqual(diff_figures(self.old, figure_to_dict(self.fig)), [])
+
+    def test_title_change_is_a_relayout(self):
+        self.fig.update_layout(title="new title")
+        calls = diff_figures(self.old, figure_to_dict(self.fig))
+        self.assertEqual(calls, [{
+            "method": "update",
+            "args": [{}, {"title": {"text": "new title"}}, []],
+        }])
+
+    def test_nested_change_uses_dotted_path(self):
+        self.fig.update_layout(title="first")
+        old = snapshot_figure(figure_to_dict(self.fig))
+        self.fig.update_layout(title="second")
+        (call,) = diff_figures(old, figure_to_dict(self.fig))
+        self.assertEqual(call["args"][1], {"title.text": "second"})
+
+    def test_only_changed_trace_is_restyled(self):
+        new_y = np.full(10, 2.0)
+        self.fig.data[1].y = new_y
+        (call,) = diff_figures(self.old, figure_to_dict(self.fig))
+        restyle, relayout, traces = call["args"]
+        self.assertEqual(list(restyle), ["y"])
+        np.testing.assert_array_equal(restyle["y"][0], new_y)
+        self.assertEqual(traces, [1])
+
+    def test_added_and_removed_traces(self):
+        fig = go.Figure(self.fig.data[:1])
+        calls = diff_figures(self.old, figure_to_dict(fig))
+        self.assertEqual(calls[0], {"method": "deleteTraces", "args": [[1]]})
+        calls = diff_figures(figure_to_dict(fig), self.old)
+        self.assertEqual(calls[0]["method"], "addTraces")
+
+    def test_type_change_needs_full_redraw(self):
+        fig = go.Figure([go.Bar(y=[1, 2]), self.fig.data[1]])
+        self.assertIsNone(diff_figures(self.old, figure_to_dict(fig)))
+
+    def test_unchanged_arrays_are_kept_by_identity(self):
+        fig = go.Figure(go.Scatter(x=np.arange(100_000.0), y=np.arange(100_000.0)))
+        old = snapshot_figure(figure_to_dict(fig))
+        fig.update_layout(title="t")
+        new = snapshot_figure(figure_to_dict(fig), old)
+        self.assertIs(new["data"][0]["x"], old["data"][0]["x"])
+        (call,) = diff_figures(old, new)
+        self.assertEqual(call["args"][0], {})
+        # the caller's arrays are left writeable, and edits in place show up
+        fig.data[0].y[0] = 7.0
+        (call,) = diff_figures(new, snapshot_figure(figure_to_dict(fig), new))
+        self.assertEqual(list(call["args"][0]), ["y"])
+
+    def test_writeable_arrays_are_snapshotted(self):
+        y = np.zeros(5)
+        old = snapshot_figure({"data": [{"y": y}], "layout": {}})
+        y[0] = 1.0
+        calls = diff_figures(old, {"data": [{"y": y}], "layout": {}})
+        self.assertEqual(calls[0]["args"][2], [0])
+
+
+class TestReleaseArrays(unittest.TestCase):
+
+    def test_release_and_resolve(self):
+        big, small = np.arange(100_000.0), np.arange(3.0)
+        fig = {"data": [{"x": big, "y": small}], "layout": {}}
+        released = release_arrays(fig)
+        self.assertIsInstance(released["data"][0]["x"], ArrayRef)
+        self.assertIs(released["data"][0]["y"], small)
+        resolved, n_freed = resolve_arrays(released)
+        self.assertIs(resolved["data"][0]["x"], big)
+        self.assertEqual(n_freed, 0)
+
+        del fig, big, resolved
+        resolved, n_freed = resolve_arrays(released)
+        self.assertIsNone(resolved["data"][0]["x"])
+        self.assertEqual(n_freed, 1)
+
+    def test_diff_against_released(self):
+        fig = go.Figure(go.Scatter(x=np.arange(100_000.0), y=np.arange(100_000.0)))
+        old = release_arrays(snapshot_figure(figure_to_dict(fig)))
+        self.assertIsInstance(old["data"][0]["y"], ArrayRef)
+        # the figure still holds its arrays: a title edit is only a relayout
+        fig.update_layout(title="t")
+        new = snapshot_figure(figure_to_dict(fig), old)
+        self.assertIs(new["data"][0]["y"], old["data"][0]["y"])
+        (call,) = diff_figures(old, new)
+        self.assertEqual(call["args"][0], {})
+        # modified in place: changed
+        fig.data[0].y[0] = 7.0
+        self.assertIsNone(new["data"][0]["y"].get())
+        (call,) = diff_figures(new, snapshot_figure(figure_to_dict(fig), new))
+        self.assertEqual(list(call["args"][0]), ["y"])
+        # freed: counts as changed
+        old = release_arrays(snapshot_figure({"data": [{"y": np.arange(100_000.0)}], "layout": {}}))
+        calls = diff_figures(old, {"data": [{"y": np.arange(100_000.0)}], "layout": {}})
+        self.assertEqual(list(calls[0]["args"][0]), ["y"])
@@ -0,0 +1,84 @@
+"""Tests for bulk HTML export."""
+
+import gzip
+import json
+import os
+import re
+import tempfile
+import unittest
+
+import numpy as np
+
+from pyside6_plotly.encoding import from_typed_array_spec, serialize
+from pyside6_plotly.html_export import export_html, figure_pieces
+
+
+def read_figure(text):
+    payload = re.search(r'<script type="application/json" id="figure">(.*?)</script>', text, re.S).group(1)
+    return json.loads(payload)
+
+
+class TestExportHTML(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.dir = self.tmpdir.name
+
+    def figures(self, n):
+        for i in range(n):
+            fig = {"data": [{"y": np.arange(5.0) * i}], "layout": {"title": {"text": "</script>"}}}
+            yield fig, os.path.join(self.dir, "pages", f"fig{i}.html")
+
+    def test_shared_plotly_js(self):
+        results = export_html(self.figures(3), os.path.join(self.dir, "plotly.min.js"), processes=0)
+        self.assertEqual([os.path.basename(p) for p, _ in results], ["fig0.html", "fig1.html", "fig2.html"])
+        self.assertTrue(os.path.exists(os.path.join(self.dir, "plotly.min.js")))
+        with open(results[2][0], encoding="utf-8") as f:
+            text = f.read()
+        self.assertIn('<script src="../plotly.min.js">', text)
+        fig = read_figure(text)
+        np.testing.assert_array_equal(from_typed_array_spec(fig["data"][0]["y"]), np.arange(5.0) * 2)
+        self.assertEqual(fig["layout"]["title"]["text"], "</script>")
+        self.assertEqual(results[2][1], os.path.getsize(results[2][0]))
+
+    def test_process_pool_gzip(self):
+        results = export_html(
+            self.figures(5), "https://cdn.example.org/plotly.min.js",
+            processes=2, compress=True, max_pending=2,
+        )
+        self.assertEqual(len(results), 5)
+        self.assertFalse(os.path.exists(os.path.join(self.dir, "plotly.min.js")))
+        path = results[4][0]
+        self.assertTrue(path.endswith("fig4.html.gz"))
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            text = f.read()
+        self.assertIn('<script src="https://cdn.example.org/plotly.min.js">', text)
+        self.assertEqual(len(read_figure(text)["data"]), 1)
+
+    def test_reused_figure_in_pool(self):
+        def reused():
+            fig = {"data": [{"y": None}], "layout": {}}
+            for i in range(4):
+                fig["data"][0]["y"] = np.full(3, float(i))
+                yield fig, os.path.join(self.dir, f"fig{i}.html")
+
+        results = export_html(reused(), "https://cdn.example.org/plotly.min.js", processes=2)
+        for i, (path, _) in enumerate(results):
+            with open(path, encoding="utf-8") as f:
+                y = from_typed_array_spec(read_figure(f.read())["data"][0]["y"])
+            np.testing.assert_array_equal(y, np.full(3, float(i)))
+
+    def test_figure_pieces(self):
+        fig = {
+            "data": [{"y": np.arange(3.0)}, {"y": np.array([1.0, np.nan])}],
+            "layout": {"title": {"text": "t"}},
+            "frames": [],
+        }
+        for binary in (True, False):
+            self.assertEqual(json.loads("".join(figure_pieces(fig, binary))), json.loads(serialize(fig, binary)))
+        self.assertEqual(json.loads("".join(figure_pieces({"data": []}))), {"data": []})
+
+
+if __name__ == "__main__":
+    unittest.main()
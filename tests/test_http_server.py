@@ -0,0 +1,61 @@
+"""Tests for the local HTTP payload server."""
+
+import gzip
+import json
+import unittest
+import urllib.error
+import urllib.request
+import zlib
+
+from pyside6_plotly.http_server import PlotlyHTTPServer
+
+
+class TestPlotlyHTTPServer(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = PlotlyHTTPServer()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.close()
+
+    def fetch(self, url, encoding=None):
+        request = urllib.request.Request(url)
+        if encoding:
+            request.add_header("Accept-Encoding", encoding)
+        with urllib.request.urlopen(request) as response:
+            return response.headers, response.read()
+
+    def test_payload_round_trip(self):
+        payload = json.dumps({"data": [{"y": list(range(100_000))}], "layout": {}})
+        payload_id = self.server.publish(payload)
+        url = self.server.payload_url(payload_id)
+
+        headers, body = self.fetch(url)
+        self.assertEqual(body.decode(), payload)
+        self.assertEqual(headers["Transfer-Encoding"], "chunked")
+
+        headers, body = self.fetch(url, "gzip, deflate")
+        self.assertEqual(headers["Content-Encoding"], "gzip")
+        self.assertEqual(gzip.decompress(body).decode(), payload)
+
+        headers, body = self.fetch(url, "deflate")
+        self.assertEqual(headers["Content-Encoding"], "deflate")
+        self.assertEqual(zlib.decompress(body).decode(), payload)
+
+    def test_discarded_payload_is_gone(self):
+        payload_id = self.server.publish(b"{}")
+        self.server.discard(payload_id)
+        with self.assertRaises(urllib.error.HTTPError) as cm:
+            self.fetch(self.server.payload_url(payload_id))
+        self.assertEqual(cm.exception.code, 404)
+
+    def test_discard_owner(self):
+        owned = [self.server.publish(b"{}", owner="plot") for _ in range(2)]
+        other = self.server.publish(b"{}")
+        self.server.discard(owned[0])
+        self.server.discard_owner("plot")
+        self.assertEqual([self.server.get(payload_id) for payload_id in owned], [None, None])
+        self.assertEqual(self.server.get(other), b"{}")
+        self.server.discard(other)
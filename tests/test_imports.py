@@ -0,0 +1,55 @@
+"""Guard against heavy imports creeping back into the package import."""
+
+import importlib.util
+import subprocess
+import sys
+import unittest
+
+
+def loaded_after(code):
+    """Top-level packages loaded by code, in a fresh interpreter"""
+    script = code + "\nimport sys\nprint(' '.join(sorted({m.split('.')[0] for m in sys.modules})))"
+    output = subprocess.run([sys.executable, "-c", script], check=True, capture_output=True, text=True)
+    return set(output.stdout.split())
+
+
+class TestLazyImports(unittest.TestCase):
+
+    def test_package_import_is_light(self):
+        loaded = loaded_after("import pyside6_plotly")
+        self.assertTrue(loaded.isdisjoint({"plotly", "PySide6", "numpy"}), loaded)
+
+    def test_serialization_does_not_import_plotly(self):
+        loaded = loaded_after(
+            "import numpy as np\n"
+            "from pyside6_plotly.encoding import serialize\n"
+            "serialize({'data': [{'y': np.arange(3.0)}], 'layout': {}})"
+        )
+        self.assertNotIn("plotly", loaded)
+
+    def test_lazy_attribute(self):
+        loaded = loaded_after("from pyside6_plotly import RingBuffer")
+        self.assertIn("numpy", loaded)
+        self.assertNotIn("PySide6", loaded)
+
+    @unittest.skipIf(importlib.util.find_spec("PySide6") is None, "needs PySide6")
+    def test_late_scheme_registration_warns(self):
+        script = (
+            "import warnings\n"
+            "warnings.simplefilter('error')\n"
+            "from PySide6.QtCore import QCoreApplication\n"
+            "app = QCoreApplication([])\n"
+            "try:\n"
+            "    from pyside6_plotly.url_scheme import register_scheme\n"
+            "except ImportError:\n"
+            "    print('skip')\n"
+            "else:\n"
+            "    try:\n"
+            "        register_scheme()\n"
+            "    except RuntimeWarning:\n"
+            "        print('warned')\n"
+        )
+        output = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True).stdout.strip()
+        if output == "skip":
+            self.skipTest("needs QtWebEngine")
+        self.assertEqual(output, "warned")
@@ -0,0 +1,51 @@
+"""Tests for plotly.js bundle selection."""
+
+import os
+import re
+import tempfile
+import unittest
+from unittest import mock
+
+from pyside6_plotly.plotly_js import (
+    BUNDLE_DIR_ENV, PARTIAL_BUNDLES, full_bundle, partial_bundle, plotly_js_path,
+)
+
+
+class TestBundles(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.path = os.path.join(self.tmpdir.name, "plotly-cartesian.min.js")
+        with open(self.path, "w") as f:
+            f.write("// cartesian")
+
+    def test_full_bundle_draws_everything(self):
+        bundle = full_bundle()
+        self.assertEqual(bundle.path, plotly_js_path())
+        self.assertTrue(os.path.exists(bundle.path))
+        self.assertEqual(bundle.missing_trace_types({"data": [{"type": "scatter3d"}]}), [])
+
+    def test_partial_bundles_match_plotly_js(self):
+        # every trace type listed must exist in the plotly.js plotly ships
+        with open(plotly_js_path(), encoding="utf-8") as f:
+            registered = set(re.findall(r'moduleType:"trace",name:"(\w+)"', f.read()))
+        self.assertIn("scatter", registered)
+        for name, trace_types in PARTIAL_BUNDLES.items():
+            self.assertEqual(trace_types - registered, set(), name)
+
+    def test_missing_trace_types(self):
+        bundle = partial_bundle("cartesian", self.path)
+        fig = {"data": [{"y": [1]}, {"type": "heatmap"}, {"type": "scatter3d"}, {"type": "choropleth"}]}
+        self.assertEqual(bundle.missing_trace_types(fig), ["choropleth", "scatter3d"])
+        self.assertEqual(bundle.filename, "plotly-cartesian.min.js")
+
+    def test_bundle_dir_from_environment(self):
+        with mock.patch.dict(os.environ, {BUNDLE_DIR_ENV: self.tmpdir.name}):
+            self.assertEqual(partial_bundle("cartesian").path, self.path)
+            with self.assertRaises(FileNotFoundError):
+                partial_bundle("gl3d")
+
+    def test_unknown_bundle(self):
+        with self.assertRaises(ValueError):
+            partial_bundle("everything", self.path)
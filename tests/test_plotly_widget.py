@@ -0,0 +1,161 @@
+"""Tests for `pyside6_plotly.plotly_widget.PlotlyFigureMixin`, without a page."""
+
+import json
+import time
+import unittest
+from unittest import mock
+
+import numpy as np
+
+try:
+    from PySide6.QtCore import QCoreApplication, QEvent, QObject
+
+    from pyside6_plotly.cache import SerializationCache
+    from pyside6_plotly.plotly_widget import PlotlyCallbacks, PlotlyFigureMixin
+    from pyside6_plotly.streaming import RingBuffer
+except ImportError:  # no QtWebEngine
+    PlotlyFigureMixin = None
+
+
+if PlotlyFigureMixin is not None:
+    class Plot(PlotlyFigureMixin, QObject):
+        """A plot whose page is played by the test: messages are recorded in sent"""
+
+        def __init__(self, threaded_serialization=False, **kwargs):
+            super().__init__()
+            self.callbacks = PlotlyCallbacks()
+            self._init_figure_state(threaded_serialization=threaded_serialization, **kwargs)
+            self.sent = []
+            for kind in ("update_plot", "patch_plot", "extend_plot"):
+                getattr(self.callbacks, kind).connect(lambda payload, kind=kind: self.sent.append((kind, payload)))
+            self.callbacks.page_ready.emit()
+
+        def ack(self, page_timing="{}"):
+            while self._in_flight:
+                self.callbacks.render_done.emit(page_timing)
+
+
+@unittest.skipIf(PlotlyFigureMixin is None, "needs QtWebEngine")
+class TestPlotlyFigureMixin(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QCoreApplication.instance() or QCoreApplication([])
+
+    def test_new_data_ends_decimation(self):
+        plot = Plot()
+        y = np.zeros(10)
+        plot.set_figure({"data": [{"y": y}], "layout": {}})
+        plot.decimate_trace(0, np.arange(100_000.0), max_points=100)
+        plot.ack()
+        # same data, new title: still decimated
+        plot.set_figure({"data": [{"y": y}], "layout": {"title": "t"}})
+        self.assertIn(0, plot.decimated_traces)
+        self.assertEqual(len(plot._last_figure["data"][0]["y"]), 100)
+        # new data for the trace: plotted as given
+        plot.set_figure({"data": [{"y": np.ones(10)}], "layout": {"title": "t"}})
+        self.assertEqual(plot.decimated_traces, {})
+        np.testing.assert_array_equal(plot._last_figure["data"][0]["y"], np.ones(10))
+
+    def test_failed_patch_resends_figure(self):
+        plot = Plot()
+        plot.set_figure({"data": [{"y": np.zeros(10)}], "layout": {}})
+        plot.ack()
+        plot.extend_traces(0, {"y": np.ones(3)})
+        self.assertEqual(plot.sent[-1][0], "extend_plot")
+        plot.ack(json.dumps({"error": "RangeError"}))
+        self.assertEqual(plot.sent[-1][0], "update_plot")
+
+    def test_streamed_window_is_copied_when_read(self):
+        plot = Plot(binary_arrays=False)
+        plot.set_figure({"data": [{"y": np.zeros(2)}], "layout": {}})
+        plot.ack()
+        with mock.patch.object(RingBuffer, "to_array", autospec=True, side_effect=RingBuffer.to_array) as to_array:
+            for i in range(5):
+                plot.extend_traces(0, {"y": [float(i)]}, max_points=4)
+                plot.ack()
+            self.assertEqual(to_array.call_count, 0)
+            # extended while an update is in flight: merged into a restyle
+            # of the whole window
+            plot.extend_traces(0, {"y": [5.0]}, max_points=4)
+            plot.extend_traces(0, {"y": [6.0]}, max_points=4)
+            plot.ack()
+        kind, calls = plot.sent[-1]
+        self.assertEqual(kind, "patch_plot")
+        self.assertIn("[3.0, 4.0, 5.0, 6.0]", calls)
+        np.testing.assert_array_equal(plot._sent_figure["data"][0]["y"], [3, 4, 5, 6])
+
+    def test_unfetched_payloads_go_with_the_widget(self):
+        plot = Plot(transport="http")
+        plot.http_min_bytes = 0
+        server = plot._http_server
+        plot.set_figure({"data": [{"y": np.zeros(3)}], "layout": {}})
+        payload_id = plot._awaiting_ack[0]["payload_id"]
+        self.assertIsNotNone(server.get(payload_id))
+        plot.deleteLater()
+        QCoreApplication.sendPostedEvents(plot, QEvent.Type.DeferredDelete)
+        self.assertIsNone(server.get(payload_id))
+
+    def test_cache_with_diffs(self):
+        plot = Plot()
+        plot.serialization_cache = SerializationCache()
+        records = []
+        plot.callbacks.update_timing.connect(records.append)
+        a = {"data": [{"y": np.arange(1000.0)}], "layout": {}}
+        b = {"data": [{"y": np.arange(1000.0)}], "layout": {"title": {"text": "b"}}}
+        for fig in (a, b, a):
+            plot.set_figure(fig)
+            plot.ack()
+        # going back to a figure is a small patch, even when it is cached
+        self.assertEqual([kind for kind, _ in plot.sent], ["update_plot", "patch_plot", "patch_plot"])
+        stats = plot.serialization_cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (0, 1))
+        # sent whole (e.g. after a reload): from the cache
+        plot._sent_figure = None
+        plot.set_figure(a)
+        plot.ack()
+        self.assertEqual(plot.sent[-1][0], "update_plot")
+        self.assertTrue(records[-1].get("cached"))
+        self.assertEqual(plot.serialization_cache.stats()["hits"], 1)
+
+    def test_cache_diffed_figures(self):
+        plot = Plot()
+        plot.serialization_cache = SerializationCache()
+        plot.cache_diffed_figures = True
+        a = {"data": [{"y": np.arange(1000.0)}], "layout": {}}
+        b = {"data": [{"y": np.arange(1000.0) * 2}], "layout": {}}
+        for fig in (a, b):
+            plot.set_figure(fig)
+            plot.ack()
+        self.assertEqual(len(plot.serialization_cache), 2)
+        self.assertIsNotNone(plot.serialization_cache.get(plot._sent_key))
+
+    def test_failed_serialization_is_recovered(self):
+        plot = Plot()
+        errors = []
+        plot.callbacks.update_failed.connect(errors.append)
+        with self.assertRaises(TypeError):
+            plot.set_figure({"data": [], "layout": {"meta": object()}})
+        self.assertEqual(len(errors), 1)
+        self.assertEqual(plot.frame_stats()["in_flight"], 0)
+        plot.set_figure({"data": [{"y": np.zeros(3)}], "layout": {}})
+        self.assertEqual([kind for kind, _ in plot.sent], ["update_plot"])
+
+    def test_failed_threaded_serialization_is_recovered(self):
+        plot = Plot(threaded_serialization=True)
+        errors = []
+        plot.callbacks.update_failed.connect(errors.append)
+        plot.set_figure({"data": [], "layout": {"meta": object()}})
+        deadline = time.monotonic() + 5
+        while not errors and time.monotonic() < deadline:
+            QCoreApplication.processEvents()
+        self.assertIsInstance(errors[0], TypeError)
+        self.assertEqual(plot.frame_stats(), {**plot.frame_stats(), "in_flight": 0, "pending": False})
+        plot.set_figure({"data": [{"y": np.zeros(3)}], "layout": {}})
+        while not plot.sent and time.monotonic() < deadline:
+            QCoreApplication.processEvents()
+        self.assertEqual([kind for kind, _ in plot.sent], ["update_plot"])
+
+
+if __name__ == "__main__":
+    unittest.main()
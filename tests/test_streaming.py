@@ -0,0 +1,38 @@
+"""Tests for `pyside6_plotly.streaming`."""
+
+import unittest
+
+import numpy as np
+
+from pyside6_plotly.streaming import RingBuffer
+
+
+class TestRingBuffer(unittest.TestCase):
+
+    def test_bounded_keeps_newest(self):
+        buffer = RingBuffer(5)
+        for start in range(0, 12, 3):
+            buffer.extend(np.arange(start, start + 3))
+        np.testing.assert_array_equal(buffer.to_array(), [7, 8, 9, 10, 11])
+        self.assertEqual(len(buffer), 5)
+        self.assertEqual(buffer.dropped, 7)
+
+    def test_extend_larger_than_capacity(self):
+        buffer = RingBuffer(3)
+        buffer.extend([1, 2])
+        buffer.extend(np.arange(10))
+        np.testing.assert_array_equal(buffer.to_array(), [7, 8, 9])
+        self.assertEqual(buffer.dropped, 9)
+
+    def test_unbounded_grows(self):
+        buffer = RingBuffer()
+        for start in range(0, 100, 7):
+            buffer.extend(np.arange(start, start + 7))
+        np.testing.assert_array_equal(buffer.to_array(), np.arange(105))
+
+    def test_dtype_is_promoted(self):
+        buffer = RingBuffer(4, dtype=np.int32)
+        buffer.extend([1, 2])
+        buffer.extend([2.5])
+        self.assertEqual(buffer.dtype, np.float64)
+        np.testing.assert_array_equal(buffer.to_array(), [1, 2, 2.5])
@@ -0,0 +1,33 @@
+"""Tests for the update timing statistics."""
+
+import unittest
+
+from pyside6_plotly.timing import TimingStats, timed
+
+
+class TestTimingStats(unittest.TestCase):
+
+    def test_summary_percentiles(self):
+        stats = TimingStats()
+        for ms in range(1, 101):
+            stats.add({"kind": "patch", "plot": float(ms), "paint": None})
+        summary = stats.summary()
+        self.assertEqual(summary["plot"]["n"], 100)
+        self.assertAlmostEqual(summary["plot"]["p50"], 50.5)
+        self.assertAlmostEqual(summary["plot"]["p95"], 95.05)
+        self.assertEqual(summary["plot"]["max"], 100.0)
+        # stages without measurements are left out
+        self.assertNotIn("paint", summary)
+        self.assertNotIn("serialize", summary)
+
+    def test_rolling_window(self):
+        stats = TimingStats(maxlen=3)
+        for ms in (100.0, 1.0, 2.0, 3.0):
+            stats.add({"total": ms})
+        self.assertEqual(len(stats), 3)
+        self.assertEqual(stats.summary()["total"]["max"], 3.0)
+
+    def test_timed(self):
+        result, ms = timed(sum, [1, 2, 3])
+        self.assertEqual(result, 6)
+        self.assertGreaterEqual(ms, 0)
@@ -0,0 +1,55 @@
+"""Tests for WebGL trace promotion."""
+
+import unittest
+
+import numpy as np
+import plotly.graph_objects as go
+
+from pyside6_plotly.encoding import figure_to_dict
+from pyside6_plotly.webgl import promote_traces, trace_points
+
+
+class TestPromoteTraces(unittest.TestCase):
+
+    def test_promotes_large_scatter(self):
+        fig = go.Figure([
+            go.Scatter(y=np.arange(1000.0), mode="markers", marker={"color": "red"}, name="big"),
+            go.Scatter(y=np.arange(10.0)),
+            go.Bar(y=np.arange(1000.0)),
+        ])
+        fig_dict = figure_to_dict(fig)
+        promoted_dict, promoted = promote_traces(fig_dict, threshold=500)
+        self.assertEqual(promoted, [{"index": 0, "from": "scatter", "to": "scattergl", "points": 1000}])
+        trace = promoted_dict["data"][0]
+        self.assertEqual(trace["type"], "scattergl")
+        self.assertEqual(trace["marker"], {"color": "red"})
+        self.assertEqual(trace["name"], "big")
+        self.assertIs(trace["y"], fig_dict["data"][0]["y"])
+        self.assertIs(promoted_dict["data"][1], fig_dict["data"][1])
+        # the original is untouched
+        self.assertEqual(fig.data[0].type, "scatter")
+        self.assertEqual(fig_dict["data"][0]["type"], "scatter")
+
+    def test_keeps_unsupported_and_small(self):
+        fig_dict = {"data": [
+            {"y": list(range(100)), "stackgroup": "one"},
+            {"y": list(range(100)), "line": {"shape": "spline"}},
+            {"y": list(range(100)), "line": {"shape": "hv"}},
+            {"y": list(range(5))},
+        ]}
+        promoted_dict, promoted = promote_traces(fig_dict, threshold=50)
+        self.assertEqual([p["index"] for p in promoted], [2])
+        self.assertEqual(promoted_dict["data"][2]["type"], "scattergl")
+        self.assertNotIn("type", promoted_dict["data"][0])
+
+        unchanged, promoted = promote_traces(fig_dict, threshold=1000)
+        self.assertIs(unchanged, fig_dict)
+        self.assertEqual(promoted, [])
+
+    def test_trace_points(self):
+        self.assertEqual(trace_points({"x": np.arange(3), "y": [1, 2, 3, 4]}), 4)
+        self.assertEqual(trace_points({}), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
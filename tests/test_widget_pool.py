@@ -0,0 +1,146 @@
+"""Tests for `pyside6_plotly.widget_pool`."""
+
+import os
+import time
+import unittest
+
+try:
+    from PySide6.QtCore import QObject, Signal
+    from PySide6.QtWidgets import QApplication, QWidget
+
+    from pyside6_plotly.plotly_widget import PlotlyCallbacks, PlotlyFigureMixin
+    from pyside6_plotly.widget_pool import PlotlyWidgetPool
+except ImportError:  # no QtWebEngine
+    PlotlyWidgetPool = None
+
+
+if PlotlyWidgetPool is not None:
+    class FakeCallbacks(QObject):
+        page_ready = Signal()
+
+    class FakeWidget(QWidget):
+        """Stands in for PlotlyQtWidget: no page, ready when told"""
+
+        def __init__(self):
+            super().__init__()
+            self.callbacks = FakeCallbacks()
+            self.page_ready = False
+            self.resets = 0
+
+        def warm_up(self):
+            self.page_ready = True
+            self.callbacks.page_ready.emit()
+
+        def reset(self):
+            self.resets += 1
+
+    class FigureWidget(PlotlyFigureMixin, QWidget):
+        """Figure state of a PlotlyQtWidget, without the page"""
+
+        def __init__(self, **kwargs):
+            super().__init__()
+            self.callbacks = PlotlyCallbacks()
+            self._init_figure_state(threaded_serialization=False, **kwargs)
+            self.callbacks.page_ready.emit()
+
+        def warm_up(self):
+            pass
+
+
+@unittest.skipIf(PlotlyWidgetPool is None, "needs QtWebEngine")
+class TestWidgetPool(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+        cls.app = QApplication.instance() or QApplication([])
+
+    def make_pool(self, **kwargs):
+        self.created = []
+
+        def factory():
+            widget = FakeWidget()
+            self.created.append(widget)
+            return widget
+
+        pool = PlotlyWidgetPool(widget_factory=factory, **kwargs)
+        pool.fill()
+        return pool
+
+    def test_acquire_warm_and_cold(self):
+        pool = self.make_pool(size=1)
+        self.created[0].warm_up()
+        self.assertIs(pool.acquire(), self.created[0])
+        # nothing warm: the widget still loading is handed out
+        pool.fill()
+        self.assertIs(pool.acquire(), self.created[1])
+        metrics = pool.metrics()
+        self.assertEqual((metrics["hits"], metrics["misses"], metrics["in_use"]), (1, 1, 2))
+        self.assertEqual(metrics["hit_rate"], 0.5)
+        self.assertEqual(len(pool.warmup_times), 1)
+
+    def test_release_resets_widget(self):
+        pool = self.make_pool(size=1)
+        widget = self.created[0]
+        widget.warm_up()
+        pool.acquire()
+        pool.release(widget)
+        self.assertEqual(widget.resets, 1)
+        self.assertEqual(pool.metrics()["idle"], 1)
+        # a second release of the same widget is ignored
+        pool.release(widget)
+        self.assertEqual(widget.resets, 1)
+        self.assertIs(pool.acquire(), widget)
+
+    def test_release_to_full_pool_discards(self):
+        pool = self.make_pool(size=1)
+        self.created[0].warm_up()
+        widget = pool.acquire()
+        pool.fill()
+        self.created[1].warm_up()
+        pool.release(widget)
+        self.assertEqual(pool.metrics()["idle"], 1)
+        self.assertNotIn(widget, [w for w, _ in pool._idle])
+
+    def test_evict_idle_keeps_min_size(self):
+        pool = self.make_pool(size=3, idle_timeout=0.01, min_size=1)
+        for widget in self.created:
+            widget.warm_up()
+        time.sleep(0.02)
+        pool.evict_idle()
+        metrics = pool.metrics()
+        self.assertEqual((metrics["idle"], metrics["evictions"]), (1, 2))
+
+    def test_release_restores_options(self):
+        pool = PlotlyWidgetPool(widget_factory=lambda: FigureWidget(binary_arrays=False), size=1)
+        pool.fill()
+        widget = pool.acquire()
+        widget.binary_arrays = True
+        widget.backpressure = False
+        widget.decimation_density = 8
+        widget.set_figure({"data": [{"y": [1, 2, 3]}], "layout": {}})
+        widget.callbacks.render_done.emit("{}")
+        self.assertEqual(widget.rendered_frames, 1)
+        pool.release(widget)
+        self.assertEqual((widget.binary_arrays, widget.backpressure, widget.decimation_density), (False, True, 2))
+        self.assertEqual((widget.rendered_frames, len(widget.timing_stats)), (0, 0))
+
+
+@unittest.skipIf(PlotlyWidgetPool is None, "needs QtWebEngine")
+class TestDisconnectReceivers(unittest.TestCase):
+
+    def test_only_receiver_signals(self):
+        callbacks = PlotlyCallbacks()
+        received = []
+        callbacks.plotly_click.connect(received.append)
+        callbacks.selection_changed.connect(received.append)
+        callbacks.render_done.connect(received.append)
+        callbacks.disconnect_receivers()
+        callbacks.plotly_click.emit("click")
+        callbacks.selection_changed.emit({})
+        callbacks.render_done.emit("ack")
+        self.assertEqual(received, ["ack"])
+
+
+if __name__ == "__main__":
+    unittest.main()